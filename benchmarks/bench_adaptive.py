@@ -0,0 +1,73 @@
+#Triggers entries the way samples/lf_trigger.py does against a fake server that degrades under load
+#(fake_ra.set_capacity): latency grows with the square of the overload past --capacity calls in flight, and
+#past --overload calls start to fail. Runs a fixed number of workers for each of --fixed, then --max-workers
+#workers under an AdaptiveLimiter, and prints throughput, errors and the limit the controller settled on.
+#usage: python bench_adaptive.py [-n items] [--capacity calls] [--overload calls] [--latency ms] [--rate calls/s]
+import argparse
+import os
+import sys
+import time
+
+import fake_ra
+fake_ra.install()
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'samples'))
+from lf_wrapper import LFWrapper
+from lf_bulk import BulkRunner
+from lf_limit import AdaptiveLimiter, TokenBucket
+import lf_trigger
+
+def run(lf, items, workers, limiter = None, bucket = None):
+    pool = lf.CreatePool(max_size = workers, server = 'fake', database = 'bench')
+    runner = BulkRunner(pool, lambda sess, entryId: lf_trigger.trigger_entry(lf, sess, entryId), workers = workers,
+                        retries = 3, backoff = 0.01, limiter = limiter, bucket = bucket)
+    fake_ra.LOAD['errors'] = 0
+    try:
+        stats = runner.Run(iter(range(1, items + 1)))
+    finally:
+        pool.Close()
+    return stats.Summary(), fake_ra.LOAD['errors']
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--items', type=int, default=3000,
+                        help='Number of entries to trigger per run')
+    parser.add_argument('--capacity', type=int, default=12,
+                        help='Calls in flight the fake server handles before slowing down')
+    parser.add_argument('--overload', type=int, default=32,
+                        help='Calls in flight past which the fake server starts failing calls')
+    parser.add_argument('--latency', type=float, default=2,
+                        help='Unloaded round trip of each read and write in ms')
+    parser.add_argument('--fixed', type=str, default='4,8,16,32,64',
+                        help='Comma separated worker counts to run without the limiter')
+    parser.add_argument('--max-workers', type=int, default=64,
+                        help='Workers available to the adaptive run')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Also cap the adaptive run at this many items per second')
+    args = parser.parse_args()
+
+    fake_ra.set_latency(read = args.latency / 1000.0, write = args.latency / 1000.0)
+    fake_ra.set_capacity(args.capacity, args.overload)
+    lf = LFWrapper(fake_ra.FakeEnvironment())
+    lf.LoadRA('10.2', 'RepositoryAccess')
+
+    print 'items: {}, server capacity {} calls in flight, failing past {}'.format(args.items, args.capacity,
+                                                                                   args.overload)
+    line = '{:<22} {:>9} {:>8} {:>8} {:>12} {:>9}'
+    print line.format('run', 'items/s', 'p99 ms', 'failed', 'server errs', 'retries')
+    for workers in [int(w) for w in args.fixed.split(',')]:
+        s, errors = run(lf, args.items, workers)
+        print line.format('fixed {}'.format(workers), '{:.0f}'.format(s['throughput']),
+                          '{:.0f}'.format(s['p99'] * 1000), s['failed'], errors, s['retries'])
+
+    limiter = AdaptiveLimiter(max_limit = args.max_workers)
+    bucket = TokenBucket(args.rate) if args.rate else None
+    s, errors = run(lf, args.items, args.max_workers, limiter, bucket)
+    print line.format('adaptive (max {})'.format(args.max_workers), '{:.0f}'.format(s['throughput']),
+                      '{:.0f}'.format(s['p99'] * 1000), s['failed'], errors, s['retries'])
+    print 'limiter: {}'.format(limiter.Stats())
+    if bucket is not None:
+        print 'bucket:  {}'.format(bucket.Stats())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#Compares editing entries one edit at a time (load, edit, Save for every edit, as samples/lf_trigger.py does)
+#with an LFBatch that records the edits and applies them with one load and one Save per entry.
+#Both runs use the same session pool; reads and writes cost the simulated --latency.
+#usage: python bench_batch.py [-n entries] [-k edits per entry] [-w workers] [--latency ms]
+import argparse
+import time
+
+import fake_ra
+fake_ra.install()
+
+from lf_wrapper import LFWrapper
+from lf_bulk import BulkRunner
+
+def edit(lf, entry, k):
+    if k % 2:
+        entry.Name = 'Edited {}'.format(k)
+    else:
+        entry.RenameTo('Renamed {}'.format(k), lf.EntryNameOption.AutoRename)
+
+def one_at_a_time(lf, pool, entries, edits, workers):
+    def apply(sess, item):
+        id, k = item
+        entry = lf.Entry.GetEntryInfo(id, sess)
+        edit(lf, entry, k)
+        entry.Save()
+    runner = BulkRunner(pool, apply, workers = workers)
+    return runner.Run((id, k) for id in range(1, entries + 1) for k in range(edits))
+
+def batched(lf, pool, entries, edits, workers):
+    batch = lf.CreateBatch()
+    for id in range(1, entries + 1):
+        for k in range(edits):
+            edit(lf, batch.Entry(id), k)
+    return batch.Flush(pool = pool, workers = workers)
+
+def measure(run, *args):
+    fake_ra.Entry.round_trips = fake_ra.FakeEntryInfo.saves = 0
+    start = time.time()
+    result = run(*args)
+    return time.time() - start, fake_ra.Entry.round_trips, fake_ra.FakeEntryInfo.saves, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--entries', type=int, default=500,
+                        help='Number of entries edited')
+    parser.add_argument('-k', '--edits', type=int, default=3,
+                        help='Edits made to each entry')
+    parser.add_argument('-w', '--workers', type=int, default=8,
+                        help='Number of pooled sessions')
+    parser.add_argument('--latency', type=float, default=1,
+                        help='Simulated round trip of each read and write in ms')
+    args = parser.parse_args()
+
+    fake_ra.set_latency(read = args.latency / 1000.0, write = args.latency / 1000.0)
+    lf = LFWrapper(fake_ra.FakeEnvironment())
+    lf.LoadRA('10.2', 'RepositoryAccess')
+    pool = lf.CreatePool(max_size = args.workers, server = 'fake', database = 'bench')
+    try:
+        single = measure(one_at_a_time, lf, pool, args.entries, args.edits, args.workers)
+        batch = measure(batched, lf, pool, args.entries, args.edits, args.workers)
+    finally:
+        pool.Close()
+
+    print 'edits:          {} ({} entries x {})'.format(args.entries * args.edits, args.entries, args.edits)
+    print 'one at a time:  {:.3f}s {} loads {} saves'.format(*single[:3])
+    print 'batch:          {:.3f}s {} loads {} saves'.format(*batch[:3])
+    print 'speedup:        {:.2f}x'.format(single[0] / batch[0] if batch[0] else 0)
+    print batch[3].Report()
+
+if __name__ == '__main__':
+    main()
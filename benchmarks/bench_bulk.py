@@ -0,0 +1,77 @@
+#Measures bulk throughput of the samples against the fake SDK: creating documents the way
+#samples/example_setup.py does and triggering entries the way samples/lf_trigger.py does, each on a session pool.
+#Every write and read costs the simulated --latency, so the numbers show how well the workers overlap round trips
+#on top of the wrapper's own overhead.
+#usage: python bench_bulk.py [-n items] [-w workers] [--latency ms] [--json]
+import argparse
+import json
+import os
+import sys
+import time
+
+import fake_ra
+fake_ra.install()
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'samples'))
+from lf_wrapper import LFWrapper
+from lf_bulk import BulkRunner
+import example_setup
+import lf_trigger
+
+class NullLog:
+    def Write(self, lines):
+        pass
+
+def create(lf, pool, items, workers):
+    start = time.time()
+    stats = example_setup.create_documents(lf, pool, items, example_setup.ERROR_RATE, NullLog(), 100, workers)
+    return time.time() - start, stats
+
+def trigger(lf, pool, items, workers):
+    runner = BulkRunner(pool, lambda sess, entryId: lf_trigger.trigger_entry(lf, sess, entryId), workers = workers)
+    start = time.time()
+    stats = runner.Run(iter(range(1, items + 1)))
+    return time.time() - start, stats
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--items', type=int, default=2000,
+                        help='Number of documents to create and entries to trigger')
+    parser.add_argument('-w', '--workers', type=int, default=8,
+                        help='Number of pooled sessions working in parallel')
+    parser.add_argument('--latency', type=float, default=1,
+                        help='Simulated round trip of each read and write in ms')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as one JSON object (used by run_suite.py)')
+    args = parser.parse_args()
+
+    fake_ra.set_latency(read = args.latency / 1000.0, write = args.latency / 1000.0)
+    fake_ra.FOLDERS.Reset()
+    lf = LFWrapper(fake_ra.FakeEnvironment())
+    lf.LoadRA('10.2', 'RepositoryAccess')
+    pool = lf.CreatePool(max_size = args.workers, server = 'fake', database = 'bench')
+    try:
+        #keep the progress lines of create_documents out of the results
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            created = create(lf, pool, args.items, args.workers)
+        finally:
+            sys.stdout = stdout
+        triggered = trigger(lf, pool, args.items, args.workers)
+    finally:
+        pool.Close()
+
+    if args.json:
+        print json.dumps({'items': args.items, 'workers': args.workers,
+                          'create_s': created[0], 'create_per_s': args.items / created[0],
+                          'trigger_s': triggered[0], 'trigger_per_s': args.items / triggered[0]})
+        return
+    print 'items:    {} on {} workers, {}ms per round trip'.format(args.items, args.workers, args.latency)
+    print 'create:   {:.3f}s ({:.0f}/s)'.format(created[0], args.items / created[0])
+    print 'trigger:  {:.3f}s ({:.0f}/s)'.format(triggered[0], args.items / triggered[0])
+    print 'ideal:    {:.0f}/s create, {:.0f}/s trigger'.format(
+        args.workers * 1000.0 / args.latency if args.latency else 0,
+        args.workers * 1000.0 / (2 * args.latency) if args.latency else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#Measures round trips and wall time when many threads read the same entries at the same time,
+#with no coalescing, with single flight only, and with single flight plus micro batching. Each thread reads
+#on its own session, as pooled workers do, so coalescing runs with share_sessions.
+#Entry.GetEntryInfo is given a simulated server latency; the batch function stands in for a bulk read
+#that costs one round trip per batch.
+#usage: python bench_coalesce.py [-t threads] [-n reads] [--ids distinct] [--latency ms]
+import argparse
+import threading
+import time
+
+import fake_clr
+fake_clr.install()
+
+from lf_wrapper import LFWrapper
+import fake_ra
+
+def run(lf, threads, reads, ids):
+    fake_ra.Entry.round_trips = 0
+
+    def worker(offset):
+        sess = fake_ra.FakeSession()
+        for i in range(reads):
+            lf.Entry.GetEntryInfo((offset + i) % ids + 1, sess)
+
+    workers = [threading.Thread(target = worker, args = (n,)) for n in range(threads)]
+    start = time.time()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.time() - start, fake_ra.Entry.round_trips
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-t', '--threads', type=int, default=16,
+                        help='Number of threads reading entries')
+    parser.add_argument('-n', '--reads', type=int, default=50,
+                        help='Reads per thread')
+    parser.add_argument('--ids', type=int, default=32,
+                        help='Number of distinct entry ids read')
+    parser.add_argument('--latency', type=float, default=5,
+                        help='Simulated round trip in ms')
+    args = parser.parse_args()
+    fake_ra.set_latency(read = args.latency / 1000.0)
+
+    lf = fake_ra.load(LFWrapper())
+    plain = run(lf, args.threads, args.reads, args.ids)
+
+    lf.EnableCoalescing(share_sessions = True)
+    flight = run(lf, args.threads, args.reads, args.ids)
+    flight_stats = lf.CoalescingStats()
+
+    def batch(ids, sess):
+        fake_ra.wait('read')
+        fake_ra.Entry.round_trips += 1
+        return [fake_ra.FakeEntryInfo(id) for id in ids]
+    coalescer = lf.EnableCoalescing(window = fake_ra.LATENCY['read'] / 5, share_sessions = True)
+    coalescer.RegisterBatch('Entry', 'GetEntryInfo', batch)
+    batched = run(lf, args.threads, args.reads, args.ids)
+    batched_stats = lf.CoalescingStats()
+
+    print 'reads:          {}'.format(args.threads * args.reads)
+    print 'plain:          {:.3f}s {} round trips'.format(*plain)
+    print 'single flight:  {:.3f}s {} round trips {}'.format(flight[0], flight[1], flight_stats)
+    print 'micro batching: {:.3f}s {} round trips {}'.format(batched[0], batched[1], batched_stats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#Measures the cost of overload resolution for static calls with no caching, with the shared dispatch cache,
+#and with the module wrappers reused between calls (the bound case), which still resolves through the cache.
+#Runs against the fake reflection layer so no SDK is required.
+#usage: python bench_dispatch.py [-n calls] [--json]
+import argparse
+import json
+import time
+
+import fake_clr
+fake_clr.install()
+
+import lf_wrapper
+from lf_wrapper import LFModuleWrapper, LFDispatchCache
+from fake_ra import Entry, Document, FakeSession, FakeFolderInfo
+
+#with reuse off a new module wrapper is created per call, so every call resolves its overload again
+def run(calls, reuse):
+    entry = LFModuleWrapper(Entry, '10.2')
+    document = LFModuleWrapper(Document, '10.2')
+    sess = FakeSession()
+    parent = FakeFolderInfo(1, '\\')
+    auto_rename = 1
+
+    Entry._clr_type.reflection_calls = Document._clr_type.reflection_calls = 0
+    start = time.time()
+    for i in range(calls):
+        if not reuse:
+            entry = LFModuleWrapper(Entry, '10.2')
+            document = LFModuleWrapper(Document, '10.2')
+        entry.GetEntryInfo(i, sess)
+        document.Create(parent, 'Test Doc', auto_rename, sess)
+    return time.time() - start, Entry._clr_type.reflection_calls + Document._clr_type.reflection_calls
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--calls', type=int, default=20000,
+                        help='Number of GetEntryInfo/Create pairs to dispatch')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as one JSON object (used by run_suite.py)')
+    args = parser.parse_args()
+
+    #a zero sized cache evicts every entry, which is equivalent to the uncached lookup path
+    lf_wrapper.DISPATCH_CACHE = LFDispatchCache(0)
+    uncached, reflection_uncached = run(args.calls, False)
+
+    lf_wrapper.DISPATCH_CACHE = LFDispatchCache()
+    cached, reflection_cached = run(args.calls, False)
+    stats = lf_wrapper.DISPATCH_CACHE.Stats()
+
+    bound, reflection_bound = run(args.calls, True)
+
+    if args.json:
+        print json.dumps({'calls': args.calls * 2, 'uncached_s': uncached, 'cached_s': cached, 'bound_s': bound,
+                          'bound_calls_per_s': args.calls * 2 / bound if bound else 0})
+        return
+
+    print 'calls:        {}'.format(args.calls * 2)
+    print 'uncached:     {:.3f}s ({} reflection lookups)'.format(uncached, reflection_uncached)
+    print 'cached:       {:.3f}s ({} reflection lookups)'.format(cached, reflection_cached)
+    print 'bound calls:  {:.3f}s ({} reflection lookups)'.format(bound, reflection_bound)
+    print 'speedup:      {:.2f}x cached, {:.2f}x bound'.format(uncached / cached if cached else 0,
+                                                           uncached / bound if bound else 0)
+    print 'cache:        {}'.format(stats)
+
+if __name__ == '__main__':
+    main()
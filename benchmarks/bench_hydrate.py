@@ -0,0 +1,81 @@
+#Maps records to and from a stub CLR type with --fields properties, field by field through the wrapper
+#(obj.Name = ..., obj.Name) and with FromDict/ToDict, which run a per type property plan.
+#Each is run with reflection only (INVOKER_CACHE.threshold = None) and with compiled invokers, using a stand in
+#compiler on the fake reflection layer.
+#usage: python bench_hydrate.py [-n records] [--fields count]
+import argparse
+import time
+
+import fake_clr
+fake_clr.install()
+
+import lf_wrapper
+from lf_wrapper import LFModuleInstanceWrapper, LFInvokerCache
+
+def fake_compiler(member):
+    attr = '_p_' + member.Name
+    return lambda instance: getattr(instance, attr)
+
+def fake_setter_compiler(member):
+    attr = '_p_' + member.Name
+    return lambda instance, value: setattr(instance, attr, value)
+
+def stub_type(fields):
+    stub = fake_clr.FakeType('Record')
+    for i in range(fields):
+        stub.AddProperty('Field{}'.format(i))
+
+    class FakeRecord(fake_clr.FakeObject):
+        _clr_type = stub
+    return FakeRecord
+
+def records(count, names):
+    return [dict((name, i) for name in names) for i in range(count)]
+
+def by_field(cls, data, names):
+    out = []
+    for record in data:
+        obj = LFModuleInstanceWrapper(cls())
+        for name in names:
+            setattr(obj, name, record[name])
+        out.append(dict((name, getattr(obj, name)) for name in names))
+    return out
+
+def planned(cls, data, names):
+    out = []
+    for record in data:
+        obj = LFModuleInstanceWrapper(cls()).FromDict(record, names)
+        out.append(obj.ToDict(names))
+    return out
+
+def measure(run, cls, data, names):
+    start = time.time()
+    out = run(cls, data, names)
+    elapsed = time.time() - start
+    assert out == data
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--records', type=int, default=100000,
+                        help='Number of records to hydrate and project')
+    parser.add_argument('--fields', type=int, default=8,
+                        help='Properties per record')
+    args = parser.parse_args()
+
+    cls = stub_type(args.fields)
+    names = ['Field{}'.format(i) for i in range(args.fields)]
+    data = records(args.records, names)
+
+    print 'records: {} x {} fields, each set then read back'.format(args.records, args.fields)
+    for label, cache in (('reflection', LFInvokerCache(threshold = None)),
+                         ('compiled', LFInvokerCache(compiler = fake_compiler, setter_compiler = fake_setter_compiler))):
+        lf_wrapper.INVOKER_CACHE = cache
+        lf_wrapper._PROPERTY_PLANS.clear()
+        field = measure(by_field, cls, data, names)
+        plan = measure(planned, cls, data, names)
+        print '{:<11} by field {:.3f}s ({:.0f} records/s), FromDict/ToDict {:.3f}s ({:.0f} records/s), {:.2f}x'.format(
+            label + ':', field, args.records / field, plan, args.records / plan, field / plan if plan else 0)
+
+if __name__ == '__main__':
+    main()
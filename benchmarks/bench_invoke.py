@@ -0,0 +1,69 @@
+#Compares the reflective (MethodInfo.Invoke/PropertyInfo.GetValue) and compiled invoker paths of the wrapper
+#By default runs against the fake reflection layer with a stand in compiler.
+#Pass --clr on a machine with pythonnet/IronPython to compile real System.Linq.Expressions delegates
+#against System.Text.StringBuilder (no SDK required).
+#usage: python bench_invoke.py [-n calls] [--clr]
+import argparse
+import time
+
+def fake_compiler(member):
+    import fake_clr
+    if isinstance(member, fake_clr.FakePropertyInfo):
+        attr = '_p_' + member.Name
+        return lambda instance: getattr(instance, attr)
+    func = member._func
+    return lambda instance, values: func(instance, *values)
+
+def fake_target():
+    import fake_ra
+    return fake_ra.FakeEntryInfo(1), 'Save', 'Name'
+
+def clr_target():
+    import clr
+    clr.AddReference('System')
+    from System.Text import StringBuilder
+    return StringBuilder('benchmark'), 'ToString', 'Length'
+
+def run(wrapper, method, prop, calls):
+    start = time.time()
+    for i in range(calls):
+        getattr(wrapper, method)()
+        getattr(wrapper, prop)
+    return time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--calls', type=int, default=20000,
+                        help='Number of method call/property read pairs')
+    parser.add_argument('--clr', action='store_true',
+                        help='Use the real CLR host and System.Linq.Expressions instead of the fake layer')
+    args = parser.parse_args()
+
+    if not args.clr:
+        import fake_clr
+        fake_clr.install()
+    import lf_wrapper
+    from lf_wrapper import LFModuleInstanceWrapper, LFInvokerCache
+
+    instance, method, prop = clr_target() if args.clr else fake_target()
+    compiler = lf_wrapper.CompileClrInvoker if args.clr else fake_compiler
+    wrapper = LFModuleInstanceWrapper(instance)
+
+    lf_wrapper.INVOKER_CACHE = LFInvokerCache(threshold = None)
+    reflective = run(wrapper, method, prop, args.calls)
+
+    lf_wrapper.INVOKER_CACHE = LFInvokerCache(threshold = 1, compiler = compiler)
+    compiled = run(wrapper, method, prop, args.calls)
+    stats = lf_wrapper.INVOKER_CACHE.Stats()
+    if stats['compiled'] == 0:
+        print 'warning: no members were compiled, the host does not support System.Linq.Expressions'
+
+    print 'host:       {}'.format('clr' if args.clr else 'fake')
+    print 'calls:      {}'.format(args.calls * 2)
+    print 'reflective: {:.3f}s'.format(reflective)
+    print 'compiled:   {:.3f}s'.format(compiled)
+    print 'speedup:    {:.2f}x'.format(reflective / compiled if compiled else 0)
+    print 'invokers:   {}'.format(stats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#Compares the original line by line log parser with the chunked, multiprocess scan in samples/log_parser.py
+#on a synthetic log in the format written by samples/example_setup.py
+#usage: python bench_log_parser.py [--size MB] [--workers N] [--log path]
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from random import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'samples'))
+import log_parser
+
+SUCCESS_LINE = "SUCCESS - Everything's all good in the hood!\n"
+
+def write_log(path, size, error_rate = .33):
+    written = 0
+    tocid = 0
+    with open(path, 'w') as fs:
+        while written < size:
+            lines = []
+            for i in range(10000):
+                tocid += 1
+                lines.append("ERROR - Something went wrong! TOCID={}\n".format(tocid) if random() < error_rate else SUCCESS_LINE)
+            block = ''.join(lines)
+            fs.write(block)
+            written += len(block)
+    return written
+
+#the parser as it was originally written: re.match per line
+def original(path):
+    count = 0
+    test = re.compile("ERROR.*TOCID=(\d*)")
+    with open(path) as fs:
+        for line in fs:
+            m = re.match(test, line)
+            if m != None:
+                count += 1
+    return count
+
+def chunked(path, workers):
+    count = 0
+    for id in log_parser.scan_file(path, workers):
+        count += 1
+    return count
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return result, time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=1024,
+                        help='Size of the synthetic log in MB')
+    parser.add_argument('--workers', type=int, default=log_parser.cpu_count(),
+                        help='Number of scanning processes')
+    parser.add_argument('--log', type=str, default=None,
+                        help='Reuse or keep the synthetic log at this path instead of a temp file')
+    args = parser.parse_args()
+
+    path = args.log or os.path.join(tempfile.gettempdir(), 'lf_bench_{}mb.log'.format(args.size))
+    if not os.path.exists(path) or os.path.getsize(path) < args.size * 1024 * 1024:
+        print 'writing {} MB synthetic log to {}'.format(args.size, path)
+        write_log(path, args.size * 1024 * 1024)
+    size_mb = os.path.getsize(path) / 1024.0 / 1024.0
+
+    baseline, baseline_time = timed(original, path)
+    serial, serial_time = timed(chunked, path, 1)
+    parallel, parallel_time = timed(chunked, path, args.workers)
+    if not baseline == serial == parallel:
+        print 'warning: parsers disagree ({} / {} / {} ids)'.format(baseline, serial, parallel)
+
+    print 'log:                 {:.0f} MB, {} error ids'.format(size_mb, baseline)
+    print 'original (per line): {:.2f}s ({:.0f} MB/s)'.format(baseline_time, size_mb / baseline_time)
+    print 'chunked, 1 process:  {:.2f}s ({:.0f} MB/s)'.format(serial_time, size_mb / serial_time)
+    print 'chunked, {} procs:  {:.2f}s ({:.0f} MB/s)'.format(args.workers, parallel_time, size_mb / parallel_time)
+
+    if args.log is None:
+        os.remove(path)
+
+if __name__ == '__main__':
+    main()
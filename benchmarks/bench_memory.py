@@ -0,0 +1,77 @@
+#Measures per row allocations when enumerating users through the wrapper the way samples/UserScripting.py does
+#Uses tracemalloc when the interpreter provides it, otherwise counts wrapper objects created per row
+#usage: python bench_memory.py [-n rows] [--json]
+import argparse
+import json
+import time
+
+import fake_clr
+fake_clr.install()
+
+import lf_wrapper
+from lf_wrapper import LFModuleWrapper, LFModuleInstanceWrapper
+import fake_ra
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+#counts wrapper objects handed out during the run
+class CountingWrapper(LFModuleInstanceWrapper):
+    __slots__ = ()
+    created = 0
+    def __init__(self, instance, owner = None):
+        CountingWrapper.created += 1
+        LFModuleInstanceWrapper.__init__(self, instance, owner)
+
+def enumerate_users(rows):
+    fake_ra.Account.user_count = rows
+    account = LFModuleWrapper(fake_ra.Account, '10.2')
+    output = account.EnumUsers(fake_ra.FakeSession())
+    count = 0
+    while output.Read() == True:
+        item = output.Item
+        row = {"id": item.Id, "name": item.Name}
+        count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--rows', type=int, default=100000,
+                        help='Number of rows to enumerate')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as one JSON object (used by run_suite.py)')
+    args = parser.parse_args()
+
+    lf_wrapper.LFModuleInstanceWrapper = CountingWrapper
+    if tracemalloc:
+        tracemalloc.start()
+    start = time.time()
+    rows = enumerate_users(args.rows)
+    elapsed = time.time() - start
+
+    if args.json:
+        results = {'rows': rows, 'time_s': elapsed, 'rows_per_s': rows / elapsed if elapsed else 0,
+                   'wrappers_per_row': float(CountingWrapper.created) / rows}
+        if tracemalloc:
+            results['peak_bytes_per_row'] = float(tracemalloc.get_traced_memory()[1]) / rows
+            tracemalloc.stop()
+        print json.dumps(results)
+        return
+
+    print 'rows:              {}'.format(rows)
+    print 'time:              {:.3f}s'.format(elapsed)
+    print 'wrappers per row:  {:.2f}'.format(float(CountingWrapper.created) / rows)
+    if tracemalloc:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        total = sum(stat.size for stat in snapshot.statistics('filename'))
+        print 'traced peak:       {} bytes ({:.1f} bytes/row)'.format(peak, float(peak) / rows)
+        print 'retained:          {} bytes'.format(total)
+    else:
+        print 'tracemalloc is not available on this interpreter, reporting wrapper counts only'
+
+if __name__ == '__main__':
+    main()
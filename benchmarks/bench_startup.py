@@ -0,0 +1,100 @@
+#Measures wrapper start up (LoadRA plus the first access of a few SDK types) with and without the type catalog.
+#Assembly probing is simulated: a GAC miss costs --probe ms and loading the dll costs --load ms.
+#usage: python bench_startup.py [-n starts] [--probe ms] [--load ms] [--json]
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import fake_ra
+clr = fake_ra.install()
+
+from System.IO import FileNotFoundException
+from lf_wrapper import LFWrapper
+
+TYPES = ['Session', 'Folder', 'Entry', 'Document', 'EntryNameOption']
+
+class BenchEnvironment:
+    def __init__(self, folder, catalog):
+        self.LFSO_Paths = {}
+        self.DocumentProcessor_Paths = {}
+        self.RepositoryAccess_Paths = {'10.2': folder}
+        self.TypeCatalog = catalog
+        self.LaserficheConnection = {'server': '', 'database': '', 'username': '', 'password': ''}
+
+class Assemblies:
+    def __init__(self, probe, load):
+        self.probe = probe
+        self.load = load
+
+    #GAC lookups miss, dll paths load
+    def AddReference(self, name):
+        if name.endswith('.dll'):
+            time.sleep(self.load)
+            return None
+        if name.startswith('Laserfiche'):
+            time.sleep(self.probe)
+            raise FileNotFoundException(name)
+
+def start(env):
+    started = time.time()
+    lf = LFWrapper(env)
+    lf.LoadRA('10.2', 'RepositoryAccess')
+    loaded = time.time()
+    for name in TYPES:
+        getattr(lf, name)
+    lf.SaveCatalog()
+    return loaded - started, time.time() - started
+
+def run(env, starts):
+    load_ra = total = 0.0
+    for i in range(starts):
+        a, b = start(env)
+        load_ra += a
+        total += b
+    return load_ra / starts, total / starts
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--starts', type=int, default=20,
+                        help='Number of simulated starts per case')
+    parser.add_argument('--probe', type=float, default=20,
+                        help='Simulated cost of a GAC miss in ms')
+    parser.add_argument('--load', type=float, default=30,
+                        help='Simulated cost of loading the dll in ms')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as one JSON object (used by run_suite.py)')
+    args = parser.parse_args()
+
+    assemblies = Assemblies(args.probe / 1000.0, args.load / 1000.0)
+    clr.AddReference = assemblies.AddReference
+
+    folder = tempfile.mkdtemp()
+    try:
+        #LoadRA builds the dll path with a Windows separator
+        open(r'{}\Laserfiche.RepositoryAccess.dll'.format(folder), 'w').close()
+        catalog = os.path.join(folder, 'catalog.json')
+
+        cold = run(BenchEnvironment(folder, None), args.starts)
+        #the first start with a catalog fills it
+        start(BenchEnvironment(folder, catalog))
+        warm = run(BenchEnvironment(folder, catalog), args.starts)
+    finally:
+        shutil.rmtree(folder)
+        if os.path.exists(r'{}\Laserfiche.RepositoryAccess.dll'.format(folder)):
+            os.remove(r'{}\Laserfiche.RepositoryAccess.dll'.format(folder))
+
+    if args.json:
+        print json.dumps({'starts': args.starts, 'cold_load_ra_ms': cold[0] * 1000, 'cold_start_ms': cold[1] * 1000,
+                          'warm_load_ra_ms': warm[0] * 1000, 'warm_start_ms': warm[1] * 1000})
+        return
+
+    print 'starts:          {}'.format(args.starts)
+    print 'no catalog:      LoadRA {:.1f}ms, LoadRA + {} types {:.1f}ms'.format(cold[0] * 1000, len(TYPES), cold[1] * 1000)
+    print 'warm catalog:    LoadRA {:.1f}ms, LoadRA + {} types {:.1f}ms'.format(warm[0] * 1000, len(TYPES), warm[1] * 1000)
+    print 'speedup:         {:.2f}x'.format(cold[1] / warm[1] if warm[1] else 0)
+
+if __name__ == '__main__':
+    main()
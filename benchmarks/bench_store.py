@@ -0,0 +1,66 @@
+#Simulates a nightly report that snapshots --entries entries and every user, run several times against a
+#persistent result cache. Each entry's change token stands in for the LastModified a folder listing would
+#return; between runs --changed percent of the entries change. Reports the server round trips and time of
+#every run. Reads cost the simulated --latency.
+#usage: python bench_store.py [-n entries] [--users count] [--runs count] [--changed percent] [--latency ms]
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import fake_ra
+fake_ra.install()
+
+from lf_wrapper import LFWrapper
+
+COLUMNS = ['Id', 'Name']
+
+def report(lf, store, sess, tokens, users):
+    fake_ra.Entry.round_trips = 0
+    fake_ra.FakeUserReader.rows_read = 0
+    start = time.time()
+    rows = [store.Call(lf.Entry.GetEntryInfo, id, sess, columns = COLUMNS, token = token)
+            for id, token in sorted(tokens.items())]
+    people = store.Call(lf.Account.EnumUsers, sess, columns = COLUMNS, max_age = 3600)
+    store.Flush()
+    assert len(rows) == len(tokens) and len(people) == users
+    return time.time() - start, fake_ra.Entry.round_trips, fake_ra.FakeUserReader.rows_read
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--entries', type=int, default=2000,
+                        help='Entries in the report')
+    parser.add_argument('--users', type=int, default=2000,
+                        help='Users returned by Account.EnumUsers')
+    parser.add_argument('--runs', type=int, default=3,
+                        help='Number of report runs')
+    parser.add_argument('--changed', type=float, default=5,
+                        help='Percent of the entries changed between runs')
+    parser.add_argument('--latency', type=float, default=0.5,
+                        help='Simulated round trip of each read in ms')
+    args = parser.parse_args()
+
+    fake_ra.set_latency(read = args.latency / 1000.0)
+    fake_ra.Account.user_count = args.users
+    folder = tempfile.mkdtemp()
+    try:
+        lf = LFWrapper(fake_ra.FakeEnvironment())
+        lf.LoadRA('10.2', 'RepositoryAccess')
+        store = lf.EnablePersistentCache(os.path.join(folder, 'report.db'), 'fake/bench')
+        sess = lf.Session.Create('fake', 'bench')
+        tokens = dict((id, 1) for id in range(1, args.entries + 1))
+        for run in range(args.runs):
+            elapsed, entry_reads, user_rows = report(lf, store, sess, tokens, args.users)
+            print 'run {}: {:.3f}s, {} entries read from the server, {} user rows'.format(
+                run + 1, elapsed, entry_reads, user_rows)
+            for id in random.sample(sorted(tokens), int(args.entries * args.changed / 100)):
+                tokens[id] += 1
+        print 'cache: {}'.format(lf.PersistentCacheStats())
+        lf.DisablePersistentCache()
+    finally:
+        shutil.rmtree(folder)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#Stress test for sharing wrappers between threads. Many threads call two methods, each with two overloads,
+#on one shared LFModuleWrapper and one shared LFModuleInstanceWrapper and check that every call ran the
+#method and overload it asked for. Prints the call rate and exits with status 1 on any mismatch.
+#usage: python bench_threads.py [-t threads] [-n calls]
+import argparse
+import sys
+import threading
+import time
+
+import fake_clr
+fake_clr.install()
+
+from lf_wrapper import LFModuleWrapper, LFModuleInstanceWrapper
+
+Stub = fake_clr.FakeType('Stub')
+StubItem = fake_clr.FakeType('StubItem')
+for stub_type in (Stub, StubItem):
+    for method in ('Echo', 'Tag'):
+        stub_type.AddMethod(method, [fake_clr.Int32], lambda _, value, method = method: '{} int {}'.format(method, value))
+        stub_type.AddMethod(method, [fake_clr.String], lambda _, value, method = method: '{} str {}'.format(method, value))
+
+class StubClass:
+    _clr_type = Stub
+    Echo = Tag = 'method'
+
+class FakeStubItem(fake_clr.FakeObject):
+    _clr_type = StubItem
+
+def expected(method, value):
+    return '{} {} {}'.format(method, 'int' if isinstance(value, int) else 'str', value)
+
+def worker(static, item, calls, seed, errors):
+    for i in range(calls):
+        value = i if (i + seed) % 2 else str(i)
+        #hold on to both bound calls before making either, the pattern that used to mix them up
+        echo, tag = (static.Echo, item.Tag) if (i + seed) % 3 else (item.Echo, static.Tag)
+        for call, method in ((tag, 'Tag'), (echo, 'Echo')):
+            result = call(value)
+            if result != expected(method, value):
+                errors.append((method, value, result))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-t', '--threads', type=int, default=32,
+                        help='Number of threads sharing the wrappers')
+    parser.add_argument('-n', '--calls', type=int, default=2000,
+                        help='Iterations per thread (each makes two calls)')
+    args = parser.parse_args()
+    #switch threads as often as possible to surface races
+    sys.setcheckinterval(1)
+
+    static = LFModuleWrapper(StubClass, '10.2')
+    item = LFModuleInstanceWrapper(FakeStubItem())
+    errors = []
+    threads = [threading.Thread(target = worker, args = (static, item, args.calls, n, errors))
+               for n in range(args.threads)]
+    start = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - start
+
+    calls = args.threads * args.calls * 2
+    print 'threads:    {}'.format(args.threads)
+    print 'calls:      {} in {:.2f}s ({:.0f}/s)'.format(calls, elapsed, calls / elapsed)
+    print 'mismatches: {}'.format(len(errors))
+    for method, value, result in errors[:10]:
+        print '  {}({!r}) returned {!r}'.format(method, value, result)
+    sys.exit(1 if errors else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#Minimal stand in for the pythonnet/IronPython reflection surface used by lf_wrapper.py
+#Installing it registers fake 'clr', 'System', 'System.IO' and 'System.Reflection' modules so the
+#wrapper can be imported and exercised on machines without the .NET runtime or the Laserfiche SDK
+import sys
+import os
+import types
+
+class FakeArray(list):
+    @property
+    def Length(self):
+        return len(self)
+
+class FakeType:
+    def __init__(self, name, is_enum = False):
+        self.Name = name
+        self.FullName = name
+        self.IsEnum = is_enum
+        self._methods = []
+        self._properties = FakeArray()
+        self._constructors = []
+        self.reflection_calls = 0
+
+    def __repr__(self):
+        return '<FakeType {}>'.format(self.Name)
+
+    def AddMethod(self, name, param_types, func):
+        self._methods.append(FakeMethodInfo(name, param_types, func))
+        return self
+
+    def AddProperty(self, name, prop_type = None):
+        self._properties.append(FakePropertyInfo(name, prop_type))
+        return self
+
+    def AddConstructor(self, param_types, func):
+        self._constructors.append(FakeMethodInfo('.ctor', param_types, func))
+        return self
+
+    def _match(self, candidates, name, types):
+        types = list(types)
+        for m in candidates:
+            if m.Name == name and m._param_types == types:
+                return m
+        return None
+
+    def GetMethod(self, name, types):
+        self.reflection_calls += 1
+        return self._match(self._methods, name, types)
+
+    def GetMethods(self):
+        self.reflection_calls += 1
+        return FakeArray(self._methods)
+
+    def GetProperties(self):
+        self.reflection_calls += 1
+        return self._properties
+
+    def GetConstructor(self, types):
+        self.reflection_calls += 1
+        return self._match(self._constructors, '.ctor', types)
+
+class FakeParameterInfo:
+    def __init__(self, param_type):
+        self.ParameterType = param_type
+
+class FakeMethodInfo:
+    def __init__(self, name, param_types, func):
+        self.Name = name
+        self._param_types = list(param_types)
+        self._func = func
+
+    def GetParameters(self):
+        return FakeArray([FakeParameterInfo(t) for t in self._param_types])
+
+    #constructors are invoked with only the argument array
+    #arguments are checked against the parameter types the way MethodBase.Invoke's binder does
+    def Invoke(self, *args):
+        values = args[-1]
+        if len(values) != len(self._param_types):
+            raise TypeError('Parameter count mismatch.')
+        for value, param_type in zip(values, self._param_types):
+            arg_type = value.GetType() if isinstance(value, FakeObject) else ToClrType(type(value))
+            if arg_type is not param_type and param_type is not Object and not (param_type.IsEnum and arg_type is Int32):
+                raise TypeError('Object of type {} cannot be converted to {}.'.format(arg_type.Name, param_type.Name))
+        if len(args) == 1:
+            return self._func(*values)
+        return self._func(args[0], *values)
+
+class FakePropertyInfo:
+    def __init__(self, name, prop_type = None):
+        self.Name = name
+        self.PropertyType = prop_type
+
+    def GetValue(self, instance):
+        return getattr(instance, '_p_' + self.Name)
+
+    def SetValue(self, instance, value):
+        setattr(instance, '_p_' + self.Name, value)
+
+#base class for fake CLR objects. Subclasses set _clr_type
+class FakeObject(object):
+    _clr_type = None
+
+    def GetType(self):
+        return self._clr_type
+
+#primitive CLR types that python values map to
+Object = FakeType('Object')
+Int32 = FakeType('Int32')
+String = FakeType('String')
+Boolean = FakeType('Boolean')
+Double = FakeType('Double')
+Void = FakeType('Void')
+_PRIMITIVES = {int: Int32, long: Int32, str: String, unicode: String, bool: Boolean, float: Double}
+
+def ToClrType(t):
+    if isinstance(t, FakeType):
+        return t
+    #python proxy classes of CLR objects convert to their CLR type
+    if getattr(t, '_clr_type', None) is not None:
+        return t._clr_type
+    return _PRIMITIVES.get(t, Object)
+
+class _TypeArrayFactory:
+    def __init__(self, converter):
+        self._converter = converter
+
+    def __call__(self, items):
+        return FakeArray([self._converter(i) for i in items])
+
+class _ArrayGeneric:
+    def __getitem__(self, element_type):
+        if element_type is FakeTypeClass:
+            return _TypeArrayFactory(ToClrType)
+        return _TypeArrayFactory(lambda v: v)
+
+#the object exposed as System.Type
+class FakeTypeClass:
+    EmptyTypes = FakeArray()
+
+class FileNotFoundException(Exception):
+    @property
+    def Message(self):
+        return self.args[0] if self.args else ''
+
+#fake static classes carry their CLR type on _clr_type
+def GetClrType(module):
+    return module._clr_type
+
+def _noop(*args, **kwargs):
+    return None
+
+def install():
+    if 'clr' in sys.modules and getattr(sys.modules['clr'], '_is_fake', False):
+        return sys.modules['clr']
+
+    clr = types.ModuleType('clr')
+    clr._is_fake = True
+    clr.AddReference = _noop
+    clr.GetClrType = GetClrType
+
+    system = types.ModuleType('System')
+    system.Array = _ArrayGeneric()
+    system.Type = FakeTypeClass
+    system.Object = Object
+    system.Int32 = Int32
+    system.String = String
+    system.Boolean = Boolean
+    system.__all__ = ['Array', 'Type', 'Object', 'Int32', 'String', 'Boolean']
+
+    system_io = types.ModuleType('System.IO')
+    system_io.FileNotFoundException = FileNotFoundException
+    system_io.__all__ = ['FileNotFoundException']
+
+    system_reflection = types.ModuleType('System.Reflection')
+    system_reflection.__all__ = []
+
+    system.IO = system_io
+    system.Reflection = system_reflection
+    sys.modules['clr'] = clr
+    sys.modules['System'] = system
+    sys.modules['System.IO'] = system_io
+    sys.modules['System.Reflection'] = system_reflection
+
+    #make the wrapper importable from the benchmarks folder
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    return clr
@@ -0,0 +1,402 @@
+#Small fake of the Laserfiche RepositoryAccess object model built on fake_clr
+#Static classes expose their methods as attributes so LFModuleWrapper.__getattr__ can find them
+import itertools
+import random
+import sys
+import threading
+import time
+
+import fake_clr
+
+#simulated server cost of each kind of call, in seconds (see set_latency)
+#   session - opening a session
+#   read    - looking up an entry, folder or reader
+#   write   - creating, renaming or saving
+#   row     - each Read() of a reader
+LATENCY = {'session': 0, 'read': 0, 'write': 0, 'row': 0}
+
+def set_latency(session = None, read = None, write = None, row = None):
+    for kind, seconds in (('session', session), ('read', read), ('write', write), ('row', row)):
+        if seconds is not None:
+            LATENCY[kind] = seconds
+
+#optional load model (see set_capacity). None means calls never slow each other down
+LOAD = {'capacity': None, 'overload': None, 'in_flight': 0, 'errors': 0}
+_LOAD_LOCK = threading.Lock()
+
+#make the fake server degrade under load: with more than capacity calls in flight every call's latency is
+#multiplied by (in flight / capacity) squared, so throughput peaks at capacity concurrent calls and falls
+#beyond it. Past overload calls in flight, calls also fail with a probability that grows with the load
+def set_capacity(capacity, overload = None):
+    LOAD['capacity'] = capacity
+    LOAD['overload'] = overload
+    LOAD['errors'] = 0
+
+def wait(kind):
+    if not LATENCY[kind]:
+        return
+    if LOAD['capacity'] is None:
+        time.sleep(LATENCY[kind])
+        return
+    with _LOAD_LOCK:
+        LOAD['in_flight'] += 1
+        in_flight = LOAD['in_flight']
+    try:
+        overload = LOAD['overload']
+        if overload and in_flight > overload and random.random() < float(in_flight - overload) / in_flight:
+            with _LOAD_LOCK:
+                LOAD['errors'] += 1
+            raise Exception('The server is too busy to handle the request')
+        time.sleep(LATENCY[kind] * max(1.0, float(in_flight) / LOAD['capacity']) ** 2)
+    finally:
+        with _LOAD_LOCK:
+            LOAD['in_flight'] -= 1
+
+#raised for ids and paths that do not exist, like the SDK's ObjectNotFoundException
+class ObjectNotFoundException(Exception):
+    pass
+
+Session = fake_clr.FakeType('Session')
+EntryNameOption = fake_clr.FakeType('EntryNameOption', is_enum = True)
+EntryInfo = fake_clr.FakeType('EntryInfo').AddProperty('Id').AddProperty('Name')
+FolderInfo = fake_clr.FakeType('FolderInfo').AddProperty('Id').AddProperty('Path')
+
+class FakeSession(fake_clr.FakeObject):
+    _clr_type = Session
+    opened = 0
+    def __init__(self, *credentials):
+        wait('session')
+        FakeSession.opened += 1
+        self._p_IsAuthenticated = True
+
+    def Close(self):
+        self._p_IsAuthenticated = False
+
+Session.AddProperty('IsAuthenticated')
+Session.AddMethod('Close', [], FakeSession.Close)
+
+class FakeEntryInfo(fake_clr.FakeObject):
+    _clr_type = EntryInfo
+    def __init__(self, id):
+        self._p_Id = id
+        self._p_Name = 'Entry {}'.format(id)
+
+    saves = 0
+
+    def RenameTo(self, name, option):
+        self._p_Name = name
+
+    def Save(self):
+        wait('write')
+        FakeEntryInfo.saves += 1
+
+EntryInfo.AddMethod('RenameTo', [fake_clr.String, EntryNameOption], FakeEntryInfo.RenameTo)
+EntryInfo.AddMethod('Save', [], FakeEntryInfo.Save)
+
+class FakeFolderInfo(fake_clr.FakeObject):
+    _clr_type = FolderInfo
+    def __init__(self, id, path):
+        self._p_Id = id
+        self._p_Path = path
+
+    @property
+    def Name(self):
+        return self._p_Path.rsplit('\\', 1)[-1]
+
+#folders are stored by id and path; only the root exists until Folder.Create is called
+class FakeFolders:
+    def __init__(self):
+        self.Reset()
+
+    def Reset(self):
+        self.by_path = {'\\': FakeFolderInfo(1, '\\')}
+        self.next_id = 2
+        self.path_lookups = 0
+        self.id_lookups = 0
+
+    def Get(self, key):
+        wait('read')
+        if isinstance(key, basestring):
+            self.path_lookups += 1
+            key = '\\' + key.strip('\\')
+        else:
+            self.id_lookups += 1
+        for path, folder in self.by_path.items():
+            if key == path or key == folder._p_Id:
+                return folder
+        raise ObjectNotFoundException('Entry not found')
+
+    def Create(self, parent, name):
+        wait('write')
+        if self.by_path.get(parent._p_Path) is not parent:
+            raise ObjectNotFoundException('Entry not found')
+        path = parent._p_Path.rstrip('\\') + '\\' + name
+        folder = FakeFolderInfo(self.next_id, path)
+        self.next_id += 1
+        self.by_path[path] = folder
+        return folder._p_Id
+
+    #direct subfolders of a folder in creation order
+    def Children(self, parent):
+        prefix = parent._p_Path.rstrip('\\') + '\\'
+        return sorted((folder for path, folder in self.by_path.items()
+                       if path.startswith(prefix) and path[len(prefix):] and '\\' not in path[len(prefix):]), key = lambda f: f._p_Id)
+
+FOLDERS = FakeFolders()
+
+SystemColumn = fake_clr.FakeType('SystemColumn', is_enum = True)
+EntryType = fake_clr.FakeType('EntryType', is_enum = True)
+FolderListingSettings = fake_clr.FakeType('FolderListingSettings')
+FolderListing = fake_clr.FakeType('FolderListing').AddProperty('RowCount')
+
+class FakeFolderListingSettings(fake_clr.FakeObject):
+    _clr_type = FolderListingSettings
+    def __init__(self):
+        self.columns = []
+
+    def AddColumn(self, column):
+        self.columns.append(column)
+
+FolderListingSettings.AddConstructor([], FakeFolderListingSettings)
+FolderListingSettings.AddMethod('AddColumn', [SystemColumn], FakeFolderListingSettings.AddColumn)
+
+#rows are 1-based like the SDK; only folders are listed since the fake stores no documents
+class FakeFolderListing(fake_clr.FakeObject):
+    _clr_type = FolderListing
+    def __init__(self, folders):
+        self._rows = folders
+        self._p_RowCount = len(folders)
+
+    def GetDatum(self, row, column):
+        folder = self._rows[row - 1]
+        return {SystemColumnClass.Name: folder.Name, SystemColumnClass.Id: folder._p_Id,
+                SystemColumnClass.EntryType: EntryTypeClass.Folder}[column]
+
+    def GetDatumAsString(self, row, column):
+        return str(self.GetDatum(row, column))
+
+    def Dispose(self):
+        self._rows = []
+
+FolderListing.AddMethod('GetDatum', [fake_clr.Int32, SystemColumn], FakeFolderListing.GetDatum)
+FolderListing.AddMethod('GetDatumAsString', [fake_clr.Int32, SystemColumn], FakeFolderListing.GetDatumAsString)
+FolderListing.AddMethod('Dispose', [], FakeFolderListing.Dispose)
+
+def open_folder_listing(folder, settings, rows):
+    wait('read')
+    return FakeFolderListing(FOLDERS.Children(folder))
+
+FolderInfo.AddMethod('OpenFolderListing', [FolderListingSettings, fake_clr.Int32], open_folder_listing)
+
+class Folder:
+    _clr_type = fake_clr.FakeType('Folder')
+    _clr_type.AddMethod('GetFolderInfo', [fake_clr.String, Session], lambda _, path, sess: FOLDERS.Get(path))
+    _clr_type.AddMethod('GetFolderInfo', [fake_clr.Int32, Session], lambda _, id, sess: FOLDERS.Get(id))
+    _clr_type.AddMethod('GetRootFolder', [Session], lambda _, sess: FOLDERS.Get(1))
+    _clr_type.AddMethod('Create', [FolderInfo, fake_clr.String, EntryNameOption, Session],
+                        lambda _, parent, name, option, sess: FOLDERS.Create(parent, name))
+    GetFolderInfo = GetRootFolder = Create = 'method'
+
+def get_entry_info(_, id, sess):
+    Entry.round_trips += 1
+    wait('read')
+    return FakeEntryInfo(id)
+
+class Entry:
+    round_trips = 0
+    _clr_type = fake_clr.FakeType('Entry').AddMethod('GetEntryInfo', [fake_clr.Int32, Session], get_entry_info)
+    GetEntryInfo = 'method'
+
+#ids handed out by Document.Create
+ENTRY_IDS = itertools.count(1000)
+
+def create_document(*args):
+    wait('write')
+    return next(ENTRY_IDS)
+
+class Document:
+    #several overloads so the enum fallback has to scan and compare parameters
+    _clr_type = fake_clr.FakeType('Document')
+    for overload in ([FolderInfo, fake_clr.String, Session],
+                     [FolderInfo, fake_clr.String, fake_clr.String, Session],
+                     [FolderInfo, fake_clr.String, fake_clr.String, EntryNameOption, Session]):
+        _clr_type.AddMethod('Create', overload, create_document)
+    _clr_type.AddMethod('Create', [FolderInfo, fake_clr.String, EntryNameOption, Session], create_document)
+    Create = 'method'
+
+UserInfo = fake_clr.FakeType('UserInfo').AddProperty('Id').AddProperty('Name')
+UserReader = fake_clr.FakeType('UserInfoReader').AddProperty('Item')
+
+class FakeUserInfo(fake_clr.FakeObject):
+    _clr_type = UserInfo
+    def __init__(self, id = 0, name = None):
+        self._p_Id = id
+        self._p_Name = name
+        self._p_Session = self._p_Password = None
+        self._p_FeatureRights = self._p_Privileges = 0
+        self.groups = []
+
+    def JoinGroup(self, name):
+        if name not in GROUPS:
+            raise Exception('Group {} not found'.format(name))
+        self.groups.append(name)
+
+    def Delete(self):
+        self.deleted = True
+
+    def Save(self):
+        wait('write')
+        if getattr(self, 'deleted', False):
+            USERS.pop(self._p_Id, None)
+
+for prop in ('Session', 'Password', 'FeatureRights', 'Privileges'):
+    UserInfo.AddProperty(prop)
+UserInfo.AddConstructor([], FakeUserInfo)
+UserInfo.AddMethod('JoinGroup', [fake_clr.String], FakeUserInfo.JoinGroup)
+UserInfo.AddMethod('Delete', [], FakeUserInfo.Delete)
+UserInfo.AddMethod('Save', [], FakeUserInfo.Save)
+
+#names of the groups in the fake repository
+GROUPS = ['Everyone', 'Admins', 'Scanning']
+GroupInfo = fake_clr.FakeType('GroupInfo').AddProperty('Name')
+GroupReader = fake_clr.FakeType('GroupInfoReader').AddProperty('Item')
+
+class FakeGroupInfo(fake_clr.FakeObject):
+    _clr_type = GroupInfo
+    def __init__(self, name):
+        self._p_Name = name
+
+#forward only reader in the style of the RA *Reader classes: Read() advances, Item is the current row
+class FakeUserReader(fake_clr.FakeObject):
+    _clr_type = UserReader
+    rows_read = 0
+    def __init__(self, count):
+        self._count = count
+        self._row = 0
+        self._p_Item = None
+
+    def Read(self):
+        if self._row >= self._count:
+            return False
+        wait('row')
+        FakeUserReader.rows_read += 1
+        self._row += 1
+        self._p_Item = FakeUserInfo(self._row, 'user{}'.format(self._row))
+        return True
+
+UserReader.AddMethod('Read', [], FakeUserReader.Read)
+
+class FakeGroupReader(fake_clr.FakeObject):
+    _clr_type = GroupReader
+    def __init__(self):
+        self._groups = iter(list(GROUPS))
+        self._p_Item = None
+
+    def Read(self):
+        name = next(self._groups, None)
+        if name is None:
+            return False
+        self._p_Item = FakeGroupInfo(name)
+        return True
+
+GroupReader.AddMethod('Read', [], FakeGroupReader.Read)
+
+#users saved with Account.Create, by id
+USERS = {}
+
+def create_user(_, user, overwrite, sess):
+    wait('write')
+    if any(u._p_Name == user._p_Name for u in USERS.values()):
+        raise Exception('User {} already exists'.format(user._p_Name))
+    user._p_Id = len(USERS) + 1
+    USERS[user._p_Id] = user
+    return user
+
+class Account:
+    #number of users returned by EnumUsers
+    user_count = 1000
+    _clr_type = fake_clr.FakeType('Account').AddMethod(
+        'EnumUsers', [Session], lambda _, sess: wait('read') or FakeUserReader(Account.user_count))
+    _clr_type.AddMethod('EnumGroups', [Session], lambda _, sess: wait('read') or FakeGroupReader())
+    _clr_type.AddMethod('Create', [UserInfo, fake_clr.Boolean, Session], create_user)
+    _clr_type.AddMethod('GetInfo', [fake_clr.Int32, Session], lambda _, id, sess: wait('read') or USERS[id])
+    EnumUsers = EnumGroups = Create = GetInfo = 'method'
+
+#constructible side of UserInfo: LF.UserInfo()
+class UserInfoClass:
+    _clr_type = UserInfo
+
+#classes of the objects returned by Entry.GetEntryInfo and Account.GetInfo
+class EntryInfoClass:
+    _clr_type = EntryInfo
+
+class AccountInfoClass:
+    _clr_type = UserInfo
+
+#static side of Session. Session.Create opens a new fake session
+class SessionClass:
+    _clr_type = Session
+    Create = 'method'
+
+Session.AddMethod('Create', [fake_clr.String, fake_clr.String], lambda _, server, repo: FakeSession(server, repo))
+Session.AddMethod('Create', [fake_clr.String, fake_clr.String, fake_clr.String, fake_clr.String],
+                  lambda _, server, repo, user, password: FakeSession(server, repo, user, password))
+
+#enum members are plain ints, the way pythonnet hands them back
+class EntryNameOptionClass:
+    _clr_type = EntryNameOption
+    NoRename = 0
+    AutoRename = 1
+
+class SystemColumnClass:
+    _clr_type = SystemColumn
+    Name = 0
+    Id = 1
+    EntryType = 2
+
+class EntryTypeClass:
+    _clr_type = EntryType
+    Folder = 0
+    Document = 1
+
+class FolderListingSettingsClass:
+    _clr_type = FolderListingSettings
+
+#stand in for the Laserfiche.RepositoryAccess module, searched by LFWrapper._get_fromRA
+class RepositoryAccess:
+    Session = SessionClass
+    Folder = Folder
+    Entry = Entry
+    Document = Document
+    Account = Account
+    UserInfo = UserInfoClass
+    EntryInfo = EntryInfoClass
+    AccountInfo = AccountInfoClass
+    EntryNameOption = EntryNameOptionClass
+    SystemColumn = SystemColumnClass
+    EntryType = EntryTypeClass
+    FolderListingSettings = FolderListingSettingsClass
+
+class Laserfiche:
+    RepositoryAccess = RepositoryAccess
+
+#point an LFWrapper at the fake object model as if LoadRA had been called
+def load(lf, version = '10.2'):
+    lf._sdk = {'type': 'RA', 'module': Laserfiche, 'version': version}
+    return lf
+
+#stands in for environment.Environment: no dll paths, no type catalog and a default connection
+class FakeEnvironment:
+    def __init__(self):
+        self.LFSO_Paths = {}
+        self.DocumentProcessor_Paths = {}
+        self.RepositoryAccess_Paths = {'10.0': '', '10.2': ''}
+        self.TypeCatalog = None
+        self.LaserficheConnection = {'server': 'fake', 'database': 'fake', 'username': '', 'password': ''}
+
+#register the fake object model as the Laserfiche namespaces, so LFWrapper.LoadRA imports it
+def install():
+    clr = fake_clr.install()
+    sys.modules['Laserfiche'] = Laserfiche
+    sys.modules['Laserfiche.RepositoryAccess'] = RepositoryAccess
+    return clr
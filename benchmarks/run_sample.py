@@ -0,0 +1,52 @@
+#Runs one of the samples against the fake SDK (fake_clr.py / fake_ra.py) so it can be tried out, profiled or
+#benchmarked without .NET, the SDK or a Laserfiche server, on any OS. Everything after the sample path is
+#passed to the sample. Server calls take the simulated latencies given with --latency.
+#The type catalog is turned off so the fake assemblies are never recorded in the real one.
+#usage: python run_sample.py [--latency kind=ms,...] sample.py [sample args]
+#   python benchmarks/run_sample.py --latency session=50,write=5 samples/example_setup.py -l out.log -s fake -r repo -c 500
+import argparse
+import os
+import runpy
+import sys
+
+import fake_ra
+fake_ra.install()
+
+import environment
+
+#name=ms pairs separated by commas, e.g. read=2,write=5
+def parse_latency(value):
+    latency = {}
+    for pair in value.split(','):
+        kind, _, ms = pair.partition('=')
+        if kind not in fake_ra.LATENCY:
+            raise argparse.ArgumentTypeError('Unknown latency {}, expected one of {}'.format(
+                kind, ', '.join(sorted(fake_ra.LATENCY))))
+        latency[kind] = float(ms) / 1000.0
+    return latency
+
+def disable_catalog():
+    init = environment.Environment.__init__
+    def __init__(self):
+        init(self)
+        self.TypeCatalog = None
+    environment.Environment.__init__ = __init__
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=parse_latency, default={},
+                        help='Simulated server latency per kind of call in ms: session, read, write, row')
+    parser.add_argument('sample', help='Path of the sample to run')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='Arguments passed to the sample')
+    args = parser.parse_args()
+
+    fake_ra.set_latency(**args.latency)
+    disable_catalog()
+    sample = os.path.abspath(args.sample)
+    #samples import their neighbours (lf_pipeline uses log_parser)
+    sys.path.insert(0, os.path.dirname(sample))
+    sys.argv = [sample] + args.args
+    runpy.run_path(sample, run_name = '__main__')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#Runs every benchmark with --json, stores the results under benchmarks/results/<label>.json and compares them
+#with an earlier run so regressions between versions show up. Each benchmark runs in its own interpreter.
+#Metrics ending in _per_s are better when higher; metrics ending in _s, _ms or _per_row are better when lower;
+#anything else (counts, sizes) is stored but not compared.
+#usage: python run_suite.py [--label name] [--baseline label|file] [--threshold percent] [--quick] [--only bench]
+#   python benchmarks/run_suite.py --label v1.4
+#   python benchmarks/run_suite.py --label v1.5 --baseline v1.4 --fail
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS = os.path.join(HERE, 'results')
+
+#name -> (script, full arguments, --quick arguments)
+BENCHMARKS = [
+    ('dispatch', 'bench_dispatch.py', ['-n', '20000'], ['-n', '2000']),
+    ('enumeration', 'bench_memory.py', ['-n', '100000'], ['-n', '10000']),
+    ('bulk', 'bench_bulk.py', ['-n', '2000', '--latency', '1'], ['-n', '300', '--latency', '1']),
+    ('startup', 'bench_startup.py', ['-n', '20'], ['-n', '3']),
+]
+
+def git_label():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd = HERE,
+                                       stderr = open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime('%Y%m%d-%H%M%S')
+
+def run_benchmark(script, argv):
+    output = subprocess.check_output([sys.executable, os.path.join(HERE, script), '--json'] + argv, cwd = HERE)
+    return json.loads(output.strip().splitlines()[-1])
+
+#1 when a higher value is better, -1 when lower is better, 0 for metrics that are not compared
+def direction(metric):
+    if metric.endswith('_per_s'):
+        return 1
+    if metric.endswith(('_s', '_ms', '_per_row')):
+        return -1
+    return 0
+
+def find_baseline(baseline, label):
+    if baseline is not None:
+        path = baseline if os.path.exists(baseline) else os.path.join(RESULTS, baseline + '.json')
+        with open(path) as fs:
+            return json.load(fs)
+    #default to the most recent run with another label
+    runs = []
+    for path in glob.glob(os.path.join(RESULTS, '*.json')):
+        with open(path) as fs:
+            run = json.load(fs)
+        if run.get('label') != label:
+            runs.append(run)
+    return max(runs, key = lambda run: run.get('time', 0)) if runs else None
+
+#list of (benchmark, metric, old, new, change percent, regressed)
+def compare(old, new, threshold):
+    rows = []
+    for name, metrics in sorted(new['results'].items()):
+        for metric, value in sorted(metrics.items()):
+            sign = direction(metric)
+            previous = old['results'].get(name, {}).get(metric)
+            if not sign or not previous:
+                continue
+            change = (float(value) - previous) / previous * 100
+            rows.append((name, metric, previous, value, change, change * sign < -threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--label', type=str, default=None,
+                        help='Name of this run, defaults to git describe')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='Label or result file to compare with, defaults to the latest run with another label')
+    parser.add_argument('--threshold', type=float, default=10,
+                        help='Percent a metric may get worse before it is reported as a regression')
+    parser.add_argument('--quick', action='store_true',
+                        help='Run smaller workloads (noisier, for a quick check)')
+    parser.add_argument('--only', type=str, action='append', default=None,
+                        help='Run only this benchmark, may be repeated: ' + ', '.join(b[0] for b in BENCHMARKS))
+    parser.add_argument('--fail', action='store_true',
+                        help='Exit with status 1 when a regression is found')
+    args = parser.parse_args()
+
+    label = args.label or git_label()
+    run = {'label': label, 'time': time.time(), 'python': platform.python_version(),
+           'implementation': platform.python_implementation(), 'platform': platform.platform(),
+           'quick': args.quick, 'results': {}}
+    for name, script, full, quick in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        print 'running {}...'.format(name)
+        run['results'][name] = run_benchmark(script, quick if args.quick else full)
+
+    if not os.path.isdir(RESULTS):
+        os.makedirs(RESULTS)
+    path = os.path.join(RESULTS, label + '.json')
+    with open(path, 'w') as fs:
+        json.dump(run, fs, indent = 1, sort_keys = True)
+    print 'results written to {}'.format(path)
+
+    baseline = find_baseline(args.baseline, label)
+    if baseline is None:
+        for name, metrics in sorted(run['results'].items()):
+            for metric, value in sorted(metrics.items()):
+                print '{:<12} {:<20} {:>14.3f}'.format(name, metric, value)
+        return
+    if baseline.get('quick') != args.quick:
+        print 'warning: comparing a --quick run with a full run'
+    rows = compare(baseline, run, args.threshold)
+    print '{:<12} {:<20} {:>14} {:>14} {:>8}  (baseline {})'.format('benchmark', 'metric', 'baseline', label[:14],
+                                                                  'change', baseline['label'])
+    for name, metric, old, new, change, regressed in rows:
+        print '{:<12} {:<20} {:>14.3f} {:>14.3f} {:>+7.1f}%{}'.format(name, metric, old, new, change,
+                                                                      '  REGRESSION' if regressed else '')
+    regressions = sum(1 for row in rows if row[5])
+    print '{} regression(s) over {}%'.format(regressions, args.threshold)
+    if args.fail and regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -29,6 +29,10 @@ class Environment:
             '10.2': r'C:\Program Files\Laserfiche\SDK 10.2\bin\10.2\net-4.0'
         }
 
+        # File recording where each SDK assembly and type was found, so later starts skip probing. Off (None) by
+        # default; set a path to turn it on, e.g. r'C:\Users\me\.lf_wrapper_catalog.json'
+        self.TypeCatalog = None
+
         #U Configuration used to make the default connection to Laserfiche
         self.LaserficheConnection = {
             'server': '',
@@ -0,0 +1,241 @@
+import sys
+import threading
+import time
+from Queue import Queue
+
+#placeholder for the pooled session in calls made through an AsyncLFWrapper
+#   LF_async.Entry.GetEntryInfo(id, SESSION)
+SESSION = object()
+
+#per server limits on the number of calls in flight, shared by every AsyncLFWrapper in the process
+_SERVER_LIMITS = {}
+_SERVER_LIMITS_LOCK = threading.Lock()
+
+def SetServerLimit(server, limit):
+    with _SERVER_LIMITS_LOCK:
+        _SERVER_LIMITS[server] = threading.BoundedSemaphore(limit) if limit else None
+
+def _ServerSemaphore(server):
+    with _SERVER_LIMITS_LOCK:
+        return _SERVER_LIMITS.get(server)
+
+_PENDING, _RUNNING, _CANCELLED, _FINISHED = range(4)
+
+#result of a call submitted to an AsyncLFWrapper
+#result() blocks until the call has finished, add_done_callback() runs a function once it has
+class LFFuture:
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._state = _PENDING
+        self._result = None
+        self._error = None
+        self._callbacks = []
+
+    def __repr__(self):
+        return 'LFFuture({})'.format(['pending', 'running', 'cancelled', 'finished'][self._state])
+
+    def done(self):
+        return self._state in (_CANCELLED, _FINISHED)
+
+    def running(self):
+        return self._state == _RUNNING
+
+    def cancelled(self):
+        return self._state == _CANCELLED
+
+    #calls that have not started yet can be cancelled. Returns False once the call is running
+    def cancel(self):
+        with self._cond:
+            if self._state == _RUNNING or self._state == _FINISHED:
+                return False
+            if self._state == _PENDING:
+                self._state = _CANCELLED
+                self._cond.notify_all()
+        self._RunCallbacks()
+        return True
+
+    def _Wait(self, timeout):
+        with self._cond:
+            if not self.done():
+                self._cond.wait(timeout)
+            if self._state == _CANCELLED:
+                raise Exception('The call was cancelled')
+            if self._state != _FINISHED:
+                raise Exception('Timed out waiting for the call to finish')
+
+    def result(self, timeout = None):
+        self._Wait(timeout)
+        if self._error is not None:
+            raise self._error[0], self._error[1], self._error[2]
+        return self._result
+
+    def exception(self, timeout = None):
+        self._Wait(timeout)
+        return self._error[1] if self._error is not None else None
+
+    def add_done_callback(self, func):
+        with self._cond:
+            if not self.done():
+                self._callbacks.append(func)
+                return
+        func(self)
+
+    #called by the worker before it starts the call. Returns False if the future was cancelled
+    def _Start(self):
+        with self._cond:
+            if self._state != _PENDING:
+                return False
+            self._state = _RUNNING
+            return True
+
+    def _Finish(self, result = None, error = None):
+        with self._cond:
+            self._result = result
+            self._error = error
+            self._state = _FINISHED
+            self._cond.notify_all()
+        self._RunCallbacks()
+
+    def _RunCallbacks(self):
+        with self._cond:
+            callbacks, self._callbacks = self._callbacks, []
+        for func in callbacks:
+            try:
+                func(self)
+            except Exception as e:
+                print 'LFFuture callback raised {}'.format(e)
+
+#wait for every future and return their results in order
+def Gather(futures, timeout = None):
+    deadline = None if timeout is None else time.time() + timeout
+    return [f.result(None if deadline is None else max(0, deadline - time.time())) for f in futures]
+
+#Non-blocking front end for an LFWrapper. Calls mirror the wrapper's dynamic dispatch but return an LFFuture:
+#   future = LF_async.Entry.GetEntryInfo(id, SESSION)
+#   entry = future.result()
+#Calls run on a fixed number of worker threads. Each call checks a session out of pool for its duration and
+#SESSION arguments are replaced with it. Objects handed back by a call still belong to that session, so
+#multi step work on an entry should go through Run(func) which keeps one session for the whole function.
+#A call only starts once it holds its session (and the server's slot when a limit is set with
+#max_per_server or SetServerLimit), so cancelling a future that has not started never leaks a session.
+class AsyncLFWrapper:
+    SESSION = SESSION
+
+    def __init__(self, lf, pool, workers = 4, server = None, max_per_server = None, queue_size = None, close_pool = False):
+        self._lf = lf
+        self._pool = pool
+        self._close_pool = close_pool
+        self.server = server
+        if max_per_server is not None:
+            SetServerLimit(server, max_per_server)
+        self._work = Queue(queue_size or 0)
+        self._closed = False
+        self._threads = [threading.Thread(target = self._Worker) for i in range(workers)]
+        for t in self._threads:
+            t.daemon = True
+            t.start()
+
+    def __repr__(self):
+        return 'Async LF SDK Wrapper'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.Close()
+
+    #LF_async.Entry returns a proxy whose methods submit calls; enum members are returned as is
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return _AsyncModule(self, attr)
+
+    def _Submit(self, func, args):
+        if self._closed:
+            raise Exception('The async wrapper has been closed')
+        future = LFFuture()
+        self._work.put((future, func, args))
+        return future
+
+    #run func(session, *args) on a worker with a pooled session
+    def Run(self, func, *args):
+        return self._Submit(func, args)
+
+    def _Worker(self):
+        while True:
+            job = self._work.get()
+            if job is None:
+                return
+            future, func, args = job
+            if future.done():
+                continue
+            semaphore = _ServerSemaphore(self.server)
+            if semaphore is not None:
+                semaphore.acquire()
+            try:
+                with self._pool.Checkout() as session:
+                    if not future._Start():
+                        continue
+                    try:
+                        result = func(session, *args)
+                    except Exception:
+                        future._Finish(error = sys.exc_info())
+                    else:
+                        future._Finish(result)
+            except Exception:
+                #the session could not be checked out
+                if future._Start():
+                    future._Finish(error = sys.exc_info())
+            finally:
+                if semaphore is not None:
+                    semaphore.release()
+
+    #stop the workers once the submitted calls are done and close the pool if it was created for this wrapper
+    #with cancel_pending, calls that have not started are cancelled instead
+    def Close(self, cancel_pending = False):
+        if self._closed:
+            return
+        self._closed = True
+        if cancel_pending:
+            while not self._work.empty():
+                job = self._work.get_nowait()
+                if job is not None:
+                    job[0].cancel()
+        for t in self._threads:
+            self._work.put(None)
+        for t in self._threads:
+            #join with a timeout so KeyboardInterrupt is still delivered to the main thread
+            while t.is_alive():
+                t.join(0.5)
+        if self._close_pool:
+            self._pool.Close()
+
+class _AsyncModule:
+    def __init__(self, owner, name):
+        self._owner = owner
+        self._name = name
+
+    def __repr__(self):
+        return 'Async {}'.format(self._name)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        value = getattr(getattr(self._owner._lf, self._name), attr)
+        if not callable(value):
+            return value
+        name = self._name
+        lf = self._owner._lf
+        def call(session, *argv):
+            args = tuple(session if arg is SESSION else arg for arg in argv)
+            return getattr(getattr(lf, name), attr)(*args)
+        return lambda *argv: self._owner._Submit(call, argv)
+
+    #LF_async.Session(...) style constructors
+    def __call__(self, *argv):
+        name = self._name
+        lf = self._owner._lf
+        def construct(session, *argv):
+            args = tuple(session if arg is SESSION else arg for arg in argv)
+            return getattr(lf, name)(*args)
+        return self._owner._Submit(construct, argv)
@@ -0,0 +1,142 @@
+import threading
+from collections import OrderedDict
+
+from lf_bulk import BulkRunner
+
+#how the batch loads each kind of object it edits: kind -> load(lf, id, session)
+LOADERS = {
+    'Entry': lambda lf, id, session: lf.Entry.GetEntryInfo(id, session),
+    'Account': lambda lf, id, session: lf.Account.GetInfo(id, session),
+}
+
+#Unit of work over entries and accounts (see LFWrapper.CreateBatch). Property assignments and method calls
+#made on the objects returned by Entry(id)/Account(id) are only recorded. Flush then loads each object once,
+#replays its edits in order and commits them with a single Save(), so many edits to the same object cost one
+#load and one commit. Save() calls made on a pending object are dropped for the same reason. The calls are
+#checked against the runtime type of the loaded object (an account may be a UserInfo or a GroupInfo), so an
+#object with a call its type does not have fails with AttributeError before any of its edits are replayed.
+#An object is applied as a whole: if any of its edits or its Save fails it is reported as failed, and a retry
+#loads the object again and replays every edit.
+#   batch = LF.CreateBatch()
+#   for id in ids:
+#       batch.Entry(id).RenameTo('WF TRIGGER', LF.EntryNameOption.AutoRename)
+#   result = batch.Flush(pool = pool, workers = 8)
+class LFBatch:
+    def __init__(self, lf, loaders = None):
+        self._lf = lf
+        self._loaders = loaders or LOADERS
+        self._groups = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._groups)
+
+    #pending edits of the object of the given kind (a key of the loaders) and id
+    def Edit(self, kind, id):
+        if kind not in self._loaders:
+            raise KeyError('No loader for {}'.format(kind))
+        return LFPendingEdit(self, (kind, id))
+
+    def Entry(self, id):
+        return self.Edit('Entry', id)
+
+    def Account(self, id):
+        return self.Edit('Account', id)
+
+    def _Record(self, key, edit):
+        with self._lock:
+            edits = self._groups.get(key)
+            if edits is None:
+                edits = self._groups[key] = []
+            edits.append(edit)
+
+    #load one object, replay its edits and save it
+    def _Apply(self, session, key, edits):
+        from lf_wrapper import GetMethodNames, Unbox
+        kind, id = key
+        target = self._loaders[kind](self._lf, id, session)
+        clr_type = Unbox(target).GetType()
+        methods = GetMethodNames(clr_type)
+        for edit in edits:
+            if edit[0] == 'call' and edit[1] not in methods:
+                raise AttributeError('{} {} is a {}, which has no method {}'.format(kind, id, clr_type.Name, edit[1]))
+        for edit in edits:
+            if edit[0] == 'set':
+                setattr(target, edit[1], edit[2])
+            else:
+                getattr(target, edit[1])(*edit[2])
+        target.Save()
+
+    #apply every recorded edit and clear the batch. Pass a session to apply the objects one after another
+    #on it, or a pool (see LFWrapper.CreatePool) to apply them on workers pooled sessions in parallel.
+    #Returns an LFBatchResult
+    def Flush(self, session = None, pool = None, workers = 4, retries = 0):
+        if (session is None) == (pool is None):
+            raise Exception('Flush needs either a session or a pool')
+        with self._lock:
+            groups, self._groups = self._groups, OrderedDict()
+        result = LFBatchResult()
+        if pool is None:
+            for key, edits in groups.items():
+                try:
+                    self._Apply(session, key, edits)
+                    result.succeeded.append(key)
+                except Exception as e:
+                    result.failed[key] = e
+            return result
+
+        lock = threading.Lock()
+        def apply(sess, key):
+            self._Apply(sess, key, groups[key])
+            with lock:
+                result.succeeded.append(key)
+        def failed(key, error):
+            with lock:
+                result.failed[key] = error
+        runner = BulkRunner(pool, apply, workers = workers, retries = retries, on_error = failed)
+        result.stats = runner.Run(groups.keys())
+        return result
+
+    def Clear(self):
+        with self._lock:
+            self._groups = OrderedDict()
+
+#stands in for an entry or account in an LFBatch: attribute assignments and method calls are recorded
+class LFPendingEdit(object):
+    __slots__ = ('_batch', '_key')
+
+    def __init__(self, batch, key):
+        object.__setattr__(self, '_batch', batch)
+        object.__setattr__(self, '_key', key)
+
+    def __repr__(self):
+        return '<pending edit of {} {}>'.format(*self._key)
+
+    def __setattr__(self, name, value):
+        self._batch._Record(self._key, ('set', name, value))
+
+    #private names (e.g. the _instance the wrapper looks for on arguments) are not recorded, so hasattr behaves
+    #as it would on an object that has not been loaded. Any other name is taken to be a method call
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        #the batch saves each object once, after its last edit
+        if name == 'Save':
+            return lambda: None
+        return lambda *args: self._batch._Record(self._key, ('call', name, args))
+
+#outcome of LFBatch.Flush
+#   succeeded - (kind, id) of every object saved
+#   failed    - (kind, id) -> the exception that stopped it
+#   stats     - the BulkStats of the run when a pool was used
+class LFBatchResult:
+    def __init__(self):
+        self.succeeded = []
+        self.failed = OrderedDict()
+        self.stats = None
+
+    def Report(self):
+        lines = ['Saved {} objects, {} failed'.format(len(self.succeeded), len(self.failed))]
+        for (kind, id), error in self.failed.items():
+            lines.append('  {} {}: {}'.format(kind, id, error))
+        return '\n'.join(lines)
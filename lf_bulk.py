@@ -0,0 +1,249 @@
+import random
+import threading
+import time
+from Queue import Queue
+
+from lf_limit import IsServerError
+
+#Runs func(session, item) for a stream of items on a bounded set of worker threads
+#that check sessions out of a SessionPool (see LFWrapper.CreatePool).
+#   - items are read lazily from any iterable; at most queue_size items are buffered
+#   - items that failed with a server or connection error (classify, by default the limiter's or
+#     lf_limit.IsServerError) are retried with exponential backoff and jitter; any other error fails the item
+#     at once, since retrying cannot fix a missing entry or a denied access
+#   - finished items are appended to an optional checkpoint file and skipped on the next run
+#   - throughput and latency stats are collected in a BulkStats object
+#   - an optional limiter (lf_limit.AdaptiveLimiter) adapts how many of the workers call the server at once,
+#     and an optional bucket (lf_limit.TokenBucket, e.g. from SetServerRate) caps the calls per second
+#   - the session of a call that failed with a server error is discarded rather than returned to the pool, so
+#     the retry runs on a fresh session (discard_on_error=False keeps it)
+#   - Stop() lets the items in flight finish and drops the ones still queued; they are not checkpointed, so a
+#     resumed run picks them up
+class BulkRunner:
+    def __init__(self, pool, func, workers = 4, retries = 3, backoff = 0.5, max_backoff = 30,
+                 checkpoint = None, queue_size = None, on_error = None, limiter = None, bucket = None,
+                 discard_on_error = True, classify = None):
+        self._pool = pool
+        self._func = func
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.checkpoint = checkpoint
+        self.queue_size = queue_size or workers * 4
+        self._on_error = on_error
+        self.limiter = limiter
+        self.bucket = bucket
+        self.discard_on_error = discard_on_error
+        self.classify = classify or (limiter.classify if limiter is not None else IsServerError)
+        self._checkpoint_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = BulkStats()
+
+    def _MarkDone(self, fs, item):
+        if fs is None:
+            return
+        with self._checkpoint_lock:
+            fs.write('{}\n'.format(item))
+            fs.flush()
+
+    #one call of func on a pooled session, within the rate cap and concurrency limit
+    def _Attempt(self, item):
+        if self.bucket is not None:
+            self.bucket.Acquire()
+        if self.limiter is not None:
+            self.limiter.Acquire()
+        start = None
+        try:
+            session = self._pool.Acquire()
+            discard = False
+            try:
+                start = time.time()
+                self._func(session, item)
+            except Exception as e:
+                discard = self.discard_on_error and self.classify(e)
+                raise
+            finally:
+                self._pool.Release(session, discard)
+        except Exception as e:
+            #only server errors count against the limit; a call rejected for its own reasons (e.g. a missing
+            #entry) was still answered by the server
+            if self.limiter is not None:
+                self.limiter.Release(time.time() - start if start is not None else 0.0, self.classify(e))
+            raise
+        if self.limiter is not None:
+            self.limiter.Release(time.time() - start)
+
+    #call func, retrying server errors. Returns (succeeded, error)
+    def _RunItem(self, item):
+        attempt = 0
+        while True:
+            try:
+                self._Attempt(item)
+                return True, None
+            except Exception as e:
+                attempt += 1
+                if attempt > self.retries or self._stop.is_set() or not self.classify(e):
+                    return False, e
+                self.stats.RecordRetry()
+                delay = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+                time.sleep(delay * (0.5 + random.random() / 2))
+
+    def _Worker(self, work, checkpoint_fs):
+        while True:
+            item = work.get()
+            if item is _DONE:
+                return
+            if self._stop.is_set():
+                continue
+            start = time.time()
+            succeeded, error = self._RunItem(item)
+            self.stats.Record(time.time() - start, succeeded)
+            if succeeded:
+                self._MarkDone(checkpoint_fs, item)
+            elif self._on_error is not None:
+                self._on_error(item, error)
+
+    #process every item and return the collected stats
+    def Run(self, items):
+        done = LoadCheckpoint(self.checkpoint)
+        work = Queue(self.queue_size)
+        checkpoint_fs = open(self.checkpoint, 'a') if self.checkpoint is not None else None
+        threads = [threading.Thread(target = self._Worker, args = (work, checkpoint_fs)) for i in range(self.workers)]
+        for t in threads:
+            t.daemon = True
+            t.start()
+
+        self.stats.Start()
+        try:
+            for item in items:
+                if self._stop.is_set():
+                    break
+                if done and str(item) in done:
+                    self.stats.RecordSkip()
+                    continue
+                #blocks while the workers are busy, so the input is never read ahead by more than queue_size items
+                work.put(item)
+        except KeyboardInterrupt:
+            self._stop.set()
+            print 'Interrupted, waiting for in-flight items to finish...'
+            while not work.empty():
+                work.get_nowait()
+        finally:
+            for t in threads:
+                work.put(_DONE)
+            for t in threads:
+                #join with a timeout so KeyboardInterrupt is still delivered to the main thread
+                while t.is_alive():
+                    t.join(0.5)
+            self.stats.Stop()
+            if checkpoint_fs is not None:
+                checkpoint_fs.close()
+        return self.stats
+
+    #stop reading items and drop the queued ones; items in flight finish without further retries
+    def Stop(self):
+        self._stop.set()
+
+_DONE = object()
+
+#read the keys of items finished by a previous run from a checkpoint file
+def LoadCheckpoint(file_path):
+    done = set()
+    if file_path is None:
+        return done
+    try:
+        with open(file_path) as fs:
+            for line in fs:
+                line = line.strip()
+                if line:
+                    done.add(line)
+    except IOError:
+        pass
+    return done
+
+#thread safe counters and latency samples for a bulk run
+class BulkStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = []
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.retries = 0
+        self.started = None
+        self.stopped = None
+
+    def Start(self):
+        self.started = time.time()
+
+    def Stop(self):
+        self.stopped = time.time()
+
+    def Record(self, latency, succeeded):
+        with self._lock:
+            self._latencies.append(latency)
+            if succeeded:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    #add the latencies and counters collected by another runner, e.g. in a worker process
+    def Merge(self, latencies, succeeded, failed, retries = 0):
+        with self._lock:
+            self._latencies.extend(latencies)
+            self.succeeded += succeeded
+            self.failed += failed
+            self.retries += retries
+
+    #copy of the latency samples recorded so far, from the start-th one on
+    def Latencies(self, start = 0):
+        with self._lock:
+            return self._latencies[start:]
+
+    def RecordSkip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def RecordRetry(self):
+        with self._lock:
+            self.retries += 1
+
+    def Elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.stopped or time.time()) - self.started
+
+    def Percentile(self, p):
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return 0.0
+        index = min(len(latencies) - 1, int(round(p / 100.0 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def Summary(self):
+        elapsed = self.Elapsed()
+        processed = self.succeeded + self.failed
+        return {
+            'processed': processed,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'retries': self.retries,
+            'elapsed': elapsed,
+            'throughput': processed / elapsed if elapsed else 0.0,
+            'p50': self.Percentile(50),
+            'p90': self.Percentile(90),
+            'p99': self.Percentile(99),
+            'max': self.Percentile(100)
+        }
+
+    def Report(self):
+        s = self.Summary()
+        return '\n'.join([
+            'Processed {processed} items in {elapsed:.1f}s ({throughput:.1f}/s)'.format(**s),
+            '  succeeded: {succeeded}  failed: {failed}  skipped: {skipped}  retries: {retries}'.format(**s),
+            '  latency p50: {:.0f}ms  p90: {:.0f}ms  p99: {:.0f}ms  max: {:.0f}ms'.format(
+                s['p50'] * 1000, s['p90'] * 1000, s['p99'] * 1000, s['max'] * 1000)
+        ])
@@ -0,0 +1,219 @@
+import threading
+import time
+from collections import OrderedDict
+
+#LRU cache whose entries also expire ttl seconds after they were stored.
+#Entries can carry tags so that groups of them can be invalidated together. generation is bumped by every
+#invalidation, so a value read before one can be kept from being stored after it (see Put)
+class TTLCache:
+    _MISSING = object()
+
+    def __init__(self, ttl = 60, maxsize = 10000, clock = time.time):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        #key -> (expires, value, tags)
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.invalidated = 0
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _Remove(self, key):
+        expires, value, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    #returns the cached value or TTLCache._MISSING
+    def Get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return self._MISSING
+            if self.ttl is not None and entry[0] <= self._clock():
+                self._Remove(key)
+                self.expired += 1
+                self.misses += 1
+                return self._MISSING
+            #reinsert to mark the key as most recently used
+            del self._entries[key]
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    #store value under key. With generation, the value is dropped if anything was invalidated since then
+    def Put(self, key, value, tags = (), generation = None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            if key in self._entries:
+                self._Remove(key)
+            expires = self._clock() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (expires, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._Remove(next(iter(self._entries)))
+                self.evicted += 1
+            return True
+
+    def Invalidate(self, key):
+        with self._lock:
+            self.generation += 1
+            if key in self._entries:
+                self._Remove(key)
+                self.invalidated += 1
+
+    def InvalidateTag(self, tag):
+        with self._lock:
+            self.generation += 1
+            for key in list(self._tags.get(tag, ())):
+                self._Remove(key)
+                self.invalidated += 1
+
+    def Clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def Stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'invalidated': self.invalidated
+        }
+
+#tag shared by every cached call that was looked up by path. Paths can change whenever anything is renamed,
+#moved, created or deleted, so these entries are dropped on every mutating call
+PATH_TAG = ('path',)
+
+#Read-through cache for SDK calls made through an LFWrapper (see LFWrapper.EnableCache).
+#Results of read_methods are cached per (class, method, arguments); the session is one of the arguments,
+#so cached objects are never handed to a caller using a different session.
+#Every caller gets its own wrapper of a cached object: property reads go to the cached object, and the first
+#method call or property assignment swaps in a freshly read object of the caller's own (see
+#lf_wrapper.LFCachedInstanceWrapper), so one caller's edits never show up in another's results.
+#Calls to mutating_methods invalidate the cached results for the ids involved and every path lookup. Ids are
+#tagged per id space (ID_SPACES), so an account id never invalidates the entry with the same number, and a
+#read that was in flight while anything was invalidated is not stored.
+class LFCallCache:
+    READ_METHODS = frozenset([
+        ('Entry', 'GetEntryInfo'),
+        ('Folder', 'GetFolderInfo'),
+        ('Document', 'GetDocumentInfo'),
+        ('Account', 'GetInfo')
+    ])
+    MUTATING_METHODS = frozenset(['Save', 'RenameTo', 'MoveTo', 'CopyTo', 'Delete', 'Create'])
+    #class or object type name -> the id space of the ids passed to its methods or held in its Id.
+    #Folders and documents are entries, users and groups are accounts. Other names are a space of their own
+    ID_SPACES = {
+        'Entry': 'Entry', 'Folder': 'Entry', 'Document': 'Entry', 'Shortcut': 'Entry',
+        'EntryInfo': 'Entry', 'FolderInfo': 'Entry', 'DocumentInfo': 'Entry', 'ShortcutInfo': 'Entry',
+        'Account': 'Account', 'AccountInfo': 'Account', 'UserInfo': 'Account', 'GroupInfo': 'Account'
+    }
+
+    def __init__(self, ttl = 60, maxsize = 10000, read_methods = None, mutating_methods = None):
+        self.store = TTLCache(ttl, maxsize)
+        self.read_methods = frozenset(read_methods) if read_methods is not None else self.READ_METHODS
+        self.mutating_methods = frozenset(mutating_methods) if mutating_methods is not None else self.MUTATING_METHODS
+
+    @staticmethod
+    def _Unbox(value):
+        return getattr(value, '_instance', value)
+
+    def _Space(self, name):
+        return self.ID_SPACES.get(name, name)
+
+    #the id space and id of a wrapped SDK object, if it has an Id
+    def _IdOf(self, value):
+        #only read Id if the object has such a property, otherwise the wrapper would treat it as a method call
+        if not hasattr(value, 'HasProperty') or not value.HasProperty('Id'):
+            return None
+        try:
+            id = value.Id
+        except Exception:
+            return None
+        if not isinstance(id, (int, long)):
+            return None
+        return (self._Space(value.Unbox().GetType().Name), id)
+
+    #tags of a call whose plain int arguments are ids in space
+    def _Tags(self, space, args, result):
+        tags = []
+        if any(isinstance(arg, basestring) for arg in args):
+            tags.append(PATH_TAG)
+        for value in list(args) + [result]:
+            if isinstance(value, (int, long)) and not isinstance(value, bool):
+                tags.append(('id', space, value))
+            else:
+                id = self._IdOf(value)
+                if id is not None:
+                    tags.append(('id',) + id)
+        return tags
+
+    def _InvalidateFor(self, space, values):
+        self.store.InvalidateTag(PATH_TAG)
+        for tag in self._Tags(space, values, None):
+            if tag is not PATH_TAG:
+                self.store.InvalidateTag(tag)
+
+    #the caller's own wrapper of a cached result. reload reads the object again when it is first edited
+    @staticmethod
+    def _Share(result, reload):
+        if not hasattr(result, 'Unbox'):
+            return result
+        from lf_wrapper import ShareCached
+        return ShareCached(result, reload)
+
+    #static call, e.g. Entry.GetEntryInfo(id, sess). invoke performs the actual call, reload (invoke by default)
+    #one that is never shared with other callers
+    def Call(self, class_name, method_name, args, invoke, reload = None):
+        if (class_name, method_name) in self.read_methods:
+            key = (class_name, method_name, tuple(self._Unbox(arg) for arg in args))
+            result = self.store.Get(key)
+            if result is TTLCache._MISSING:
+                generation = self.store.generation
+                result = invoke()
+                self.store.Put(key, result, self._Tags(self._Space(class_name), args, result), generation)
+            return self._Share(result, reload or invoke)
+        if method_name in self.mutating_methods:
+            try:
+                return invoke()
+            finally:
+                self._InvalidateFor(self._Space(class_name), args)
+        return invoke()
+
+    #instance call, e.g. entry.Save(). target is the wrapped object the method is called on
+    def InstanceCall(self, target, method_name, args, invoke):
+        if method_name in self.mutating_methods:
+            try:
+                return invoke()
+            finally:
+                self._InvalidateFor(self._Space(target.Unbox().GetType().Name), [target] + list(args))
+        return invoke()
+
+    def Clear(self):
+        self.store.Clear()
+
+    def Stats(self):
+        return self.store.Stats()
@@ -0,0 +1,133 @@
+import json
+import os
+import tempfile
+import threading
+
+#On disk record of how each SDK assembly was resolved on an earlier run (see LFWrapper.LoadRA / LoadLfso)
+#Entries are keyed by library and version and hold:
+#   source   - 'gac' or 'file', so the next start loads the assembly the same way without probing
+#   location - path of the resolved dll, if known
+#   mtime    - modification time of that dll. The entry is dropped when the dll changes
+#   types    - attribute name -> namespace (RA) or module key (LFSO) it was found in
+class LFTypeCatalog:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries = {}
+        try:
+            with open(file_path) as fs:
+                self._entries = json.load(fs)
+        except (IOError, ValueError):
+            pass
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _Key(library, version):
+        return '{}:{}'.format(library, version)
+
+    @staticmethod
+    def _MTime(location):
+        try:
+            return os.path.getmtime(location)
+        except (OSError, TypeError):
+            return None
+
+    #the entry recorded for library/version, or None if there is none or the dll has changed since
+    def Get(self, library, version):
+        with self._lock:
+            entry = self._entries.get(self._Key(library, version))
+            if entry is None:
+                return None
+            if entry.get('location') is not None and self._MTime(entry['location']) != entry.get('mtime'):
+                del self._entries[self._Key(library, version)]
+                self._dirty = True
+                return None
+            return entry
+
+    def Put(self, library, version, source, location = None):
+        entry = {'source': source, 'location': location, 'mtime': self._MTime(location), 'types': {}}
+        with self._lock:
+            self._entries[self._Key(library, version)] = entry
+            self._dirty = True
+        return entry
+
+    #the library of entry was found somewhere other than where it was recorded
+    def Relocate(self, entry, source, location = None):
+        with self._lock:
+            if (entry['source'], entry.get('location')) != (source, location):
+                entry['source'] = source
+                entry['location'] = location
+                entry['mtime'] = self._MTime(location)
+                self._dirty = True
+
+    def Record(self, entry, attr, value):
+        with self._lock:
+            if entry['types'].get(attr) != value:
+                entry['types'][attr] = value
+                self._dirty = True
+
+    def Clear(self):
+        with self._lock:
+            self._entries = {}
+            self._dirty = True
+
+    #write the catalog if anything changed since it was loaded. The data goes to a temporary file of its own
+    #next to the catalog first, so processes saving at the same time never write into each other's file
+    def Save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._entries, indent = 1, sort_keys = True)
+            self._dirty = False
+        folder, name = os.path.split(os.path.abspath(self.file_path))
+        handle, tmp_path = tempfile.mkstemp(prefix = name + '.', suffix = '.tmp', dir = folder)
+        try:
+            with os.fdopen(handle, 'w') as fs:
+                fs.write(data)
+            try:
+                os.rename(tmp_path, self.file_path)
+            except OSError:
+                #os.rename does not replace an existing file on Windows
+                try:
+                    os.remove(self.file_path)
+                except OSError:
+                    pass
+                os.rename(tmp_path, self.file_path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+#Stands in for an imported SDK namespace until one of its attributes is used.
+#loader is called once, on first use, and returns the real module
+class LazyModule:
+    def __init__(self, loader, name = None):
+        self._loader = loader
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<lazy module {}>'.format(self._name)
+
+    def _Load(self):
+        with self._lock:
+            if self._module is None:
+                module = self._loader()
+                if module is None:
+                    raise ImportError('{} could not be loaded'.format(self._name))
+                self._module = module
+            return self._module
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        return getattr(self._Load(), attr)
+
+    def __dir__(self):
+        return dir(self._Load())
@@ -0,0 +1,184 @@
+import sys
+import threading
+
+from lf_cache import LFCallCache
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class _Batch:
+    __slots__ = ('items', 'full', 'done', 'results', 'error')
+
+    def __init__(self):
+        self.items = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+#Coalesces read-only SDK calls made through an LFWrapper (see LFWrapper.EnableCoalescing).
+#   single flight - concurrent calls with the same class, method and arguments share one invocation
+#   micro batching - calls to a method with a registered batch function are collected for up to window
+#                    seconds (or max_batch calls) and sent as one batch. Calls are compatible when they
+#                    only differ in their first argument, e.g. Entry.GetEntryInfo(id, sess). A batch is
+#                    sent straight away once no other call of the method is in flight to join it
+#The session is part of the arguments, so only callers on the same session share a call unless share_sessions
+#is set: then sessions (objects of session_types) are left out of the match and workers that each hold their own
+#pooled session share flights and batches too. Either way every caller but the one that made the call gets its
+#own copy-on-write view of the result (see lf_wrapper.LFCachedInstanceWrapper): edits and method calls reload a
+#private object on the caller's own session first. Calls with unhashable arguments are not coalesced.
+class LFCoalescer:
+    SESSION_TYPES = frozenset(['Session'])
+
+    def __init__(self, read_methods = None, window = 0.005, max_batch = 100, share_sessions = False,
+                 session_types = None):
+        self.read_methods = frozenset(read_methods) if read_methods is not None else LFCallCache.READ_METHODS
+        self.window = window
+        self.max_batch = max_batch
+        self.share_sessions = share_sessions
+        self.session_types = frozenset(session_types) if session_types is not None else self.SESSION_TYPES
+        self._batchers = {}
+        self._flights = {}
+        self._batches = {}
+        #batch key -> calls of it between joining a batch and getting their result
+        self._batching = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+        self.batches = 0
+        self.batched = 0
+
+    #batch_func(items, *rest) is called with the first argument of every collected call and the remaining
+    #arguments they have in common. It returns one result per item, in order
+    def RegisterBatch(self, class_name, method_name, batch_func):
+        with self._lock:
+            self._batchers[(class_name, method_name)] = batch_func
+            self.read_methods = self.read_methods | frozenset([(class_name, method_name)])
+
+    def _Key(self, args):
+        key = []
+        for arg in args:
+            value = getattr(arg, '_instance', arg)
+            if self.share_sessions:
+                get_type = getattr(value, 'GetType', None)
+                if get_type is not None and get_type().Name in self.session_types:
+                    continue
+            key.append(value)
+        return tuple(key)
+
+    #the result of a call made by another caller: wrapped objects are handed out as a view that reloads on
+    #the caller's own session before it is changed
+    @staticmethod
+    def _Share(result, invoke):
+        if not hasattr(result, '_instance'):
+            return result
+        from lf_wrapper import ShareCached
+        return ShareCached(result, invoke)
+
+    #invoke performs the call on its own
+    def Call(self, class_name, method_name, args, invoke):
+        if (class_name, method_name) not in self.read_methods:
+            return invoke()
+        key = (class_name, method_name, self._Key(args))
+        try:
+            hash(key)
+        except TypeError:
+            return invoke()
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error[0], flight.error[1], flight.error[2]
+            return self._Share(flight.result, invoke)
+
+        try:
+            batch_func = self._batchers.get((class_name, method_name))
+            if batch_func is not None and args:
+                flight.result = self._Batched(batch_func, key, args, invoke)
+            else:
+                flight.result = invoke()
+            return flight.result
+        except Exception:
+            flight.error = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _Batched(self, batch_func, key, args, invoke):
+        batch_key = (key[0], key[1], key[2][1:])
+        with self._lock:
+            batching = self._batching[batch_key] = self._batching.get(batch_key, 0) + 1
+            batch = self._batches.get(batch_key)
+            leader = batch is None
+            if leader:
+                batch = self._batches[batch_key] = _Batch()
+            index = len(batch.items)
+            batch.items.append(args[0])
+            if len(batch.items) >= self.max_batch:
+                del self._batches[batch_key]
+                batch.full.set()
+            elif len(batch.items) >= batching:
+                #every call in flight is in this batch, nobody else can join it
+                batch.full.set()
+        try:
+            result = self._Join(batch_func, batch_key, batch, leader, index, args)
+            return result if leader else self._Share(result, invoke)
+        finally:
+            with self._lock:
+                batching = self._batching[batch_key] - 1
+                if batching:
+                    self._batching[batch_key] = batching
+                    waiting = self._batches.get(batch_key)
+                    if waiting is not None and len(waiting.items) >= batching:
+                        waiting.full.set()
+                else:
+                    del self._batching[batch_key]
+
+    def _Join(self, batch_func, batch_key, batch, leader, index, args):
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._batches.get(batch_key) is batch:
+                    del self._batches[batch_key]
+                self.batches += 1
+                self.batched += len(batch.items)
+            try:
+                batch.results = list(batch_func(batch.items, *args[1:]))
+                if len(batch.results) != len(batch.items):
+                    raise Exception('Batch function returned {} results for {} items'.format(
+                        len(batch.results), len(batch.items)))
+            except Exception:
+                batch.error = sys.exc_info()
+            batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error[0], batch.error[1], batch.error[2]
+        return batch.results[index]
+
+    def Stats(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'shared': self.shared,
+                'invoked': self.calls - self.shared,
+                'batches': self.batches,
+                'batched': self.batched,
+                'in_flight': len(self._flights)
+            }
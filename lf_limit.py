@@ -0,0 +1,158 @@
+import threading
+import time
+
+#errors that mean the server is overloaded or unreachable, as opposed to errors about the call itself (an entry
+#that does not exist, a name that is taken, ...). Matched on the .NET type name of the error or of its inner
+#exceptions, python socket and IO errors, and the message
+SERVER_ERROR_TYPES = frozenset(['TimeoutException', 'WebException', 'SocketException', 'IOException',
+                                'CommunicationException', 'EndpointNotFoundException', 'ServerTooBusyException'])
+SERVER_ERROR_MESSAGES = ('too busy', 'timed out', 'timeout', 'unavailable', 'connection')
+
+def IsServerError(error):
+    while error is not None:
+        error = getattr(error, 'clsException', error)
+        if isinstance(error, EnvironmentError):
+            return True
+        get_type = getattr(error, 'GetType', None)
+        if get_type is not None and get_type().Name in SERVER_ERROR_TYPES:
+            return True
+        message = (getattr(error, 'Message', None) or str(error)).lower()
+        if any(text in message for text in SERVER_ERROR_MESSAGES):
+            return True
+        error = getattr(error, 'InnerException', None)
+    return False
+
+_SERVER_RATES = {}
+_SERVER_RATES_LOCK = threading.Lock()
+
+#cap the calls per second made against server by every bulk runner in the process. Returns the bucket,
+#or None when rate is None (no cap)
+def SetServerRate(server, rate, burst = None):
+    with _SERVER_RATES_LOCK:
+        _SERVER_RATES[server] = TokenBucket(rate, burst) if rate else None
+        return _SERVER_RATES[server]
+
+def ServerBucket(server):
+    with _SERVER_RATES_LOCK:
+        return _SERVER_RATES.get(server)
+
+#Token bucket: rate tokens per second are added up to burst (default one second worth).
+#Acquire blocks until a token is available
+class TokenBucket:
+    def __init__(self, rate, burst = None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, rate))
+        self._tokens = self.burst
+        self._updated = time.time()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def _Refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    #take tokens, waiting up to timeout seconds (forever when None). Returns False on timeout
+    def Acquire(self, tokens = 1, timeout = None):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._lock:
+                now = time.time()
+                self._Refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                delay = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                if now >= deadline:
+                    return False
+                delay = min(delay, deadline - now)
+            time.sleep(delay)
+            with self._lock:
+                self.waited += delay
+
+    def Stats(self):
+        with self._lock:
+            self._Refill(time.time())
+            return {'rate': self.rate, 'burst': self.burst, 'tokens': self._tokens, 'waited': self.waited}
+
+#Adaptive concurrency limit (AIMD) for calls against one server. Callers Acquire() a slot before a call and
+#Release(latency, error) after it. Once per window (as many completions as the current limit) the limit is
+#   - multiplied by decrease if more than error_rate of the calls failed or their mean latency rose above
+#     tolerance times the baseline (the lowest window mean seen, drifting up slowly so a server that has
+#     become slower for good is accepted)
+#   - raised by increase if the calls kept every slot busy, i.e. more concurrency was actually wanted
+#so the limit climbs until latency or errors show the server is saturated, backs off, and then holds
+#around the throughput peak. Only errors that classify(error) accepts (by default IsServerError: overload and
+#transport errors) count as failed calls; a call rejected for its own reasons still measured the server's latency.
+class AdaptiveLimiter:
+    def __init__(self, initial = 4, min_limit = 1, max_limit = 64, increase = 1, decrease = 0.7,
+                 tolerance = 1.5, error_rate = 0.05, drift = 0.02, classify = None):
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.error_rate = error_rate
+        self.drift = drift
+        self.classify = classify or IsServerError
+        self.baseline = None
+        self.increases = 0
+        self.decreases = 0
+        self._cond = threading.Condition(threading.Lock())
+        self._in_flight = 0
+        self._peak = 0
+        self._ResetWindow()
+
+    def _ResetWindow(self):
+        self._count = 0
+        self._errors = 0
+        self._latency = 0.0
+        self._peak = self._in_flight
+
+    #wait for a free slot, up to timeout seconds (forever when None). Returns False on timeout
+    def Acquire(self, timeout = None):
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+            self._in_flight += 1
+            self._peak = max(self._peak, self._in_flight)
+            return True
+
+    def Release(self, latency, error = False):
+        with self._cond:
+            self._in_flight -= 1
+            self._count += 1
+            if error:
+                self._errors += 1
+            else:
+                self._latency += latency
+            if self._count >= int(self.limit):
+                self._Adjust()
+            self._cond.notify_all()
+
+    def _Adjust(self):
+        succeeded = self._count - self._errors
+        mean = self._latency / succeeded if succeeded else None
+        if mean is not None:
+            self.baseline = mean if self.baseline is None else min(mean, self.baseline * (1 + self.drift))
+        if (float(self._errors) / self._count > self.error_rate or
+                (mean is not None and mean > self.baseline * self.tolerance)):
+            self.limit = max(self.min_limit, self.limit * self.decrease)
+            self.decreases += 1
+        elif self._peak >= int(self.limit):
+            self.limit = min(self.max_limit, self.limit + self.increase)
+            self.increases += 1
+        self._ResetWindow()
+
+    def Stats(self):
+        with self._cond:
+            return {'limit': int(self.limit), 'in_flight': self._in_flight, 'baseline': self.baseline,
+                    'increases': self.increases, 'decreases': self.decreases}
@@ -0,0 +1,239 @@
+import json
+import threading
+
+from lf_cache import TTLCache
+
+#Laserfiche paths are case insensitive and may be given with or without the leading \
+def SplitPath(path):
+    return [segment.lower() for segment in path.replace('/', '\\').split('\\') if segment]
+
+class _Node:
+    __slots__ = ('id', 'children')
+
+    def __init__(self, id = None):
+        self.id = id
+        self.children = {}
+
+#In memory trie mapping repository paths to entry ids.
+#Filled lazily by LFPathResolver as folders are looked up or created, optionally warmed up by walking a
+#subtree once, and saved to / loaded from disk so later runs start warm.
+class LFPathIndex:
+    def __init__(self, repository = None):
+        self.repository = repository
+        self._root = _Node()
+        self._paths = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._paths)
+
+    def _Find(self, segments):
+        node = self._root
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+    def Get(self, path):
+        with self._lock:
+            node = self._Find(SplitPath(path))
+            return node.id if node is not None else None
+
+    def Add(self, path, id):
+        segments = SplitPath(path)
+        with self._lock:
+            node = self._root
+            for segment in segments:
+                node = node.children.setdefault(segment, _Node())
+            if node.id is not None and self._paths.get(node.id) == segments:
+                del self._paths[node.id]
+            node.id = id
+            self._paths[id] = segments
+
+    def _Drop(self, node):
+        if node.id is not None and node.id in self._paths:
+            del self._paths[node.id]
+        for child in node.children.values():
+            self._Drop(child)
+
+    #forget a path and everything below it
+    def Remove(self, path):
+        segments = SplitPath(path)
+        if not segments:
+            return self.Clear()
+        with self._lock:
+            parent = self._Find(segments[:-1])
+            if parent is not None and segments[-1] in parent.children:
+                self._Drop(parent.children.pop(segments[-1]))
+
+    #forget the entry with the given id and everything below it, e.g. after it was renamed, moved or deleted
+    def RemoveId(self, id):
+        with self._lock:
+            segments = self._paths.get(id)
+            if segments is not None:
+                self.Remove('\\'.join(segments))
+
+    def Clear(self):
+        with self._lock:
+            self._root = _Node()
+            self._paths = {}
+
+    #walk the subtree below path once and record every folder in it
+    #list_folders(folder_id) returns the (name, id) pairs of the subfolders of a folder
+    def Warm(self, path, id, list_folders, max_depth = None):
+        self.Add(path, id)
+        pending = [(SplitPath(path), id, 0)]
+        count = 1
+        while pending:
+            segments, folder_id, depth = pending.pop()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for name, child_id in list_folders(folder_id):
+                child = segments + [name.lower()]
+                self.Add('\\'.join(child), child_id)
+                pending.append((child, child_id, depth + 1))
+                count += 1
+        return count
+
+    def Save(self, file_path):
+        with self._lock:
+            paths = dict(('\\' + '\\'.join(segments), id) for id, segments in self._paths.items())
+        with open(file_path, 'w') as fs:
+            json.dump({'repository': self.repository, 'paths': paths}, fs)
+
+    @classmethod
+    def Load(cls, file_path, repository = None):
+        with open(file_path) as fs:
+            data = json.load(fs)
+        if repository is not None and data.get('repository') not in (None, repository):
+            raise ValueError('{} holds the path index of repository {}, not {}'.format(
+                file_path, data.get('repository'), repository))
+        index = cls(data.get('repository') or repository)
+        for path, id in data['paths'].items():
+            index.Add(path, id)
+        return index
+
+#lf_wrapper loads the CLR, so it is only imported once a resolver is in use
+def _IsNotFound(error):
+    from lf_wrapper import IsNotFound
+    return IsNotFound(error)
+
+#Hooks a path index into the SDK calls made through an LFWrapper (see LFWrapper.EnablePathIndex)
+#   Folder.GetFolderInfo(path, sess) is answered from memory when the folder was already loaded on the same
+#       session, and with Folder.GetFolderInfo(id, sess) when the path is only indexed. Each caller gets its own
+#       copy-on-write view of the FolderInfo. Kept FolderInfo objects expire after ttl seconds, so changes made by
+#       other clients are picked up. Entries are validated lazily: when loading by id or creating in a cached
+#       folder reports that the folder no longer exists, that path is dropped and looked up again next time
+#   Folder.GetFolderInfo(path, sess) and Folder.Create(parent, name, ...) results are added to the index
+#   renaming, moving or deleting an entry drops it (and its subtree) from the index
+class LFPathResolver:
+    MUTATING_METHODS = frozenset(['RenameTo', 'MoveTo', 'Delete'])
+
+    def __init__(self, index, ttl = 60, maxsize = 10000):
+        self.index = index
+        self.hits = 0
+        self.loads = 0
+        self.misses = 0
+        self.stale = 0
+        #(session, folder id) -> FolderInfo loaded on that session, tagged with the folder id
+        self._folders = TTLCache(ttl, maxsize)
+
+    @staticmethod
+    def _Get(value, prop):
+        if not hasattr(value, 'HasProperty') or not value.HasProperty(prop):
+            return None
+        return getattr(value, prop)
+
+    def _SamePath(self, result, path):
+        actual = self._Get(result, 'Path')
+        return actual is None or SplitPath(actual) == SplitPath(path)
+
+    def _Cached(self, session, id):
+        folder = self._folders.Get((session, id))
+        return folder if folder is not TTLCache._MISSING else None
+
+    def _Keep(self, session, id, folder):
+        self._folders.Put((session, id), folder, [('id', id)])
+
+    #forget the FolderInfo objects of an id on every session
+    def _Forget(self, id):
+        self._folders.InvalidateTag(('id', id))
+
+    def _Evict(self, path, id):
+        self.stale += 1
+        self.index.Remove(path)
+        self._Forget(id)
+
+    #a copy-on-write view of a kept FolderInfo; edits and method calls reload a private copy first
+    @staticmethod
+    def _Share(folder, reload):
+        from lf_wrapper import ShareCached
+        return ShareCached(folder, reload)
+
+    #call(args) performs the call with the given argument list
+    def Call(self, class_name, method_name, args, call):
+        if class_name != 'Folder':
+            return call(args)
+
+        if method_name == 'GetFolderInfo' and len(args) >= 2 and isinstance(args[0], basestring):
+            path, rest, session = args[0], tuple(args[1:]), args[-1]
+            id = self.index.Get(path)
+            if id is not None:
+                reload = lambda: call((id,) + rest)
+                folder = self._Cached(session, id)
+                if folder is not None:
+                    self.hits += 1
+                    return self._Share(folder, reload)
+                try:
+                    folder = reload()
+                except Exception as e:
+                    if not _IsNotFound(e):
+                        raise
+                    folder = None
+                if folder is not None and self._SamePath(folder, path):
+                    self.loads += 1
+                    self._Keep(session, id, folder)
+                    return self._Share(folder, reload)
+                self._Evict(path, id)
+            self.misses += 1
+            folder = call(args)
+            id = self._Get(folder, 'Id')
+            if id is None:
+                return folder
+            self.index.Add(path, id)
+            self._Keep(session, id, folder)
+            return self._Share(folder, lambda: call((id,) + rest))
+
+        if method_name == 'Create' and len(args) >= 2 and isinstance(args[1], basestring):
+            parent_path = self._Get(args[0], 'Path')
+            try:
+                result = call(args)
+            except Exception as e:
+                #the parent may be a kept FolderInfo of a folder that was deleted since
+                parent_id = self._Get(args[0], 'Id')
+                if parent_path is not None and parent_id is not None and _IsNotFound(e):
+                    self._Evict(parent_path, parent_id)
+                raise
+            if parent_path is not None and isinstance(result, (int, long)):
+                #AutoRename may have picked another name; the path check on lookup catches that case
+                self.index.Add(parent_path + '\\' + args[1], result)
+            return result
+
+        return call(args)
+
+    #target is the wrapped object the method is called on
+    def InstanceCall(self, target, method_name, args, call):
+        if method_name not in self.MUTATING_METHODS:
+            return call(args)
+        try:
+            return call(args)
+        finally:
+            id = self._Get(target, 'Id')
+            if id is not None:
+                self.index.RemoveId(id)
+                self._Forget(id)
+
+    def Stats(self):
+        return {'paths': len(self.index), 'hits': self.hits, 'loads': self.loads, 'misses': self.misses,
+                'stale': self.stale}
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import deque
+from Queue import Queue, Empty
+
+#Pool of open repository sessions that can be checked out by concurrent workers.
+#The pool does not know anything about the SDK; LFWrapper.CreatePool supplies the callables:
+#   factory       - opens and returns a new session
+#   close         - closes a session that is discarded by the pool
+#   health_check  - returns True if an idle session can still be used
+class SessionPool:
+    def __init__(self, factory, min_size = 1, max_size = 4, health_check = None, close = None,
+                 idle_timeout = 300, checkout_timeout = None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError('Invalid pool size. Expected 0 <= min_size <= max_size and max_size >= 1')
+        self._factory = factory
+        self._health_check = health_check
+        self._close = close
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+
+        #idle sessions are stored as (session, time returned to the pool). Most recently used is on the right
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+        self.created = 0
+        self.discarded = 0
+        self.checkouts = 0
+        self.waits = 0
+
+        self.Fill()
+
+    def __repr__(self):
+        return 'SessionPool({}/{} sessions, {} idle)'.format(self._size, self.max_size, len(self._idle))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.Close()
+
+    #open sessions until the pool holds min_size of them
+    def Fill(self):
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            session = self._Open()
+            self.Release(session)
+
+    def _Open(self):
+        try:
+            session = self._factory()
+        except:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.created += 1
+        return session
+
+    def _Discard(self, session):
+        with self._cond:
+            self._size -= 1
+            self.discarded += 1
+            self._cond.notify()
+        if self._close is not None:
+            try:
+                self._close(session)
+            except Exception:
+                pass
+
+    def _IsHealthy(self, session):
+        if self._health_check is None:
+            return True
+        try:
+            return bool(self._health_check(session))
+        except Exception:
+            return False
+
+    #take a session from the pool. Blocks for up to timeout seconds when all max_size sessions are in use
+    def Acquire(self, timeout = None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            session = None
+            stale = None
+            with self._cond:
+                if self._closed:
+                    raise Exception('The session pool has been closed')
+                if self._idle:
+                    session, returned = self._idle.pop()
+                    if self.idle_timeout is not None and time.time() - returned > self.idle_timeout:
+                        stale, session = session, None
+                elif self._size < self.max_size:
+                    self._size += 1
+                else:
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise Exception('Timed out waiting for a free session ({} in use)'.format(self._size))
+                    self.waits += 1
+                    self._cond.wait(remaining)
+                    continue
+
+            if stale is not None:
+                self._Discard(stale)
+                continue
+            if session is None:
+                session = self._Open()
+            elif not self._IsHealthy(session):
+                self._Discard(session)
+                continue
+            with self._cond:
+                self.checkouts += 1
+            return session
+
+    #return a session to the pool. Pass discard=True for sessions that are known to be broken
+    def Release(self, session, discard = False):
+        with self._cond:
+            if not discard and not self._closed:
+                self._idle.append((session, time.time()))
+                self._cond.notify()
+                return
+        self._Discard(session)
+
+    #context manager checkout. The session is discarded instead of returned if the block raises
+    #an exception and discard_on_error is set
+    def Checkout(self, timeout = None, discard_on_error = False):
+        return _Checkout(self, timeout, discard_on_error)
+
+    #close idle sessions that have exceeded idle_timeout, keeping at least min_size sessions open
+    def Prune(self):
+        expired = []
+        now = time.time()
+        with self._cond:
+            keep = deque()
+            while self._idle:
+                session, returned = self._idle.popleft()
+                if (self.idle_timeout is not None and now - returned > self.idle_timeout
+                        and self._size - len(expired) > self.min_size):
+                    expired.append(session)
+                else:
+                    keep.append((session, returned))
+            self._idle = keep
+        for session in expired:
+            self._Discard(session)
+        return len(expired)
+
+    #run func(session, item) for every item on up to workers threads, each holding its own pooled session
+    #results are returned in input order. If any call raises, the first error is raised after all items finish
+    def Map(self, func, items, workers = None):
+        workers = min(workers or self.max_size, self.max_size)
+        work = Queue()
+        count = 0
+        for index, item in enumerate(items):
+            work.put((index, item))
+            count += 1
+        results = [None] * count
+        errors = []
+        checkout_errors = []
+
+        def worker():
+            try:
+                session = self.Acquire()
+            except Exception as e:
+                checkout_errors.append(e)
+                return
+            try:
+                while True:
+                    try:
+                        index, item = work.get_nowait()
+                    except Empty:
+                        return
+                    try:
+                        results[index] = func(session, item)
+                    except Exception as e:
+                        errors.append((index, e))
+            finally:
+                self.Release(session)
+
+        threads = [threading.Thread(target = worker) for i in range(min(workers, count))]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join()
+        #items are only left over if no worker could get a session
+        if not work.empty() and checkout_errors:
+            raise checkout_errors[0]
+        if errors:
+            raise min(errors, key = lambda e: e[0])[1]
+        return results
+
+    #close every idle session. Sessions that are checked out are closed when they are released
+    def Close(self):
+        with self._cond:
+            self._closed = True
+            idle = [session for session, returned in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for session in idle:
+            self._Discard(session)
+
+    def Stats(self):
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'created': self.created,
+                'discarded': self.discarded,
+                'checkouts': self.checkouts,
+                'waits': self.waits
+            }
+
+class _Checkout:
+    def __init__(self, pool, timeout, discard_on_error):
+        self._pool = pool
+        self._timeout = timeout
+        self._discard_on_error = discard_on_error
+        self._session = None
+
+    def __enter__(self):
+        self._session = self._pool.Acquire(self._timeout)
+        return self._session
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._pool.Release(self._session, discard = self._discard_on_error and exc_type is not None)
+        self._session = None
@@ -0,0 +1,305 @@
+import cPickle
+import signal
+import threading
+import zlib
+from Queue import Empty, Full
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+from lf_bulk import BulkRunner, BulkStats, LoadCheckpoint
+from lf_limit import AdaptiveLimiter, TokenBucket
+
+#Runs func(context, session, item) for a stream of items across worker processes, each running one BulkRunner
+#with its own wrapper and session pool, so CLR reflection and the GIL of one process do not cap throughput.
+#A worker feeds the chunks it takes to its runner as one stream, so chunk boundaries never leave threads idle.
+#   setup()     - called once in each worker process. Returns (context, pool), e.g. (LF, LF.CreatePool(...))
+#                 after LoadRA; context is passed to every func call and pool is closed when the worker exits
+#   func        - func(context, session, item). Its return value is handed to on_success(item, result) in the
+#                 parent; values that do not pickle are passed as their repr
+#   adaptive    - give each worker process an AdaptiveLimiter over its workers
+#   rate        - cap on items per second across all processes, split evenly between them
+#   shard_key   - optional key(item). Items with the same key always go to the same process; without it
+#                 chunks go to whichever process is free
+#The parent reads the items, hands them out in chunks of chunk_size, writes the checkpoint and collects stats,
+#results and errors. Items of the chunks a worker was running when it died are reported as failed rather than
+#handed to another worker, since they may have been partly applied. When every worker has died the rest of
+#the input is left unread; with a checkpoint the next run picks up where this one stopped.
+#setup, func, shard_key, the items and func's return values must be picklable on Windows (use module level
+#functions or functools.partial). Needs multiprocessing, so CPython with pythonnet rather than IronPython.
+#   runner = ShardRunner(functools.partial(create_lf_pool, server, repo, None, None, workers = 4),
+#                        trigger_entry, processes = 8, workers = 4)
+#   stats = runner.Run(entry_ids)
+class ShardRunner:
+    def __init__(self, setup, func, processes = 4, workers = 4, retries = 3, backoff = 0.5, max_backoff = 30,
+                 chunk_size = 100, shard_key = None, checkpoint = None, on_success = None, on_error = None,
+                 adaptive = False, rate = None, poll_interval = 0.2):
+        if multiprocessing is None:
+            raise Exception('multiprocessing is not available on this interpreter')
+        self._setup = setup
+        self._func = func
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.checkpoint = checkpoint
+        self.poll_interval = poll_interval
+        self._options = {'workers': workers, 'retries': retries, 'backoff': backoff, 'max_backoff': max_backoff,
+                         'adaptive': adaptive, 'rate': float(rate) / processes if rate else None}
+        self._shard_key = shard_key
+        self._on_success = on_success
+        self._on_error = on_error
+        self.stats = BulkStats()
+        #(worker index, error) for workers that could not start or exited early
+        self.worker_errors = []
+
+    def _Shard(self, item):
+        if self._shard_key is None:
+            return 0
+        return (zlib.crc32(str(self._shard_key(item))) & 0xffffffff) % self.processes
+
+    #handle every message waiting in the result queue, waiting up to timeout for the first
+    def _Drain(self, timeout = 0):
+        while True:
+            try:
+                message = self._results.get(timeout = timeout) if timeout else self._results.get_nowait()
+            except Empty:
+                return
+            timeout = 0
+            kind, index = message[0], message[1]
+            if kind == 'take':
+                self._taken.setdefault(index, set()).add(message[2])
+            elif kind == 'chunk':
+                self._Finish(index, *message[2:])
+            elif kind == 'stats':
+                self.stats.Merge(message[2], 0, 0, message[3])
+            elif kind == 'setup_error':
+                self.worker_errors.append((index, message[2]))
+            elif kind == 'exit':
+                self._exited.add(index)
+
+    def _Finish(self, index, chunk_id, done, errors, latencies, retries):
+        self._taken.get(index, set()).discard(chunk_id)
+        self._chunks.pop(chunk_id, None)
+        self.stats.Merge(latencies, len(done), len(errors), retries)
+        for item, result in done:
+            if self._checkpoint_fs is not None:
+                self._checkpoint_fs.write('{}\n'.format(item))
+            if self._on_success is not None:
+                self._on_success(item, result)
+        if self._checkpoint_fs is not None:
+            self._checkpoint_fs.flush()
+        if self._on_error is not None:
+            for item, error in errors:
+                self._on_error(item, error)
+
+    def _Fail(self, items, error):
+        self.stats.Merge([], 0, len(items))
+        if self._on_error is not None:
+            for item in items:
+                self._on_error(item, error)
+
+    #fail the chunks of workers that died without reporting them; a worker may have been running several at once
+    def _CheckWorkers(self):
+        for index, process in enumerate(self._workers):
+            if process.is_alive() or index in self._dead:
+                continue
+            self._Drain()
+            self._dead.add(index)
+            if index not in self._exited:
+                self.worker_errors.append((index, 'worker process exited with code {}'.format(process.exitcode)))
+            for chunk_id in sorted(self._taken.pop(index, ())):
+                if chunk_id in self._chunks:
+                    self._Fail(self._chunks.pop(chunk_id),
+                               'worker process exited with code {}'.format(process.exitcode))
+
+    #put a chunk on a task queue, handling results while the queue is full.
+    #Returns False once every worker has died
+    def _Put(self, shard, chunk):
+        chunk_id = self._next_chunk
+        self._next_chunk += 1
+        self._chunks[chunk_id] = chunk
+        while True:
+            if len(self._dead) == len(self._workers):
+                self._chunks.pop(chunk_id)
+                return False
+            if self._shard_key is not None and shard in self._dead:
+                self._Fail(self._chunks.pop(chunk_id), 'the worker process of this shard has exited')
+                return True
+            try:
+                self._tasks[shard].put((chunk_id, chunk), timeout = self.poll_interval)
+                self._Drain()
+                return True
+            except Full:
+                self._Drain()
+                self._CheckWorkers()
+
+    #process every item and return the collected stats. Worker processes are started here and have
+    #all exited when Run returns
+    def Run(self, items):
+        done = LoadCheckpoint(self.checkpoint)
+        queues = self.processes if self._shard_key is not None else 1
+        self._tasks = [multiprocessing.Queue(2) for i in range(queues)]
+        self._results = multiprocessing.Queue()
+        self._chunks = {}
+        self._taken = {}
+        self._dead = set()
+        self._exited = set()
+        self._next_chunk = 0
+        self._checkpoint_fs = open(self.checkpoint, 'a') if self.checkpoint is not None else None
+        self._workers = [multiprocessing.Process(target = _RunShard, args = (
+            index, self._setup, self._func, self._options, self._tasks[index % queues], self._results))
+            for index in range(self.processes)]
+        for process in self._workers:
+            process.daemon = True
+            process.start()
+
+        self.stats.Start()
+        pending = [[] for i in range(queues)]
+        try:
+            for item in items:
+                if done and str(item) in done:
+                    self.stats.RecordSkip()
+                    continue
+                shard = self._Shard(item)
+                pending[shard].append(item)
+                if len(pending[shard]) >= self.chunk_size:
+                    if not self._Put(shard, pending[shard]):
+                        break
+                    pending[shard] = []
+            else:
+                for shard, chunk in enumerate(pending):
+                    if chunk:
+                        self._Put(shard, chunk)
+            if len(self._dead) == len(self._workers):
+                print 'Every worker process has exited, the remaining items were not run'
+        except KeyboardInterrupt:
+            print 'Interrupted, waiting for the worker processes to finish their chunks...'
+            for queue in self._tasks:
+                try:
+                    while True:
+                        chunk_id, chunk = queue.get_nowait()
+                        self._chunks.pop(chunk_id, None)
+                except Empty:
+                    pass
+        finally:
+            for index in range(self.processes):
+                self._Stop(index, self._tasks[index % queues])
+            while len(self._dead) < len(self._workers):
+                self._Drain(self.poll_interval)
+                self._CheckWorkers()
+            self._Drain()
+            for process in self._workers:
+                process.join()
+            #chunks still queued when their workers died
+            for chunk in self._chunks.values():
+                self._Fail(chunk, 'no worker process was left to run this item')
+            self.stats.Stop()
+            if self._checkpoint_fs is not None:
+                self._checkpoint_fs.close()
+        return self.stats
+
+    #tell a worker to exit once its queue is empty
+    def _Stop(self, index, queue):
+        while True:
+            if len(self._dead) == len(self._workers) or (self._shard_key is not None and index in self._dead):
+                return
+            try:
+                queue.put(None, timeout = self.poll_interval)
+                return
+            except Full:
+                self._Drain()
+                self._CheckWorkers()
+
+#errors cross the process boundary as text, .NET exceptions do not pickle
+def _Describe(error):
+    return '{}: {}'.format(type(error).__name__, getattr(error, 'Message', None) or error)
+
+def _Picklable(value):
+    try:
+        cPickle.dumps(value, -1)
+        return value
+    except Exception:
+        return repr(value)
+
+#a chunk handed to a worker process: the results of its items are collected until the last one finishes
+class _Chunk:
+    def __init__(self, chunk_id, items):
+        self.id = chunk_id
+        self.items = items
+        self.values = {}
+        self.errors = {}
+        self.remaining = len(items)
+
+#body of a worker process: set up once, then run the items of every chunk it takes on one BulkRunner, so its
+#workers move on to the next chunk instead of waiting for the slowest item of the last one. Each chunk is
+#reported to the parent as soon as its last item has finished
+def _RunShard(index, setup, func, options, tasks, results):
+    #the parent handles Ctrl+C and lets the workers finish their chunks
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    options = dict(options)
+    #limiters hold locks, so they are made here rather than passed from the parent
+    limiter = AdaptiveLimiter(max_limit = options['workers']) if options.pop('adaptive') else None
+    rate = options.pop('rate')
+    bucket = TokenBucket(rate) if rate else None
+    try:
+        context, pool = setup()
+    except Exception as e:
+        results.put(('setup_error', index, _Describe(e)))
+        results.put(('exit', index))
+        return
+
+    lock = threading.Lock()
+    #latencies and retries already sent to the parent
+    reported = {'latencies': 0, 'retries': 0}
+
+    #send the latencies and retries recorded since the last report along with a message
+    def report(kind, *message):
+        stats = runner.stats
+        latencies = stats.Latencies(reported['latencies'])
+        retries = stats.retries
+        reported['latencies'] += len(latencies)
+        results.put((kind, index) + message + (latencies, retries - reported['retries']))
+        reported['retries'] = retries
+
+    def finished(chunk, position, value = None, error = None):
+        with lock:
+            if error is None:
+                chunk.values[position] = value
+            else:
+                chunk.errors[position] = error
+            chunk.remaining -= 1
+            if chunk.remaining:
+                return
+            done = [(item, _Picklable(chunk.values.get(position))) for position, item in enumerate(chunk.items)
+                    if position not in chunk.errors]
+            failures = [(chunk.items[position], error) for position, error in sorted(chunk.errors.items())]
+            report('chunk', chunk.id, done, failures)
+
+    def run(session, task):
+        chunk, position, item = task
+        finished(chunk, position, func(context, session, item))
+
+    def failed(task, error):
+        finished(task[0], task[1], error = _Describe(error))
+
+    #the items of each chunk as it is taken off the task queue, until the parent sends None
+    def stream():
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            chunk = _Chunk(*task)
+            results.put(('take', index, chunk.id))
+            for position, item in enumerate(chunk.items):
+                yield chunk, position, item
+
+    runner = BulkRunner(pool, run, on_error = failed, limiter = limiter, bucket = bucket, **options)
+    try:
+        runner.Run(stream())
+    finally:
+        pool.Close()
+        #latencies of the last items are recorded after their chunk was reported
+        with lock:
+            report('stats')
+        results.put(('exit', index))
@@ -0,0 +1,307 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+from lf_cache import LFCallCache
+
+#Persistent cache of the results of read-only calls for jobs that rebuild the same snapshots on every run
+#(see LFWrapper.EnablePersistentCache). .NET objects can not outlive the process, so what is stored is the
+#projection of a result: a dict of its properties, a list of row dicts for readers, or a plain value.
+#Results are kept in a SQLite file keyed by repository and call signature, e.g. Entry.GetEntryInfo(123).
+#A result is fetched again when
+#   - the caller passes a change token (e.g. the entry's LastModified from a folder listing) that differs
+#     from the token stored with it, or
+#   - it is older than max_age seconds
+#so a rerun only goes to the server for what changed. Once the file holds more than max_bytes of results the
+#least recently used are evicted. Writes are committed every commit_every results and on Flush / Close; hits
+#only note the time of the access in memory, which is written with the next commit.
+#   store = LF.EnablePersistentCache('report.db', 'server/repo')
+#   for id, modified in listing:
+#       row = store.Call(LF.Entry.GetEntryInfo, id, sess, columns = ['Id', 'Name', 'LastModified'], token = modified)
+#   users = store.Call(LF.Account.EnumUsers, sess, columns = ['Id', 'Name'], max_age = 86400)
+#Inspect or purge a cache file from the command line: python lf_store.py report.db stats|list|show|purge|vacuum
+class LFResultStore:
+    def __init__(self, file_path, repository = '', max_bytes = 256 * 1024 * 1024, commit_every = 100,
+                 clock = time.time):
+        if sqlite3 is None:
+            raise Exception('sqlite3 is not available on this interpreter')
+        self.file_path = file_path
+        self.repository = repository
+        self.max_bytes = max_bytes
+        self.commit_every = commit_every
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(file_path, check_same_thread = False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS results (repository TEXT NOT NULL, key TEXT NOT NULL, '
+                         'token TEXT, data TEXT NOT NULL, size INTEGER NOT NULL, stored REAL NOT NULL, '
+                         'accessed REAL NOT NULL, PRIMARY KEY (repository, key))')
+        self._db.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        self._db.commit()
+        self._bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        self._pending = 0
+        #key -> time of the last hit, not written yet
+        self._touched = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def _Commit(self, force = False):
+        self._pending += 1
+        if force or self._pending >= self.commit_every:
+            self._WriteTouched()
+            self._db.commit()
+            self._pending = 0
+
+    #record the access times of the hits since the last commit
+    def _WriteTouched(self):
+        if self._touched:
+            self._db.executemany('UPDATE results SET accessed = ? WHERE repository = ? AND key = ?',
+                                 [(accessed, self.repository, key) for key, accessed in self._touched.items()])
+            self._touched = {}
+
+    #the stored result for key, or (False, None) when there is none or it is stale
+    def Get(self, key, token = None, max_age = None):
+        token = None if token is None else str(token)
+        with self._lock:
+            row = self._db.execute('SELECT token, data, stored FROM results WHERE repository = ? AND key = ?',
+                                   (self.repository, key)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            if token is not None and row[0] != token:
+                self.stale += 1
+                return False, None
+            if max_age is not None and row[2] + max_age <= self._clock():
+                self.expired += 1
+                return False, None
+            self._touched[key] = self._clock()
+            self.hits += 1
+            return True, json.loads(row[1])
+
+    #store data under key, unless it alone is larger than max_bytes
+    def Put(self, key, data, token = None):
+        self._Put(key, _Dump(data), token)
+
+    def _Put(self, key, text, token):
+        if self.max_bytes is not None and len(text) > self.max_bytes:
+            return
+        now = self._clock()
+        with self._lock:
+            self._touched.pop(key, None)
+            row = self._db.execute('SELECT size FROM results WHERE repository = ? AND key = ?',
+                                   (self.repository, key)).fetchone()
+            self._db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             (self.repository, key, None if token is None else str(token), text, len(text), now, now))
+            self._bytes += len(text) - (row[0] if row else 0)
+            if self.max_bytes is not None and self._bytes > self.max_bytes:
+                self._Evict(self.max_bytes * 0.9)
+            self._Commit()
+
+    #drop the least recently used results until at most target bytes are left
+    def _Evict(self, target):
+        self._WriteTouched()
+        rows = self._db.execute('SELECT repository, key, size FROM results ORDER BY accessed')
+        doomed = []
+        for repository, key, size in rows:
+            if self._bytes <= target:
+                break
+            doomed.append((repository, key))
+            self._bytes -= size
+        self._db.executemany('DELETE FROM results WHERE repository = ? AND key = ?', doomed)
+        self.evicted += len(doomed)
+
+    #the stored result for key, or fetch() stored under token when there is none or it is stale.
+    #A fetched result is handed back as it will be read from the file (e.g. dates as strings), so the first
+    #run and later runs see the same types
+    def Fetch(self, key, fetch, token = None, max_age = None):
+        found, data = self.Get(key, token, max_age)
+        if found:
+            return data
+        text = _Dump(fetch())
+        self._Put(key, text, token)
+        return json.loads(text)
+
+    #call a read-only wrapped method through the cache and return the projection of its result
+    #   columns - property names to keep (every readable property when None)
+    #   key     - cache key, defaults to the call signature (see CallKey)
+    def Call(self, call, *args, **kwargs):
+        columns = kwargs.get('columns')
+        key = kwargs.get('key') or CallKey(call, args)
+        return self.Fetch(key, lambda: Project(call(*args), columns), kwargs.get('token'), kwargs.get('max_age'))
+
+    def Invalidate(self, key):
+        with self._lock:
+            row = self._db.execute('SELECT size FROM results WHERE repository = ? AND key = ?',
+                                   (self.repository, key)).fetchone()
+            self._touched.pop(key, None)
+            if row is not None:
+                self._db.execute('DELETE FROM results WHERE repository = ? AND key = ?', (self.repository, key))
+                self._bytes -= row[0]
+                self._Commit()
+
+    #delete results, optionally only those of one repository, with keys starting with prefix or stored more
+    #than older_than seconds ago. Returns the number deleted
+    def Purge(self, repository = None, prefix = None, older_than = None):
+        where, params = _Filter(repository, prefix, older_than, self._clock)
+        with self._lock:
+            self._WriteTouched()
+            deleted = self._db.execute('DELETE FROM results' + where, params).rowcount
+            self._db.commit()
+            self._pending = 0
+            self._bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        return deleted
+
+    def Flush(self):
+        with self._lock:
+            self._WriteTouched()
+            self._db.commit()
+            self._pending = 0
+
+    def Close(self):
+        with self._lock:
+            if self._db is not None:
+                self._WriteTouched()
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+    def Stats(self):
+        lookups = self.hits + self.misses + self.stale + self.expired
+        return {
+            'rows': len(self),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0
+        }
+
+def _Dump(data):
+    return json.dumps(data, default = str, sort_keys = True)
+
+#WHERE clause and parameters selecting results by repository, key prefix and age
+def _Filter(repository, prefix, older_than, clock = time.time):
+    clauses, params = [], []
+    if repository is not None:
+        clauses.append('repository = ?')
+        params.append(repository)
+    if prefix:
+        clauses.append("key LIKE ? ESCAPE '\\'")
+        params.append(prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+    if older_than is not None:
+        clauses.append('stored < ?')
+        params.append(clock() - older_than)
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+#type names of the sessions passed to calls, which are left out of their keys
+SESSION_TYPES = frozenset(['Session'])
+
+#signature of a call made through a wrapper, e.g. Entry.GetEntryInfo(123).
+#Plain arguments are kept as they are and SDK objects by id space and Id (see lf_cache.LFCallCache.ID_SPACES),
+#e.g. Entry:42 for a FolderInfo. Sessions are left out; any other object without an Id can not be told apart
+#from another of its type, so it raises and the call needs an explicit key
+def CallKey(call, args):
+    keys = [_ArgKey(arg) for arg in args]
+    return '{}({})'.format(call.QualifiedName(), ', '.join(key for key in keys if key is not None))
+
+def _ArgKey(arg):
+    if arg is None or isinstance(arg, (bool, int, long, float, basestring)):
+        return json.dumps(arg)
+    value = arg.Unbox() if hasattr(arg, 'Unbox') else arg
+    type_name = value.GetType().Name if hasattr(value, 'GetType') else type(value).__name__
+    if type_name in SESSION_TYPES:
+        return None
+    if hasattr(arg, 'HasProperty') and arg.HasProperty('Id'):
+        return '{}:{}'.format(LFCallCache.ID_SPACES.get(type_name, type_name), arg.Id)
+    raise Exception('A {} argument has no Id to key the call by, pass key to Call'.format(type_name))
+
+#plain data for a wrapped result: a dict of properties, a list of row dicts for an SDK reader, or the value
+def Project(value, columns = None):
+    if not hasattr(value, 'ToDict'):
+        return value
+    if value.HasProperty('Item'):
+        if columns is not None:
+            return list(value.Rows(columns))
+        return [row.ToDict() for row in value.Rows()]
+    return value.ToDict(columns)
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or purge a persistent result cache file')
+    parser.add_argument('file', help='Cache file written by LFResultStore / LFWrapper.EnablePersistentCache')
+    parser.add_argument('command', choices=['stats', 'list', 'show', 'purge', 'vacuum'],
+                        help='stats: size per repository, list: cached keys, show: one result, '
+                             'purge: delete results, vacuum: give freed space back to the OS')
+    parser.add_argument('key', nargs='?', help='Key to show')
+    parser.add_argument('-r', '--repository', type=str, default=None,
+                        help='Only results of this repository')
+    parser.add_argument('-p', '--prefix', type=str, default=None,
+                        help='Only keys starting with this, e.g. Entry.GetEntryInfo')
+    parser.add_argument('--older-than', type=float, default=None,
+                        help='Only results stored more than this many days ago')
+    parser.add_argument('-n', '--limit', type=int, default=100,
+                        help='Maximum number of keys listed')
+    parser.add_argument('--all', action='store_true',
+                        help='Allow purge without a filter, deleting every result')
+    args = parser.parse_args()
+    #opening a missing file would create an empty cache instead of reporting the mistyped path
+    if not os.path.isfile(args.file):
+        parser.error('{} does not exist'.format(args.file))
+
+    older_than = args.older_than * 86400 if args.older_than is not None else None
+    if args.command == 'purge':
+        if args.repository is None and args.prefix is None and older_than is None and not args.all:
+            parser.error('purge needs --repository, --prefix, --older-than or --all')
+        store = LFResultStore(args.file)
+        print 'Deleted {} results'.format(store.Purge(args.repository, args.prefix, older_than))
+        store.Close()
+        return
+
+    db = sqlite3.connect(args.file)
+    where, params = _Filter(args.repository, args.prefix, older_than)
+    if args.command == 'stats':
+        rows = db.execute('SELECT repository, COUNT(*), SUM(size), MIN(stored), MAX(accessed) FROM results' + where +
+                          ' GROUP BY repository ORDER BY repository', params).fetchall()
+        print '{:<30} {:>10} {:>12}  {:<19}  {:<19}'.format('repository', 'results', 'bytes', 'oldest', 'last used')
+        for repository, count, size, oldest, used in rows:
+            print '{:<30} {:>10} {:>12}  {:<19}  {:<19}'.format(repository or '-', count, size, _Time(oldest), _Time(used))
+    elif args.command == 'list':
+        for repository, key, token, size, stored in db.execute(
+                'SELECT repository, key, token, size, stored FROM results' + where + ' ORDER BY repository, key LIMIT ?',
+                params + [args.limit]):
+            print '{}  {}  {}  token={}  {}b'.format(_Time(stored), repository or '-', key, token, size)
+    elif args.command == 'show':
+        if args.key is None:
+            parser.error('show needs a key')
+        clauses = where + (' AND' if where else ' WHERE') + ' key = ?'
+        for repository, token, data in db.execute('SELECT repository, token, data FROM results' + clauses,
+                                                  params + [args.key]):
+            print '{} token={}'.format(repository or '-', token)
+            print json.dumps(json.loads(data), indent = 1, sort_keys = True)
+    elif args.command == 'vacuum':
+        db.execute('VACUUM')
+        print 'Vacuumed {}'.format(args.file)
+    db.close()
+
+def _Time(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)) if timestamp else '-'
+
+if __name__ == '__main__':
+    main()
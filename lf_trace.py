@@ -0,0 +1,179 @@
+import json
+import sys
+import threading
+import time
+
+PHASES = ('marshal', 'resolve', 'invoke', 'wrap', 'total')
+
+#HDR style latency histogram of integer values (microseconds).
+#Values below sub_buckets are counted exactly. Larger values fall into buckets that split every power of two
+#into sub_buckets / 2 linear steps, so any recorded value is reported within 2 / sub_buckets of its true
+#value while the histogram stays small for any range of values.
+class LFHistogram:
+    def __init__(self, sub_buckets = 64):
+        if sub_buckets < 2 or sub_buckets & (sub_buckets - 1):
+            raise ValueError('sub_buckets must be a power of two')
+        self.sub_buckets = sub_buckets
+        self._half = sub_buckets // 2
+        self._bits = sub_buckets.bit_length() - 1
+        self._counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _Index(self, value):
+        if value < self.sub_buckets:
+            return value
+        shift = value.bit_length() - self._bits
+        return self.sub_buckets + (shift - 1) * self._half + (value >> shift) - self._half
+
+    #highest value that falls into the bucket at index
+    def _UpperBound(self, index):
+        if index < self.sub_buckets:
+            return index
+        shift = (index - self.sub_buckets) // self._half + 1
+        sub = (index - self.sub_buckets) % self._half + self._half
+        return ((sub + 1) << shift) - 1
+
+    def Record(self, value):
+        value = max(0, int(value))
+        index = self._Index(value)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def Merge(self, other):
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def Mean(self):
+        return float(self.total) / self.count if self.count else 0.0
+
+    def Percentile(self, p):
+        if not self.count:
+            return 0
+        rank = max(1, int(round(p / 100.0 * self.count)))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(self._UpperBound(index), self.max)
+        return self.max
+
+    def Summary(self):
+        return {
+            'count': self.count,
+            'mean': round(self.Mean(), 1),
+            'min': self.min or 0,
+            'p50': self.Percentile(50),
+            'p90': self.Percentile(90),
+            'p99': self.Percentile(99),
+            'max': self.max or 0
+        }
+
+class _MethodStats:
+    __slots__ = ('count', 'errors', 'phases')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.phases = dict((phase, LFHistogram()) for phase in PHASES)
+
+#Per method call counts and phase timings for calls made through an LFWrapper (see LFWrapper.EnableTracing)
+#   marshal - splitting the arguments into the type key and the boxed .NET argument array
+#   resolve - finding the overload (dispatch cache or reflection)
+#   invoke  - the .NET call itself, including any server round trip
+#   wrap    - wrapping the result
+#All timings are in microseconds.
+class LFTracer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods = {}
+        self.started = time.time()
+        self._reporter = None
+        self._stop = None
+
+    #durations are in seconds. Phases that did not run are passed as None
+    def Record(self, name, marshal, resolve, invoke, wrap, error = False):
+        with self._lock:
+            stats = self._methods.get(name)
+            if stats is None:
+                stats = self._methods[name] = _MethodStats()
+            stats.count += 1
+            if error:
+                stats.errors += 1
+            total = 0.0
+            for phase, duration in (('marshal', marshal), ('resolve', resolve), ('invoke', invoke), ('wrap', wrap)):
+                if duration is not None:
+                    stats.phases[phase].Record(duration * 1000000)
+                    total += duration
+            stats.phases['total'].Record(total * 1000000)
+
+    def Reset(self):
+        with self._lock:
+            self._methods = {}
+            self.started = time.time()
+
+    #JSON serializable copy of the collected stats
+    def Snapshot(self):
+        with self._lock:
+            methods = dict((name, {
+                'count': stats.count,
+                'errors': stats.errors,
+                'phases': dict((phase, histogram.Summary()) for phase, histogram in stats.phases.items())
+            }) for name, stats in self._methods.items())
+        return {'started': self.started, 'elapsed': time.time() - self.started, 'unit': 'us', 'methods': methods}
+
+    def Save(self, file_path):
+        with open(file_path, 'w') as fs:
+            json.dump(self.Snapshot(), fs, indent = 1, sort_keys = True)
+
+    #text table of the busiest methods: call counts, total latency percentiles and the mean of each phase
+    def Report(self, limit = 20):
+        snapshot = self.Snapshot()
+        lines = ['{} methods traced over {:.1f}s (us)'.format(len(snapshot['methods']), snapshot['elapsed']),
+                 '{:<40} {:>8} {:>6} {:>8} {:>8} {:>8} | {:>8} {:>8} {:>8} {:>8}'.format(
+                     'method', 'calls', 'errors', 'p50', 'p99', 'max', 'marshal', 'resolve', 'invoke', 'wrap')]
+        busiest = sorted(snapshot['methods'].items(), key = lambda item: -item[1]['count'])[:limit]
+        for name, stats in busiest:
+            phases = stats['phases']
+            lines.append('{:<40} {:>8} {:>6} {:>8} {:>8} {:>8} | {:>8} {:>8} {:>8} {:>8}'.format(
+                name[:40], stats['count'], stats['errors'], phases['total']['p50'], phases['total']['p99'],
+                phases['total']['max'], phases['marshal']['mean'], phases['resolve']['mean'],
+                phases['invoke']['mean'], phases['wrap']['mean']))
+        return '\n'.join(lines)
+
+    #write Report() to out every interval seconds on a background thread. With reset the stats are cleared
+    #after each report, so every report covers one interval
+    def StartReporting(self, interval = 60, out = None, reset = False):
+        self.StopReporting()
+        out = out or sys.stderr
+        stop = threading.Event()
+
+        def report():
+            while not stop.wait(interval):
+                out.write(self.Report() + '\n')
+                out.flush()
+                if reset:
+                    self.Reset()
+
+        self._stop = stop
+        self._reporter = threading.Thread(target = report)
+        self._reporter.daemon = True
+        self._reporter.start()
+
+    def StopReporting(self):
+        if self._reporter is not None:
+            self._stop.set()
+            self._reporter.join()
+            self._reporter = None
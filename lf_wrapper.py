@@ -1,550 +1,1450 @@
-import sys
-import os
-import functools
-import clr
-
-#Define global vars
-LF = None
-IS_IPY = 'GetClrType' in dir(clr)
-DEBUG = False
-
-# Hack for running pdb under ipy. Local path not automatically added to sys
-if 'pdb' in sys.modules:
-    sys.path.insert(0, os.getcwd())
-    DEBUG = True
-
-# import CLR and environment paths
-clr.AddReference("System")
-clr.AddReference("System.IO")
-clr.AddReference("System.Reflection")
-from System import *
-from System.IO import FileNotFoundException
-from System.Reflection import *
-from environment import Environment
-
-def GetModuleAttr(module, attr):
-    try:
-        return getattr(module, attr)
-    except AttributeError:
-        return None
-
-class LFModuleInstanceWrapper:
-    #accepts an instance of an object
-    #sets a property capturing the properties of that object instance
-    def __init__(self, instance):
-        self._instance = instance
-        self._calling_method = None
-        
-        #this is to handle the possibility of void being passed to the constructor
-        try:
-            self._objProps = self._instance.GetType().GetProperties()
-        except:
-            pass
-
-    #overload to output the object instance and not the wrapper
-    def __repr__ (self):
-        return self._instance.__repr__()
-    
-    #overload the attribute getter
-    #check the internal object properties first, and return a wrapped instance of the result if it is found
-    #otherwise, assume we are calling one of the object's methods, so invoke a helper function to handle that
-    def __getattr__ (self, attr):
-        #TODO add type check to prevent boxing of POCOs
-        for x in range(self._objProps.Length):
-            if self._objProps[x].Name == attr:
-                return LFModuleInstanceWrapper(self._objProps[x].GetValue(self._instance))
-        #if this is one of python's magic methods unbox and pass to the instance
-        if attr.startswith('__'):
-            return getattr(self.Unbox(), attr)
-            #return self.Unbox if IS_IPY else getattr(self.Unbox(), attr)
-        else:
-            self._calling_method = attr
-            return self._Call
-    
-    #overload the attribute setter such it properly handles assigning to .NET properties vs. Python properties
-    def __setattr__(self, name, value):
-        if "_" in name:
-            self.__dict__[name] = value
-        else:
-            for x in range(self._objProps.Length):
-                if self._objProps[x].Name == name:
-                    if hasattr(value, '_instance'):
-                        self._objProps[x].SetValue(self._instance, value._instance)
-                    else:
-                        self._objProps[x].SetValue(self._instance, value)
-    
-    #this method facilitates the conversion of basic .NET objects back to Python objects
-    def Unbox (self):
-        return self._instance
-    
-    #method to call the appropriate overload of the internal object's methods given the provided arguments
-    def _Call (self, *argv):
-        def _checkTypes(method, types):
-            p_enums = [i for i,t in enumerate(types) if t.Name == u'Int32']
-            p_types = [p.ParameterType for p in method.GetParameters()]
-            type_pairs = zip(p_types, types)
-            type_checks = map(lambda (i,e): e[0] == e[1] or i in p_enums and e[0].IsEnum, enumerate(type_pairs))
-            return not False in type_checks
-
-        def _handleEnum(inst_type, method_name, arg_types):
-            #get all methods that match the method name and have the correct parameter count
-            methods = [m for m in inst_type.GetMethods() if m.Name == method_name and m.GetParameters().Length == arg_sig['types'].Length]
-            targets = filter(lambda m: _checkTypes(m, arg_types), methods) 
-            return targets[0] if len(targets) > 0 else None
-
-        if self._calling_method is None:
-            raise KeyError("No method has been specified to be called!")
-        elif self._calling_method == 'Unbox':
-            return self._instance
-        
-        #check arguments and throw exception is there are None references
-        #the wrapper uses the calling arguments types to infer which overload to invoke
-        if None in argv:
-            raise KeyError("Arguments of type 'NoneType' not supported within the wrapper.")
-        
-        try:
-            method_name = self._calling_method
-            inst_type = self._instance.GetType()
-            arg_sig = self._GetArgSignature(argv)
-
-            target_method = inst_type.GetMethod(method_name, arg_sig['types'] if len(arg_sig['types']) > 0 else Type.EmptyTypes)
-            if target_method is None:
-                target_method = _handleEnum(inst_type, method_name, arg_sig['types'])
-                if target_method is None:
-                    raise KeyError("No overload of the provided method exists given the provided argument types!")
-                else:
-                    return LFModuleInstanceWrapper(target_method.Invoke(self._instance, arg_sig['values']))
-            else:
-                #return the retrieved method
-                return LFModuleInstanceWrapper(target_method.Invoke(self._instance, arg_sig['values']))
-        except Exception as e:
-            print e.InnerException
-            raise e
-                
-    def _GetArgSignature(self, args):
-        arg_types = []
-        arg_vals = []
-        for arg in args:
-            if hasattr(arg, '_instance'):
-                arg_types.append(arg._instance.GetType())
-                arg_vals.append(arg._instance)
-            else:
-                arg_types.append(type(arg))
-                arg_vals.append(arg)
-        return {'types': Array[Type](arg_types), 'values': Array[Object](arg_vals)}
-
-class LFModuleWrapper:
-    #method to invoke the proper constructor of the given class given the arguments
-    #returns LFModuleInstanceWrapper object that is constructed with output object instance of the called constructor
-    def _construct (self, argv):
-        if self._module is None:
-            raise KeyError("No class has been provided!")
-        try:
-            arg_sig = self._GetArgSignature(argv)
-            mod_type = self._GetClrType()
-
-            target_constructor = mod_type.GetConstructor(arg_sig['types'] if len(arg_sig['types']) > 0 else Type.EmptyTypes)
-            if target_constructor is None:
-                raise KeyError("No overload of the provided class constructor exists given the provided argument types!")
-            else:
-                #return the retrieved method as an instance of LFModuleInstanceWrapper
-                 return LFModuleInstanceWrapper(target_constructor.Invoke(arg_sig['values']))
-        except Exception as e:
-            print e.InnerException
-            raise e
-        return self
-            
-    #overload to output the module and not the wrapper
-    def __repr__ (self):
-        return self._module.__repr__()
-    
-    #overload the __get__ to handle static properties and methods
-    def __getattr__ (self, attr):
-        self._calling_method = attr
-        #check if the property is an ENUM, Enums return back ints 
-        enum_val = GetModuleAttr(self._module, attr)
-
-        if enum_val == None:
-            raise KeyError("{} is not a valid value for {}".format(attr, self._module))
-        elif type(enum_val) == int:
-            return enum_val 
-        else:
-            return self._Call
-        
-    #overload the __call__ to invoke our wrapper constructor (unless no args are provided, in which case just output the module)
-    def __call__(self, *argv):
-        if argv is None:
-            return self._module
-        return self._construct(argv)
-    
-    #method to call the appropriate overload of the static's methods given the provided arguments
-    def _Call (self, *argv):
-        def _checkTypes(method, types):
-            p_enums = [i for i,t in enumerate(types) if t.Name == u'Int32']
-            p_types = [p.ParameterType for p in method.GetParameters()]
-            type_pairs = zip(p_types, types)
-            type_checks = map(lambda (i,e): e[0] == e[1] or i in p_enums and e[0].IsEnum, enumerate(type_pairs))
-            return not False in type_checks
-
-        def _handleEnum(mod_type, method_name, arg_types):
-            #get all methods that match the method name and have the correct parameter count
-            methods = [m for m in mod_type.GetMethods() if m.Name == method_name and m.GetParameters().Length == arg_sig['types'].Length]
-            targets = filter(lambda m: _checkTypes(m, arg_types), methods) 
-            return targets[0] if len(targets) > 0 else None
-
-        if self._calling_method is None:
-            raise KeyError("No method has been specified to be called!")
-        #check arguments and throw exception is there are None references
-        #the wrapper uses the calling arguments types to infer which overload to invoke
-        if None in argv:
-            raise KeyError("Arguments of type 'NoneType' not supported within the wrapper.")
-
-        try:
-            method_name = self._calling_method
-            arg_sig = self._GetArgSignature(argv)
-            mod_type = self._GetClrType()
-
-            #try and find the appropriate orverloaded method based on the argument type signature
-            target_method = mod_type.GetMethod(method_name, arg_sig['types'] if len(arg_sig['types']) > 0 else Type.EmptyTypes)
-            if target_method is None:
-                target_method = _handleEnum(mod_type, method_name, arg_sig['types'])
-                if target_method is None:
-                    raise KeyError("No overload of the provided method exists given the provided argument types!")
-                else :
-                    return LFModuleInstanceWrapper(target_method.Invoke(self._module, arg_sig['values']))
-            else:
-                #return the retrieved method
-                return LFModuleInstanceWrapper(target_method.Invoke(self._module, arg_sig['values']))
-        except Exception as e:
-            print e.InnerException
-            raise e
-
-    def _GetClrType(self, mod=None, ver=None):
-        #if args are not passed pull from the instance
-        mod = self._module if mod == None else mod
-        ver = self._version if ver == None else ver
-
-        #if running in ipy use the built in lib
-        if IS_IPY:
-            return clr.GetClrType(mod)
-        else:
-            class_name = mod.__module__ + '.' + mod.__name__
-            namespace = mod.__module__
-            #hack to handle ClientAutomation library
-            if namespace.lower() == 'laserfiche.clientautomation':
-                namespace = 'ClientAutomation'
-
-            qual_name = r'{}, {}, Version={}.0.0, Culture=neutral'.format(
-                class_name, namespace, ver
-            )
-            return Type.GetType(qual_name)
-
-    #accepts a namespace or class
-    def __init__(self, module, ver):
-        self._module = module
-        self._version = ver
-
-    def _GetArgSignature(self, args):
-        arg_types = []
-        arg_vals = []
-        for arg in args:
-            if hasattr(arg, '_instance'):
-                arg_types.append(arg._instance.GetType())
-                arg_vals.append(arg._instance)
-            else:
-                arg_types.append(type(arg))
-                arg_vals.append(arg)
-        #box arrays into .NET types for IronPython support
-        return {'types': Array[Type](arg_types), 'values': Array[Object](arg_vals)}
-
-# Define an instance of the LF ClR. Valid Args are:
-# target = <SDK Target>.  Valid options are:
-#       
-class LFWrapper:
-    def __init__(self, argv = None):
-        '''
-        args:
-           RepositoryAccess - An object which maps version to a dll on the local disk
-           LFSOPaths: An object that maps version numbers to a dll on the local disk
-        '''
-        def initialize_module_store(paths, val = None):
-            output = { }
-            for key in paths:
-                output[key] = val 
-            return output
-
-        self._args = argv if argv else Environment()
-        self._lf_credentials = self._args.LaserficheConnection
-        self._loaded_modules = { 
-            'LFSO': initialize_module_store(self._args.LFSO_Paths, { }),
-            'DocumentProcessor': initialize_module_store(self._args.DocumentProcessor_Paths, { }),
-            'RepositoryAccess': initialize_module_store(self._args.RepositoryAccess_Paths, { })
-        }
-        self._sdk = None
-        self._lf_session = None
-        self._db = None
-
-    def __repr__(self):
-        return 'LF SDK Wrapper'
-
-    # try to pull a target attribute from RA. Search order is DocumentService, ClientAutomation, RepositoryAccess, SecurityTokenService
-    def _get_fromRA(self, module, attr, ver):
-        ns_search_list = ['DocumentService', 'ClientAutomation', 'RepositoryAccess', 'SecurityToken']
-        namespaces = [ns for ns in map(lambda n: GetModuleAttr(module, n), ns_search_list) if ns != None]
-        for ns in namespaces:
-            target = GetModuleAttr(ns, attr)
-            if target != None:
-                return LFModuleWrapper(target, ver)
-            else:
-                continue
-        #if no match is found raise an exception
-        raise KeyError('Command not found')
-
-    # LFSOd does not have namespacing infront of the methods.  We can check the module dir directly and return
-    def _get_fromCOM(self, module, attr):
-        for mod in module.keys():
-            namespaces = dir(module[mod])
-            if attr in namespaces:
-                return LFModuleWrapper(getattr(module[mod], attr))
-        raise KeyError('Command not found')
-
-    # this is used to overload the property operator for the LFWrapper object
-    # it will allow short cut access to SDK objects through the wrapper without having to go through
-    # the namespaces or import specific functions from the module.
-    def __getattr__(self, attr):
-        if self._sdk == None:
-            raise Exception('SDK is not loaded')
-        else:
-            type = self._sdk['type']
-            module = self._sdk['module']
-            version = self._sdk['version']
-            return self._get_fromRA(module, attr, version) if type == 'RA' else self._get_fromCOM(module, attr)
-    
-    def Connect(self, **kwargs):
-        #helper functions to connect to either LFSO or RA
-        def ConnectRA(server, database, username, password):
-            if self._lf_session == None:
-                if username:
-                    credentials = (server, database, username, password)
-                else:
-                    credentials = (server, database)
-            else:
-                raise Exception('Please load a version of the SDK')
-            
-            self._lf_session = self.Session.Create(*credentials)
-            return self._lf_session
-
-        def ConnectLfso(server, database, username, password):
-            if self._db == None:
-                credentials = (database, server, username, password)
-                app = self.LFApplicationClass()
-                self._db = app.ConnectToDatabase(*credentials)
-            return self._db
-        
-        def GetDefaultCred(key, arg_list):
-            try:
-                return arg_list[key]
-            except KeyError:
-                return self._lf_credentials[key]
-            
-        #Function Logic Starts here
-        #if args are not given pull from environment.py
-        server = GetDefaultCred('server', kwargs)
-        database = GetDefaultCred('database', kwargs)
-        username = GetDefaultCred('username', kwargs) if not 'server' in kwargs or 'username' in kwargs else ''
-        password = GetDefaultCred('password', kwargs) if not 'server' in kwargs or 'password' in kwargs else ''
-        creds = (server, database, username, password)
-
-        sdk_loaded = self._sdk != None
-        if sdk_loaded:
-            type = self._sdk['type']
-            return ConnectRA(*creds) if type == 'RA' else ConnectLfso(*creds)
-        else:
-            raise Exception('Please load a version of the SDK')
-
-    def Disconnect(self):
-        def DisconnectLfso():
-            try:
-                self._db.CurrentConnection.Terminate()
-            except:
-                print 'Could not close LFSO connection. Please ensure that you have opened one!'
-
-        def DisconnectRA():
-            try:
-                self._lf_session.Close()
-            except Exception as e:
-                print e
-                print 'Could not close RA session. Please ensure that you have opened one!'
-
-        sdk_loaded = self._sdk != None
-        if sdk_loaded:
-            type = self._sdk['type']
-            return DisconnectRA() if type == 'RA' else DisconnectLfso()
-        else:
-            raise Exception('Please load a version of the SDK')
-
-    def GetSession(self):
-        if self._lf_session.value != None:
-            return self._lf_session
-        else:
-            raise Exception('Not logged in!')
-
-    def GetCredentials(self):
-        if self._lf_credentials:
-            return self._lf_credentials
-
-    def LoadCom(self, version, module_name):
-        if module_name == "LFSO":
-            self.LoadLfso(version)
-        elif module_name == "DocumentProcessor":
-            self.LoadDocumentProcessor(version)
-        else:
-            raise Exception('Unsupported COM SDK module')
-    
-    def LoadLfso(self, version):
-        lfso_modules = self._loaded_modules['LFSO']
-        module = None
-        lib_name = None
-        
-        if version in lfso_modules.keys() and lfso_modules[version] != {} : 
-            module = lfso_modules[version]
-        else:
-            try:
-                #get the dll path and library name
-                dll_path = self._args.LFSO_Paths[version]
-                lib_name = 'LFSO{}Lib'.format(version.translate(None, '.'))
-
-                #loads the LFSO reference and add it to the loaded modules list
-                #tries to load from GAC first
-                try:
-                    clr.AddReference("Interop." + lib_name)
-                    module = __import__(lib_name)
-                    lfso_modules[version] = module
-                except:
-                    clr.AddReferenceToFileAndPath(dll_path)
-                    module = __import__(lib_name) 
-                    lfso_modules[version] = module
-            except Exception:
-                print 'Laserfiche Server Object v{} could not be found. Please check your environment.py file'.format(version)
-                
-        #if a module was found set it as the new default
-        if module != None:
-            if self._sdk is None:
-                self._sdk = {'type': 'LFSO', 'module': { 'LFSO': module }} 
-            else:
-               	self._sdk['module']['LFSO'] = module
-        return module
-    
-    def LoadDocumentProcessor(self, version):
-        doc_modules = self._loaded_modules['DocumentProcessor']
-        module = None
-        
-        if version in doc_modules.keys() and doc_modules[version] != {} : 
-            module = doc_modules[version]
-        else:
-            try:
-                #get the dll path and library name
-                dll_path = self._args.DocumentProcessor_Paths[version]
-                lib_name = 'DocumentProcessor'+version.translate(None, '.')
-
-                #loads the DocumentProcessor reference and add it to the loaded modules list
-                #tries to load from GAC first
-                try:
-                    clr.AddReference("Interop." + lib_name)
-                    module = __import__(lib_name)
-                    doc_modules[version] = module
-                except:
-                    clr.AddReferenceToFileAndPath(dll_path)
-                    module = __import__(lib_name) 
-                    doc_modules[version] = module
-            except Exception:
-                print 'DocumentProcessor v{} could not be found. Please check your environment.py file'.format(version)
-
-        #if a module was found set it as the new default
-        if module != None:
-            if self._sdk is None:
-                self._sdk = { type: 'LFSO', 'module': {'DocumentProcessor':  module } }
-            else:
-                self._sdk['module']['DocumentProcessor'] = module
-        
-        return module
-    
-    def LoadRA(self, version, module_name):
-        def load_from_GAC(module_name, version):
-            ra_pk_token = '3f98b3eaee6c16a6'
-            ca_pk_token = '607dd73ee2bd1c00'
-
-            namespace = 'Laserfiche.{}'.format(module_name)
-            version = r'{}.0.0'.format(version)
-            module_name = module_name if module_name.lower() == 'clientautomation' else r'Laserfiche.{}'.format(module_name)
-            token = ca_pk_token if module_name.lower() == 'clientautomation' else ra_pk_token
-            assembly_name = (r'{}, Version={}, Culture=neutral, PublicKeyToken={}'
-                             ).format(module_name, version, token)
-            try:
-                clr.AddReference(assembly_name)
-                return __import__(namespace)
-            except FileNotFoundException:
-                return None 
-
-        def load_from_file(module_name, version):
-            namespace = 'Laserfiche.{}'.format(module_name)
-            dll_path = (r'{}\{}.dll' if module_name == 'ClientAutomation' else r'{}\Laserfiche.{}.dll'
-                        ).format(self._args.RepositoryAccess_Paths[version], module_name)
-            #IronPython uses a differnt method to load from file
-            try:
-                if 'AddReferenceToFileAndPath' in dir(clr):
-                    clr.AddRefernceToFileAndPath(dll_path)
-                else:
-                    clr.AddReference(dll_path)
-                return __import__(namespace)
-            except FileNotFoundException:
-                return None
-
-        ra_modules = self._loaded_modules['RepositoryAccess']
-        module_whitelist = ['RepositoryAccess', 'DocumentServices', 'ClientAutomation'] 
-        module = None
-
-        #Check to see if the module has already been loaded and is in the cache
-        if version in ra_modules.keys() and module_name in ra_modules[version].keys():
-            module = ra_modules[version][module_name]
-        else:
-            try:
-                #try to load the library from the GAC
-                module = load_from_GAC(module_name, version)
-                #if not found in the gac try to load by file path
-                if module == None:
-                    module = load_from_file(module_name, version)
-                #if not found, raise exception and break out
-                if module == None:
-                    raise FileNotFoundException(r'{} v{} could not be found. Please ensure the library is in the gac or your environment.py file'.format(module_name, version))
-                #Add module to the cache
-                self._loaded_modules['RepositoryAccess'][version] = {'type': 'RA', 'module': module, 'version': version}
-            except FileNotFoundException as ex:
-                print ex.Message
-        if module != None:
-            self._sdk = self._loaded_modules['RepositoryAccess'][version] 
-
-        return module
-
-def main() :
-    global LF
-    LF = LFWrapper(Environment())
-
-# run for debugging
-def debug():
-    global LF
-    LF = LFWrapper(Environment())
-    LF.LoadRA('10.2', 'RepositoryAccess')
-    LF.Connect(server = 'localhost', database = 'Dev301', username='admin', password='a')
-
-    sess = LF.GetSession()
-    root = LF.Folder.GetRootFolder(sess)
-    LF.Folder.Create(root, "test", LF.EntryNameOption.AutoRename, sess)
-
-# Run main if not loaded as a module
-if __name__ == '__main__':
-    if DEBUG:
-        debug()
-    else:
-        main()
-
+import sys
+import os
+import atexit
+import functools
+import threading
+import clr
+from collections import OrderedDict
+from Queue import Queue, Empty, Full
+from timeit import default_timer
+
+#Define global vars
+LF = None
+IS_IPY = 'GetClrType' in dir(clr)
+DEBUG = False
+
+# Hack for running pdb under ipy. Local path not automatically added to sys
+if 'pdb' in sys.modules:
+    sys.path.insert(0, os.getcwd())
+    DEBUG = True
+
+# import CLR and environment paths
+clr.AddReference("System")
+clr.AddReference("System.IO")
+clr.AddReference("System.Reflection")
+from System import *
+from System.IO import FileNotFoundException
+from System.Reflection import *
+from environment import Environment
+#the optional features (lf_pool, lf_cache, lf_store, ...) are imported by the methods that enable them, so a
+#script that does not use them does not pay for loading them at start up
+
+def GetModuleAttr(module, attr):
+    try:
+        return getattr(module, attr)
+    except AttributeError:
+        return None
+
+#add a reference to an assembly by name (GAC) or by dll path
+def AddAssemblyReference(reference, from_file = False):
+    if from_file and 'AddReferenceToFileAndPath' in dir(clr):
+        return clr.AddReferenceToFileAndPath(reference)
+    return clr.AddReference(reference)
+
+#size bounded LRU cache of resolved overloads
+#keys are (clr type, method name, argument type tuple) and values are the MethodInfo/ConstructorInfo to invoke
+class LFDispatchCache:
+    _MISSING = object()
+
+    def __init__(self, maxsize = 4096):
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    #returns the cached overload, or LFDispatchCache._MISSING if the key has not been resolved yet
+    def Get(self, key):
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return self._MISSING
+            #reinsert to mark the key as most recently used
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def Put(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last = False)
+
+    def Clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def Stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self._maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0
+        }
+
+#process wide cache shared by every wrapper
+DISPATCH_CACHE = LFDispatchCache()
+
+#builds typed delegates for hot members with System.Linq.Expressions so repeated calls skip
+#MethodInfo.Invoke/PropertyInfo.GetValue. Returns None when the host can not compile expressions
+_EXPRESSIONS = None
+
+def _LoadExpressions():
+    global _EXPRESSIONS
+    if _EXPRESSIONS is None:
+        try:
+            clr.AddReference("System.Core")
+            from System.Linq.Expressions import Expression, ParameterExpression
+            from System import Func
+            _EXPRESSIONS = {'Expression': Expression, 'ParameterExpression': ParameterExpression, 'Func': Func}
+        except Exception:
+            _EXPRESSIONS = {}
+    return _EXPRESSIONS
+
+def CompileClrInvoker(member):
+    expr = _LoadExpressions()
+    if not expr:
+        return None
+    try:
+        Expression = expr['Expression']
+        obj_type = Type.GetType('System.Object')
+        inst = Expression.Parameter(obj_type, 'instance')
+
+        #property getter: (instance) => (object)((T)instance).Prop
+        if hasattr(member, 'GetGetMethod'):
+            body = Expression.Convert(Expression.Property(Expression.Convert(inst, member.DeclaringType), member), obj_type)
+            params = Array[expr['ParameterExpression']]([inst])
+            return Expression.Lambda[expr['Func'][Object, Object]](body, params).Compile()
+
+        #method: (instance, args) => (object)((T)instance).Method((P0)args[0], (P1)args[1], ...)
+        args = Expression.Parameter(Type.GetType('System.Object[]'), 'args')
+        arg_exprs = [Expression.Convert(Expression.ArrayIndex(args, Expression.Constant(i)), p.ParameterType)
+                     for i, p in enumerate(member.GetParameters())]
+        target = None if member.IsStatic else Expression.Convert(inst, member.DeclaringType)
+        call = Expression.Call(target, member, Array[Expression](arg_exprs))
+        if member.ReturnType == Type.GetType('System.Void'):
+            body = Expression.Block(call, Expression.Constant(None, obj_type))
+        else:
+            body = Expression.Convert(call, obj_type)
+        params = Array[expr['ParameterExpression']]([inst, args])
+        compiled = Expression.Lambda[expr['Func'][Object, Array[Object], Object]](body, params).Compile()
+        if member.IsStatic:
+            return lambda instance, values: compiled(None, values)
+        return compiled
+    except Exception:
+        return None
+
+#property setter: (instance, value) => ((T)instance).Prop = (P)value
+def CompileClrSetter(prop):
+    expr = _LoadExpressions()
+    if not expr or not prop.CanWrite:
+        return None
+    try:
+        Expression = expr['Expression']
+        obj_type = Type.GetType('System.Object')
+        inst = Expression.Parameter(obj_type, 'instance')
+        value = Expression.Parameter(obj_type, 'value')
+        assign = Expression.Assign(Expression.Property(Expression.Convert(inst, prop.DeclaringType), prop),
+                                   Expression.Convert(value, prop.PropertyType))
+        body = Expression.Block(assign, Expression.Constant(None, obj_type))
+        params = Array[expr['ParameterExpression']]([inst, value])
+        return Expression.Lambda[expr['Func'][Object, Object, Object]](body, params).Compile()
+    except Exception:
+        return None
+
+#counts calls per member and swaps in a compiled invoker once a member has been called threshold times
+#members that fail to compile keep using reflection
+class LFInvokerCache:
+    _REFLECTIVE = False
+
+    def __init__(self, threshold = 32, compiler = CompileClrInvoker, setter_compiler = CompileClrSetter):
+        self.threshold = threshold
+        self._compiler = compiler
+        self._setter_compiler = setter_compiler
+        self._counts = {}
+        self._invokers = {}
+        self._lock = threading.Lock()
+        self.compiled = 0
+        self.failed = 0
+
+    def _Promote(self, key, member, compiler):
+        with self._lock:
+            invoker = self._invokers.get(key)
+            if invoker is None:
+                invoker = compiler(member) if compiler else None
+                if invoker is None:
+                    invoker = self._REFLECTIVE
+                    self.failed += 1
+                else:
+                    self.compiled += 1
+                self._invokers[key] = invoker
+            return invoker
+
+    #setters are counted and compiled separately from the getter of the same property
+    def _GetInvoker(self, member, setter = False):
+        key = (member, 'set') if setter else member
+        invoker = self._invokers.get(key)
+        if invoker is None:
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+            if self.threshold is not None and count >= self.threshold:
+                invoker = self._Promote(key, member, self._setter_compiler if setter else self._compiler)
+        return invoker
+
+    def Invoke(self, method, instance, values):
+        invoker = self._GetInvoker(method)
+        if invoker:
+            return invoker(instance, values)
+        return method.Invoke(instance, values)
+
+    def GetValue(self, prop, instance):
+        invoker = self._GetInvoker(prop)
+        if invoker:
+            return invoker(instance)
+        return prop.GetValue(instance)
+
+    def SetValue(self, prop, instance, value):
+        invoker = self._GetInvoker(prop, True)
+        if invoker:
+            invoker(instance, value)
+        else:
+            prop.SetValue(instance, value)
+
+    #callables that read/write prop, compiled straight away rather than after threshold calls.
+    #Used by property plans, which are only built for properties about to be mapped in bulk
+    def Getter(self, prop):
+        invoker = self._Promote(prop, prop, self._compiler) if self.threshold is not None else None
+        return invoker or prop.GetValue
+
+    def Setter(self, prop):
+        invoker = self._Promote((prop, 'set'), prop, self._setter_compiler) if self.threshold is not None else None
+        return invoker or prop.SetValue
+
+    def Clear(self):
+        with self._lock:
+            self._counts.clear()
+            self._invokers.clear()
+            self.compiled = 0
+            self.failed = 0
+
+    def Stats(self):
+        return {'threshold': self.threshold, 'compiled': self.compiled, 'failed': self.failed}
+
+#process wide invoker cache. Set INVOKER_CACHE.threshold = None to always use reflection
+INVOKER_CACHE = LFInvokerCache()
+
+#process wide index of CLR type -> {property name: PropertyInfo}
+#built once per type and shared by every wrapper of that type. When a name appears more than once (e.g. a
+#property hidden by a derived class) the first one GetProperties returns is kept, as a linear search would
+_PROPERTY_MAPS = {}
+_PROPERTY_MAPS_LOCK = threading.Lock()
+
+def GetPropertyMap(clr_type):
+    props = _PROPERTY_MAPS.get(clr_type)
+    if props is None:
+        props = {}
+        for p in clr_type.GetProperties():
+            if p.Name not in props:
+                props[p.Name] = p
+        with _PROPERTY_MAPS_LOCK:
+            props = _PROPERTY_MAPS.setdefault(clr_type, props)
+    return props
+
+#process wide index of CLR type -> names of its methods
+_METHOD_NAMES = {}
+
+def GetMethodNames(clr_type):
+    names = _METHOD_NAMES.get(clr_type)
+    if names is None:
+        names = _METHOD_NAMES[clr_type] = frozenset(m.Name for m in clr_type.GetMethods())
+    return names
+
+#Resolved getters and setters for a fixed set of properties of one CLR type, so mapping a whole record to or
+#from a dict is a single pass over prepared callables (see ToDict / FromDict). Built once per type and
+#set of names and shared by every wrapper
+class LFPropertyPlan(object):
+    __slots__ = ('clr_type', 'names', '_getters', '_setters')
+
+    def __init__(self, clr_type, names):
+        props = GetPropertyMap(clr_type)
+        missing = [name for name in names if name not in props]
+        if missing:
+            raise KeyError('{} has no properties {}'.format(clr_type.Name, ', '.join(missing)))
+        self.clr_type = clr_type
+        self.names = tuple(names)
+        self._getters = None
+        self._setters = None
+
+    #getters and setters are prepared separately, since many properties are read only
+    def _Getters(self):
+        if self._getters is None:
+            props = GetPropertyMap(self.clr_type)
+            self._getters = [(name, INVOKER_CACHE.Getter(props[name])) for name in self.names]
+        return self._getters
+
+    def _Setters(self):
+        if self._setters is None:
+            props = GetPropertyMap(self.clr_type)
+            self._setters = [(name, INVOKER_CACHE.Setter(props[name])) for name in self.names]
+        return self._setters
+
+    def Read(self, instance, owner = None):
+        return dict((name, Wrap(get(instance), owner)) for name, get in self._Getters())
+
+    def Write(self, instance, data):
+        for name, set in self._Setters():
+            set(instance, Unbox(data[name]))
+
+_PROPERTY_PLANS = {}
+_PROPERTY_PLANS_LOCK = threading.Lock()
+
+#the plan for names (all readable properties when None) of clr_type
+def GetPropertyPlan(clr_type, names = None):
+    if names is None:
+        names = sorted(name for name, prop in GetPropertyMap(clr_type).items() if getattr(prop, 'CanRead', True))
+    key = (clr_type, tuple(names))
+    plan = _PROPERTY_PLANS.get(key)
+    if plan is None:
+        plan = LFPropertyPlan(clr_type, key[1])
+        with _PROPERTY_PLANS_LOCK:
+            plan = _PROPERTY_PLANS.setdefault(key, plan)
+    return plan
+
+#compares the parameter types of a method to the calling argument types
+#Int32 arguments are allowed to match enum parameters since the wrapper hands enums back as ints
+def _checkTypes(method, types):
+    p_enums = [i for i,t in enumerate(types) if t.Name == u'Int32']
+    p_types = [p.ParameterType for p in method.GetParameters()]
+    type_pairs = zip(p_types, types)
+    type_checks = map(lambda (i,e): e[0] == e[1] or i in p_enums and e[0].IsEnum, enumerate(type_pairs))
+    return not False in type_checks
+
+#get all methods that match the method name and have the correct parameter count and pick the first compatible one
+def _handleEnum(clr_type, method_name, arg_types):
+    methods = [m for m in clr_type.GetMethods() if m.Name == method_name and m.GetParameters().Length == arg_types.Length]
+    targets = filter(lambda m: _checkTypes(m, arg_types), methods)
+    return targets[0] if len(targets) > 0 else None
+
+#find the overload of method_name on clr_type that accepts the given argument types
+#results (including misses and enum coerced matches) are stored in DISPATCH_CACHE
+def ResolveMethod(clr_type, method_name, arg_key):
+    key = (clr_type, method_name, arg_key)
+    target_method = DISPATCH_CACHE.Get(key)
+    if target_method is LFDispatchCache._MISSING:
+        arg_types = Array[Type](arg_key) if len(arg_key) > 0 else Type.EmptyTypes
+        target_method = clr_type.GetMethod(method_name, arg_types)
+        if target_method is None:
+            target_method = _handleEnum(clr_type, method_name, arg_types)
+        DISPATCH_CACHE.Put(key, target_method)
+    return target_method
+
+#find the constructor of clr_type that accepts the given argument types
+def ResolveConstructor(clr_type, arg_key):
+    key = (clr_type, '.ctor', arg_key)
+    target_constructor = DISPATCH_CACHE.Get(key)
+    if target_constructor is LFDispatchCache._MISSING:
+        target_constructor = clr_type.GetConstructor(Array[Type](arg_key) if len(arg_key) > 0 else Type.EmptyTypes)
+        DISPATCH_CACHE.Put(key, target_constructor)
+    return target_constructor
+
+#splits the calling arguments into a hashable tuple of types (used to pick the overload) and the boxed values
+def GetArgSignature(args):
+    arg_types = []
+    arg_vals = []
+    for arg in args:
+        if hasattr(arg, '_instance'):
+            arg_types.append(arg._instance.GetType())
+            arg_vals.append(arg._instance)
+        else:
+            arg_types.append(type(arg))
+            arg_vals.append(arg)
+    #box arrays into .NET types for IronPython support
+    return {'key': tuple(arg_types), 'values': Array[Object](arg_vals)}
+
+#the body of the wrappers' _Invoke and _construct with each phase timed into tracer under name
+#resolve(arg_key) returns the method or constructor for the argument types, invoke(method, values) calls it
+def TracedInvoke(tracer, name, resolve_method, invoke_method, argv, owner):
+    marshal = resolve = invoke = None
+    try:
+        start = default_timer()
+        arg_sig = GetArgSignature(argv)
+        resolved = default_timer()
+        marshal = resolved - start
+        target_method = resolve_method(arg_sig['key'])
+        invoked = default_timer()
+        resolve = invoked - resolved
+        result = invoke_method(target_method, arg_sig['values'])
+        wrapped = default_timer()
+        invoke = wrapped - invoked
+        result = Wrap(result, owner)
+    except:
+        tracer.Record(name, marshal, resolve, invoke, None, True)
+        raise
+    tracer.Record(name, marshal, resolve, invoke, default_timer() - wrapped)
+    return result
+
+#a property read timed into tracer under name: invoke is the getter, wrap the wrapping of its value
+def TracedGetValue(tracer, name, prop, instance, owner):
+    invoke = None
+    try:
+        start = default_timer()
+        value = INVOKER_CACHE.GetValue(prop, instance)
+        wrapped = default_timer()
+        invoke = wrapped - start
+        value = Wrap(value, owner)
+    except:
+        tracer.Record(name, None, None, invoke, None, True)
+        raise
+    tracer.Record(name, None, None, invoke, default_timer() - wrapped)
+    return value
+
+#a property assignment timed into tracer under name: marshal is unboxing the value, invoke the setter
+def TracedSetValue(tracer, name, prop, instance, value):
+    marshal = None
+    try:
+        start = default_timer()
+        value = Unbox(value)
+        unboxed = default_timer()
+        marshal = unboxed - start
+        INVOKER_CACHE.SetValue(prop, instance, value)
+    except:
+        tracer.Record(name, marshal, None, None, None, True)
+        raise
+    tracer.Record(name, marshal, None, default_timer() - unboxed, None)
+
+#python values that are handed back as is instead of being wrapped
+_PASSTHROUGH_TYPES = (bool, int, long, float, basestring)
+
+#wraps the result of an SDK call. None, primitives and strings are returned unwrapped
+#owner is the LFWrapper the call was made through, if any
+def Wrap(value, owner = None):
+    if value is None or isinstance(value, _PASSTHROUGH_TYPES):
+        return value
+    return LFModuleInstanceWrapper(value, owner)
+
+#returns the underlying .NET object of a wrapped value, anything else is returned as is
+def Unbox(value):
+    return value._instance if isinstance(value, LFModuleInstanceWrapper) else value
+
+#whether error is the SDK's ObjectNotFoundException, raised by a compiled call or as the inner exception of the
+#TargetInvocationException of a reflected one. IronPython keeps the .NET exception in clsException
+def IsNotFound(error):
+    error = getattr(error, 'clsException', error)
+    inner = getattr(error, 'InnerException', None)
+    if inner is not None:
+        error = inner
+    get_type = getattr(error, 'GetType', None)
+    return (get_type().Name if get_type is not None else type(error).__name__) == 'ObjectNotFoundException'
+
+#what attribute access returns for a method of a wrapped object or class.
+#It carries the method name, so the wrappers themselves hold no per call state and can be shared between threads
+class LFBoundCall(object):
+    __slots__ = ('_target', 'method_name')
+
+    def __init__(self, target, method_name):
+        self._target = target
+        self.method_name = method_name
+
+    def __repr__(self):
+        return '<bound method {} of {!r}>'.format(self.method_name, self._target)
+
+    #Class.Method, e.g. Entry.GetEntryInfo for a static call or EntryInfo.Save for an instance call
+    def QualifiedName(self):
+        return '{}.{}'.format(self._target._TypeName(), self.method_name)
+
+    def __call__(self, *argv):
+        #check arguments and throw exception is there are None references
+        #the wrapper uses the calling arguments types to infer which overload to invoke
+        if None in argv:
+            raise KeyError("Arguments of type 'NoneType' not supported within the wrapper.")
+        return self._target._Call(self, argv)
+
+    #the overload of clr_type for the argument types in arg_key, looked up through DISPATCH_CACHE
+    def Resolve(self, clr_type, arg_key):
+        method = ResolveMethod(clr_type, self.method_name, arg_key)
+        if method is None:
+            raise KeyError("No overload of the provided method exists given the provided argument types!")
+        return method
+
+class LFModuleInstanceWrapper(object):
+    __slots__ = ('_instance', '_objProps', '_owner')
+
+    #accepts an instance of an object
+    #the property map of the object's type is looked up lazily from the shared per type index
+    def __init__(self, instance, owner = None):
+        self._instance = instance
+        self._objProps = None
+        self._owner = owner
+
+    def _Props(self):
+        props = self._objProps
+        if props is None:
+            #this is to handle the possibility of void being passed to the constructor
+            try:
+                props = GetPropertyMap(self._instance.GetType())
+            except:
+                props = {}
+            self._objProps = props
+        return props
+
+    def _TypeName(self):
+        return type(self._instance).__name__
+
+    #overload to output the object instance and not the wrapper
+    def __repr__ (self):
+        return self._instance.__repr__()
+
+    #new style classes do not route python's magic methods through __getattr__, so forward the common ones
+    def __str__ (self):
+        return str(self._instance)
+
+    def __iter__ (self):
+        return iter(self._instance)
+
+    def __len__ (self):
+        return len(self._instance)
+
+    def __getitem__ (self, key):
+        return self._instance[key]
+
+    def __contains__ (self, item):
+        return Unbox(item) in self._instance
+
+    def __nonzero__ (self):
+        return bool(self._instance)
+
+    def __eq__ (self, other):
+        return self._instance == Unbox(other)
+
+    def __ne__ (self, other):
+        return not self.__eq__(other)
+
+    def __hash__ (self):
+        return hash(self._instance)
+    
+    #overload the attribute getter
+    #check the internal object properties first, and return the (wrapped if needed) result if it is found
+    #otherwise, assume we are calling one of the object's methods, so invoke a helper function to handle that
+    def __getattr__ (self, attr):
+        prop = self._Props().get(attr)
+        if prop is not None:
+            tracer = self._owner._tracer if self._owner is not None else None
+            if tracer is not None:
+                return TracedGetValue(tracer, '{}.{} [get]'.format(self._TypeName(), attr), prop, self._instance,
+                                      self._owner)
+            return Wrap(INVOKER_CACHE.GetValue(prop, self._instance), self._owner)
+        #if this is one of python's magic methods unbox and pass to the instance
+        if attr.startswith('__'):
+            return getattr(self.Unbox(), attr)
+            #return self.Unbox if IS_IPY else getattr(self.Unbox(), attr)
+        else:
+            return LFBoundCall(self, attr)
+    
+    #overload the attribute setter such it properly handles assigning to .NET properties vs. Python properties
+    def __setattr__(self, name, value):
+        if "_" in name:
+            object.__setattr__(self, name, value)
+        else:
+            prop = self._Props().get(name)
+            if prop is not None:
+                tracer = self._owner._tracer if self._owner is not None else None
+                if tracer is not None:
+                    TracedSetValue(tracer, '{}.{} [set]'.format(self._TypeName(), name), prop, self._instance, value)
+                else:
+                    INVOKER_CACHE.SetValue(prop, self._instance, Unbox(value))
+    
+    #this method facilitates the conversion of basic .NET objects back to Python objects
+    def Unbox (self):
+        return self._instance
+
+    #whether the wrapped object has a property called name
+    def HasProperty (self, name):
+        return name in self._Props()
+
+    #iterate an SDK reader (any object with Read() and Item, e.g. the result of Account.EnumUsers)
+    #see LFReader for the arguments
+    def Rows (self, columns = None, prefetch = 0):
+        return LFReader(self, columns, prefetch)
+
+    #the values of the named properties (every readable property when None) as a dict
+    def ToDict (self, names = None):
+        return GetPropertyPlan(self._instance.GetType(), names).Read(self._instance, self._owner)
+
+    #assign the properties named by the keys of data (or only names, when given) and return the wrapper.
+    #Properties are assigned in the order of names; without names that is the order of data's keys, so pass
+    #names (or an OrderedDict) when one property has to be set before the others
+    #   user = LF.UserInfo().FromDict({'Session': sess, 'Name': name, 'Password': password}, ('Session', 'Name', 'Password'))
+    def FromDict (self, data, names = None):
+        names = names if names is not None else tuple(data)
+        GetPropertyPlan(self._instance.GetType(), names).Write(self._instance, data)
+        return self
+    
+    #method to call the appropriate overload of the internal object's methods given the provided arguments
+    #call is the LFBoundCall of the method
+    def _Call (self, call, argv):
+        if self._owner is not None:
+            return self._owner._InstanceCall(self, call, argv)
+        return self._Invoke(call, argv)
+
+    def _Invoke (self, call, argv):
+        tracer = self._owner._tracer if self._owner is not None else None
+        try:
+            if tracer is not None:
+                instance = self._instance
+                return TracedInvoke(tracer, call.QualifiedName(),
+                                    lambda arg_key: call.Resolve(instance.GetType(), arg_key),
+                                    lambda method, values: INVOKER_CACHE.Invoke(method, instance, values),
+                                    argv, self._owner)
+            arg_sig = GetArgSignature(argv)
+            target_method = call.Resolve(self._instance.GetType(), arg_sig['key'])
+            return Wrap(INVOKER_CACHE.Invoke(target_method, self._instance, arg_sig['values']), self._owner)
+        except Exception as e:
+            #.NET exceptions raised through reflection carry the real error as the inner exception
+            if getattr(e, 'InnerException', None) is not None:
+                print e.InnerException
+            raise
+
+#wrapper handed out for a result of the call cache (see lf_cache.LFCallCache). Property reads go to the cached
+#object, which other callers share; the first method call or property assignment replaces it with an object of
+#this wrapper's own, read again with reload, so edits never reach the cached object
+class LFCachedInstanceWrapper(LFModuleInstanceWrapper):
+    __slots__ = ('_reload',)
+
+    def __init__(self, instance, owner, reload):
+        LFModuleInstanceWrapper.__init__(self, instance, owner)
+        self._reload = reload
+
+    def _Own(self):
+        reload = self._reload
+        if reload is not None:
+            self._reload = None
+            self._instance = Unbox(reload())
+            self._objProps = None
+
+    def __setattr__(self, name, value):
+        if "_" not in name:
+            self._Own()
+        LFModuleInstanceWrapper.__setattr__(self, name, value)
+
+    def FromDict (self, data, names = None):
+        self._Own()
+        return LFModuleInstanceWrapper.FromDict(self, data, names)
+
+    def _Call (self, call, argv):
+        self._Own()
+        return LFModuleInstanceWrapper._Call(self, call, argv)
+
+#a caller's own LFCachedInstanceWrapper of a cached wrapped result
+def ShareCached(result, reload):
+    return LFCachedInstanceWrapper(result._instance, result._owner, reload)
+
+#python iterator over SDK reader objects. Each step calls Read() and yields the current Item
+#   columns  - property names to fetch from each Item. Rows are then yielded as dicts instead of wrapped Items
+#   prefetch - number of rows to read ahead on a background thread (0 reads on the calling thread)
+#the reader is disposed once it is exhausted or the iterator is closed
+class LFReader(object):
+    def __init__(self, reader, columns = None, prefetch = 0):
+        self._reader = Unbox(reader)
+        self._owner = getattr(reader, '_owner', None)
+        self._columns = list(columns) if columns is not None else None
+        self._prefetch = prefetch
+
+    def __iter__(self):
+        return self._Prefetched() if self._prefetch > 0 else self._Rows()
+
+    #read rows on the current thread
+    def _Rows(self):
+        reader = self._reader
+        reader_type = reader.GetType()
+        read = ResolveMethod(reader_type, 'Read', ())
+        item_prop = GetPropertyMap(reader_type)['Item']
+        no_args = Array[Object]([])
+        columns = self._columns
+        item_type = None
+        try:
+            while INVOKER_CACHE.Invoke(read, reader, no_args):
+                item = INVOKER_CACHE.GetValue(item_prop, reader)
+                if columns is None:
+                    yield Wrap(item, self._owner)
+                    continue
+                #readers return a single type, so resolve the projected properties once
+                if item_type is None:
+                    item_type = item.GetType()
+                    plan = GetPropertyPlan(item_type, columns)
+                yield plan.Read(item, self._owner)
+        finally:
+            self._Dispose()
+
+    #read rows on a background thread, keeping up to prefetch rows buffered
+    def _Prefetched(self):
+        rows = Queue(self._prefetch)
+        stop = threading.Event()
+
+        def put(row):
+            while not stop.is_set():
+                try:
+                    rows.put(row, timeout = 0.1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def produce():
+            source = self._Rows()
+            try:
+                for row in source:
+                    if not put((_ROW, row)):
+                        return
+                put((_END, None))
+            except Exception as e:
+                put((_ERROR, e))
+            finally:
+                source.close()
+
+        producer = threading.Thread(target = produce)
+        producer.daemon = True
+        producer.start()
+        try:
+            while True:
+                kind, value = rows.get()
+                if kind is _ROW:
+                    yield value
+                elif kind is _END:
+                    return
+                else:
+                    raise value
+        finally:
+            stop.set()
+
+    def _Dispose(self):
+        dispose = GetModuleAttr(self._reader, 'Dispose')
+        if dispose is not None:
+            try:
+                dispose()
+            except Exception:
+                pass
+
+_ROW, _END, _ERROR = object(), object(), object()
+
+class LFModuleWrapper:
+    #method to invoke the proper constructor of the given class given the arguments
+    #returns LFModuleInstanceWrapper object that is constructed with output object instance of the called constructor
+    def _construct (self, argv):
+        if self._module is None:
+            raise KeyError("No class has been provided!")
+        tracer = self._owner._tracer if self._owner is not None else None
+        try:
+            if tracer is not None:
+                return TracedInvoke(tracer, '{} [new]'.format(self._TypeName()), self._ResolveConstructor,
+                                    lambda constructor, values: constructor.Invoke(values), argv, self._owner)
+            arg_sig = GetArgSignature(argv)
+            target_constructor = self._ResolveConstructor(arg_sig['key'])
+            #return the retrieved method as an instance of LFModuleInstanceWrapper
+            return LFModuleInstanceWrapper(target_constructor.Invoke(arg_sig['values']), self._owner)
+        except Exception as e:
+            #.NET exceptions raised through reflection carry the real error as the inner exception
+            if getattr(e, 'InnerException', None) is not None:
+                print e.InnerException
+            raise
+
+    def _ResolveConstructor(self, arg_key):
+        target_constructor = ResolveConstructor(self._GetClrType(), arg_key)
+        if target_constructor is None:
+            raise KeyError("No overload of the provided class constructor exists given the provided argument types!")
+        return target_constructor
+            
+    #overload to output the module and not the wrapper
+    def __repr__ (self):
+        return self._module.__repr__()
+
+    def _TypeName(self):
+        return self._module.__name__
+    
+    #overload the __get__ to handle static properties and methods
+    #the result is stored on the instance, so enum members become plain int attributes and methods keep their
+    #LFBoundCall; later lookups of either kind skip __getattr__
+    def __getattr__ (self, attr):
+        #check if the property is an ENUM, Enums return back ints 
+        enum_val = GetModuleAttr(self._module, attr)
+
+        if enum_val == None:
+            raise KeyError("{} is not a valid value for {}".format(attr, self._module))
+        elif type(enum_val) == int:
+            value = enum_val 
+        else:
+            value = LFBoundCall(self, attr)
+        self.__dict__[attr] = value
+        return value
+        
+    #overload the __call__ to invoke our wrapper constructor (unless no args are provided, in which case just output the module)
+    def __call__(self, *argv):
+        if argv is None:
+            return self._module
+        return self._construct(argv)
+    
+    #method to call the appropriate overload of the static's methods given the provided arguments
+    #call is the LFBoundCall of the method
+    def _Call (self, call, argv):
+        if self._owner is not None:
+            return self._owner._StaticCall(self, call, argv)
+        return self._Invoke(call, argv)
+
+    def _Invoke (self, call, argv):
+        tracer = self._owner._tracer if self._owner is not None else None
+        try:
+            if tracer is not None:
+                module = self._module
+                return TracedInvoke(tracer, call.QualifiedName(),
+                                    lambda arg_key: call.Resolve(self._GetClrType(), arg_key),
+                                    lambda method, values: INVOKER_CACHE.Invoke(method, module, values),
+                                    argv, self._owner)
+            arg_sig = GetArgSignature(argv)
+            #try and find the appropriate orverloaded method based on the argument type signature
+            target_method = call.Resolve(self._GetClrType(), arg_sig['key'])
+            return Wrap(INVOKER_CACHE.Invoke(target_method, self._module, arg_sig['values']), self._owner)
+        except Exception as e:
+            #.NET exceptions raised through reflection carry the real error as the inner exception
+            if getattr(e, 'InnerException', None) is not None:
+                print e.InnerException
+            raise
+
+    def _GetClrType(self, mod=None, ver=None):
+        #if args are not passed pull from the instance
+        mod = self._module if mod == None else mod
+        ver = self._version if ver == None else ver
+
+        #if running in ipy use the built in lib
+        if IS_IPY:
+            return clr.GetClrType(mod)
+        else:
+            class_name = mod.__module__ + '.' + mod.__name__
+            namespace = mod.__module__
+            #hack to handle ClientAutomation library
+            if namespace.lower() == 'laserfiche.clientautomation':
+                namespace = 'ClientAutomation'
+
+            qual_name = r'{}, {}, Version={}.0.0, Culture=neutral'.format(
+                class_name, namespace, ver
+            )
+            return Type.GetType(qual_name)
+
+    #accepts a namespace or class, and the LFWrapper it was loaded through (if any)
+    def __init__(self, module, ver, owner = None):
+        self._module = module
+        self._version = ver
+        self._owner = owner
+
+# Define an instance of the LF ClR. Valid Args are:
+# target = <SDK Target>.  Valid options are:
+#       
+class LFWrapper:
+    def __init__(self, argv = None):
+        '''
+        args:
+           RepositoryAccess - An object which maps version to a dll on the local disk
+           LFSOPaths: An object that maps version numbers to a dll on the local disk
+        '''
+        def initialize_module_store(paths, val = None):
+            output = { }
+            for key in paths:
+                output[key] = val 
+            return output
+
+        self._args = argv if argv else Environment()
+        self._lf_credentials = self._args.LaserficheConnection
+        self._loaded_modules = { 
+            'LFSO': initialize_module_store(self._args.LFSO_Paths, { }),
+            'DocumentProcessor': initialize_module_store(self._args.DocumentProcessor_Paths, { }),
+            'RepositoryAccess': initialize_module_store(self._args.RepositoryAccess_Paths, { })
+        }
+        self._sdk = None
+        self._lf_session = None
+        self._db = None
+        self._cache = None
+        self._paths = None
+        self._coalescer = None
+        self._tracer = None
+        self._store = None
+        self._store_closed_at_exit = False
+        #server and database of the session opened by Connect
+        self._connection = None
+        #module wrappers resolved by __getattr__, valid while _resolved_sdk is the loaded SDK
+        self._resolved = {}
+        self._resolved_sdk = None
+        #assemblies and type locations resolved by earlier runs
+        catalog_file = getattr(self._args, 'TypeCatalog', None)
+        self._catalog = None
+        if catalog_file:
+            from lf_catalog import LFTypeCatalog
+            self._catalog = LFTypeCatalog(catalog_file)
+            atexit.register(self._catalog.Save)
+
+    def __repr__(self):
+        return 'LF SDK Wrapper'
+
+    # try to pull a target attribute from RA. Search order is DocumentService, ClientAutomation, RepositoryAccess, SecurityTokenService
+    def _get_fromRA(self, module, attr, ver):
+        #try the namespace the type catalog recorded for attr before searching
+        entry = self._sdk.get('entry')
+        if entry is not None and attr in entry['types']:
+            target = GetModuleAttr(GetModuleAttr(module, entry['types'][attr]), attr)
+            if target != None:
+                return LFModuleWrapper(target, ver, self)
+
+        ns_search_list = ['DocumentService', 'ClientAutomation', 'RepositoryAccess', 'SecurityToken']
+        namespaces = [(n, ns) for n, ns in map(lambda n: (n, GetModuleAttr(module, n)), ns_search_list) if ns != None]
+        for name, ns in namespaces:
+            target = GetModuleAttr(ns, attr)
+            if target != None:
+                if entry is not None:
+                    self._catalog.Record(entry, attr, name)
+                return LFModuleWrapper(target, ver, self)
+            else:
+                continue
+        #if no match is found raise an exception
+        raise KeyError('Command not found')
+
+    # LFSOd does not have namespacing infront of the methods.  We can check the module dir directly and return
+    def _get_fromCOM(self, module, attr):
+        #modules the type catalog knows to hold attr are used without listing them
+        entries = self._sdk.get('entries', {})
+        for mod in module.keys():
+            if mod in entries and attr in entries[mod]['types']:
+                return LFModuleWrapper(getattr(module[mod], attr), None, self)
+
+        for mod in module.keys():
+            namespaces = dir(module[mod])
+            if attr in namespaces:
+                if mod in entries:
+                    self._catalog.Record(entries[mod], attr, mod)
+                return LFModuleWrapper(getattr(module[mod], attr), None, self)
+        raise KeyError('Command not found')
+
+    # this is used to overload the property operator for the LFWrapper object
+    # it will allow short cut access to SDK objects through the wrapper without having to go through
+    # the namespaces or import specific functions from the module.
+    # resolved attributes are memoized and the same module wrapper is handed out until another SDK is loaded
+    def __getattr__(self, attr):
+        if self._sdk == None:
+            raise Exception('SDK is not loaded')
+        if self._resolved_sdk is not self._sdk:
+            self._ResetResolved()
+        target = self._resolved.get(attr)
+        if target is None:
+            type = self._sdk['type']
+            module = self._sdk['module']
+            version = self._sdk.get('version')
+            target = self._get_fromRA(module, attr, version) if type == 'RA' else self._get_fromCOM(module, attr)
+            self._resolved[attr] = target
+        return target
+
+    #forget memoized attributes, e.g. after another SDK version or library was loaded
+    def _ResetResolved(self):
+        self._resolved = {}
+        self._resolved_sdk = self._sdk
+    
+    #resolve the connection arguments. If args are not given pull from environment.py
+    def _GetConnectionArgs(self, kwargs):
+        def GetDefaultCred(key, arg_list):
+            try:
+                return arg_list[key]
+            except KeyError:
+                return self._lf_credentials[key]
+
+        server = GetDefaultCred('server', kwargs)
+        database = GetDefaultCred('database', kwargs)
+        username = GetDefaultCred('username', kwargs) if not 'server' in kwargs or 'username' in kwargs else ''
+        password = GetDefaultCred('password', kwargs) if not 'server' in kwargs or 'password' in kwargs else ''
+        return (server, database, username, password)
+
+    #open a new RA session or LFSO database connection without storing it on the wrapper
+    def _OpenSession(self, server, database, username, password):
+        if self._sdk == None:
+            raise Exception('Please load a version of the SDK')
+        if self._sdk['type'] == 'RA':
+            credentials = (server, database, username, password) if username else (server, database)
+            return self.Session.Create(*credentials)
+        else:
+            app = self.LFApplicationClass()
+            return app.ConnectToDatabase(database, server, username, password)
+
+    def _CloseSession(self, session):
+        if self._sdk['type'] == 'RA':
+            session.Close()
+        else:
+            session.CurrentConnection.Terminate()
+
+    def _IsSessionAlive(self, session):
+        if self._sdk['type'] == 'RA':
+            return session.IsAuthenticated == True
+        return True
+
+    def Connect(self, **kwargs):
+        #helper functions to connect to either LFSO or RA
+        def ConnectRA(server, database, username, password):
+            if self._lf_session != None:
+                raise Exception('Please load a version of the SDK')
+            
+            self._lf_session = self._OpenSession(server, database, username, password)
+            return self._lf_session
+
+        def ConnectLfso(server, database, username, password):
+            if self._db == None:
+                self._db = self._OpenSession(server, database, username, password)
+            return self._db
+            
+        #Function Logic Starts here
+        creds = self._GetConnectionArgs(kwargs)
+        self._connection = creds[:2]
+
+        sdk_loaded = self._sdk != None
+        if sdk_loaded:
+            type = self._sdk['type']
+            return ConnectRA(*creds) if type == 'RA' else ConnectLfso(*creds)
+        else:
+            raise Exception('Please load a version of the SDK')
+
+    def Disconnect(self):
+        def DisconnectLfso():
+            try:
+                self._db.CurrentConnection.Terminate()
+            except:
+                print 'Could not close LFSO connection. Please ensure that you have opened one!'
+
+        def DisconnectRA():
+            try:
+                self._lf_session.Close()
+            except Exception as e:
+                print e
+                print 'Could not close RA session. Please ensure that you have opened one!'
+
+        sdk_loaded = self._sdk != None
+        if sdk_loaded:
+            type = self._sdk['type']
+            return DisconnectRA() if type == 'RA' else DisconnectLfso()
+        else:
+            raise Exception('Please load a version of the SDK')
+
+    #create a pool of sessions that concurrent workers can check out. Connection args are the same as Connect
+    #   with LF.CreatePool(max_size = 8) as pool:
+    #       with pool.Checkout() as sess:
+    #           LF.Entry.GetEntryInfo(id, sess)
+    def CreatePool(self, min_size = 1, max_size = 4, idle_timeout = 300, checkout_timeout = None, **kwargs):
+        if self._sdk == None:
+            raise Exception('Please load a version of the SDK')
+        creds = self._GetConnectionArgs(kwargs)
+        from lf_pool import SessionPool
+        return SessionPool(lambda: self._OpenSession(*creds), min_size = min_size, max_size = max_size,
+                           health_check = self._IsSessionAlive, close = self._CloseSession,
+                           idle_timeout = idle_timeout, checkout_timeout = checkout_timeout)
+
+    #non-blocking front end that runs calls on worker threads with sessions from a new pool
+    #max_per_server caps the calls in flight against the server across every async wrapper in the process
+    #   LF_async = LF.CreateAsync(workers = 8)
+    #   future = LF_async.Entry.GetEntryInfo(id, lf_async.SESSION)
+    def CreateAsync(self, workers = 4, max_per_server = None, idle_timeout = 300, **kwargs):
+        pool = self.CreatePool(min_size = 0, max_size = workers, idle_timeout = idle_timeout, **kwargs)
+        server = self._GetConnectionArgs(kwargs)[0]
+        from lf_async import AsyncLFWrapper
+        return AsyncLFWrapper(self, pool, workers, server, max_per_server, close_pool = True)
+
+    #unit of work that records edits to entries and accounts and applies them with one Save per object
+    #   batch = LF.CreateBatch()
+    #   batch.Entry(id).RenameTo('WF TRIGGER', LF.EntryNameOption.AutoRename)
+    #   print batch.Flush(pool = pool, workers = 8).Report()
+    def CreateBatch(self, loaders = None):
+        if self._sdk == None:
+            raise Exception('Please load a version of the SDK')
+        from lf_batch import LFBatch
+        return LFBatch(self, loaders)
+
+    #static and instance calls made through module/instance wrappers owned by this wrapper are routed
+    #through the optional path index, result cache and coalescer before being invoked
+    #bound is the LFBoundCall being made
+    def _StaticCall(self, module, bound, argv):
+        class_name = module._module.__name__
+        method_name = bound.method_name
+        def invoke(args):
+            if self._coalescer is not None:
+                return self._coalescer.Call(class_name, method_name, args, lambda: module._Invoke(bound, args))
+            return module._Invoke(bound, args)
+
+        def call(args):
+            if self._cache is not None:
+                return self._cache.Call(class_name, method_name, args, lambda: invoke(args),
+                                        lambda: module._Invoke(bound, args))
+            return invoke(args)
+
+        if self._paths is not None:
+            return self._paths.Call(class_name, method_name, argv, call)
+        return call(argv)
+
+    def _InstanceCall(self, target, bound, argv):
+        method_name = bound.method_name
+        def call(args):
+            if self._cache is not None:
+                return self._cache.InstanceCall(target, method_name, args, lambda: target._Invoke(bound, args))
+            return target._Invoke(bound, args)
+
+        if self._paths is not None:
+            return self._paths.InstanceCall(target, method_name, argv, call)
+        return call(argv)
+
+    #cache the results of read-only calls (Entry.GetEntryInfo, Folder.GetFolderInfo, Account.GetInfo, ...)
+    #made through this wrapper for ttl seconds. Mutating calls (Save, RenameTo, Delete, Create, ...)
+    #invalidate the cached results of the entries they touch and all lookups by path
+    def EnableCache(self, ttl = 60, maxsize = 10000, read_methods = None, mutating_methods = None):
+        from lf_cache import LFCallCache
+        self._cache = LFCallCache(ttl, maxsize, read_methods, mutating_methods)
+        return self._cache
+
+    def DisableCache(self):
+        self._cache = None
+
+    def CacheStats(self):
+        return self._cache.Stats() if self._cache is not None else None
+
+    #keep projections of read-only results in a SQLite file across runs (see lf_store.LFResultStore)
+    #results are keyed by repository: the server/database passed to Connect unless given. Pass it when the
+    #calls run on pooled or other sessions, so results of different repositories never share keys
+    #   store = LF.EnablePersistentCache('report.db', 'server/repo')
+    #   row = store.Call(LF.Entry.GetEntryInfo, id, sess, columns = ['Id', 'Name'], token = modified)
+    def EnablePersistentCache(self, file_path, repository = None, max_bytes = 256 * 1024 * 1024):
+        if repository is None:
+            if self._connection is None:
+                raise Exception('Pass the repository the results belong to, or Connect first')
+            repository = '{}/{}'.format(*self._connection)
+        self.DisablePersistentCache()
+        from lf_store import LFResultStore
+        self._store = LFResultStore(file_path, repository, max_bytes)
+        if not self._store_closed_at_exit:
+            atexit.register(self.DisablePersistentCache)
+            self._store_closed_at_exit = True
+        return self._store
+
+    def DisablePersistentCache(self):
+        if self._store is not None:
+            self._store.Close()
+            self._store = None
+
+    def PersistentCacheStats(self):
+        return self._store.Stats() if self._store is not None else None
+
+    #share one invocation between concurrent identical read-only calls. Methods registered with
+    #RegisterBatch on the returned coalescer are also grouped into batches collected over window seconds.
+    #With share_sessions, calls made on different sessions are shared too
+    #   LF.EnableCoalescing().RegisterBatch('Entry', 'GetEntryInfo', lambda ids, sess: [...])
+    def EnableCoalescing(self, read_methods = None, window = 0.005, max_batch = 100, share_sessions = False):
+        from lf_coalesce import LFCoalescer
+        self._coalescer = LFCoalescer(read_methods, window, max_batch, share_sessions)
+        return self._coalescer
+
+    def DisableCoalescing(self):
+        self._coalescer = None
+
+    def CoalescingStats(self):
+        return self._coalescer.Stats() if self._coalescer is not None else None
+
+    #record call counts and marshal/resolve/invoke/wrap timings of every method called through this wrapper
+    #with report_interval, a text report is written to out (stderr by default) every report_interval seconds
+    def EnableTracing(self, report_interval = None, out = None, reset = False):
+        self.DisableTracing()
+        from lf_trace import LFTracer
+        tracer = LFTracer()
+        if report_interval:
+            tracer.StartReporting(report_interval, out, reset)
+        self._tracer = tracer
+        return tracer
+
+    def DisableTracing(self):
+        if self._tracer is not None:
+            self._tracer.StopReporting()
+        self._tracer = None
+
+    #JSON serializable snapshot of the traced calls
+    def TraceStats(self):
+        return self._tracer.Snapshot() if self._tracer is not None else None
+
+    #write the type catalog now instead of at exit
+    def SaveCatalog(self):
+        if self._catalog is not None:
+            self._catalog.Save()
+
+    #keep an index of folder path -> entry id so Folder.GetFolderInfo(path, sess) can be answered by id.
+    #index_file is loaded if it exists, unless it belongs to another repository (by default the server/database
+    #passed to Connect); call SavePathIndex to write the index back for the next run. Loaded FolderInfo objects
+    #are reused for ttl seconds
+    def EnablePathIndex(self, index_file = None, repository = None, ttl = 60):
+        if repository is None and self._connection is not None:
+            repository = '{}/{}'.format(*self._connection)
+        from lf_paths import LFPathIndex, LFPathResolver
+        index = None
+        if index_file is not None and os.path.exists(index_file):
+            index = LFPathIndex.Load(index_file, repository)
+        self._paths = LFPathResolver(index or LFPathIndex(repository), ttl)
+        return self._paths.index
+
+    def DisablePathIndex(self):
+        self._paths = None
+
+    def SavePathIndex(self, index_file):
+        if self._paths is None:
+            raise Exception('The path index is not enabled')
+        self._paths.index.Save(index_file)
+
+    def PathIndexStats(self):
+        return self._paths.Stats() if self._paths is not None else None
+
+    #subfolders of a folder as (name, id) pairs, read from a folder listing
+    def ListSubfolders(self, folder_id, sess):
+        folder = self.Folder.GetFolderInfo(folder_id, sess)
+        settings = self.FolderListingSettings()
+        settings.AddColumn(self.SystemColumn.Name)
+        settings.AddColumn(self.SystemColumn.Id)
+        settings.AddColumn(self.SystemColumn.EntryType)
+        folder_type = self.EntryType.Folder
+        listing = folder.OpenFolderListing(settings, 1000)
+        try:
+            for row in range(1, listing.RowCount + 1):
+                if int(Unbox(listing.GetDatum(row, self.SystemColumn.EntryType))) == folder_type:
+                    yield (listing.GetDatumAsString(row, self.SystemColumn.Name),
+                           int(Unbox(listing.GetDatum(row, self.SystemColumn.Id))))
+        finally:
+            listing.Dispose()
+
+    #walk the folders below path once and add all of them to the path index
+    def WarmPathIndex(self, path, sess, max_depth = None):
+        if self._paths is None:
+            self.EnablePathIndex()
+        folder = self.Folder.GetFolderInfo(path, sess)
+        return self._paths.index.Warm(path, folder.Id, lambda id: list(self.ListSubfolders(id, sess)), max_depth)
+
+    def GetSession(self):
+        if self._lf_session.value != None:
+            return self._lf_session
+        else:
+            raise Exception('Not logged in!')
+
+    def GetCredentials(self):
+        if self._lf_credentials:
+            return self._lf_credentials
+
+    def LoadCom(self, version, module_name):
+        if module_name == "LFSO":
+            self.LoadLfso(version)
+        elif module_name == "DocumentProcessor":
+            self.LoadDocumentProcessor(version)
+        else:
+            raise Exception('Unsupported COM SDK module')
+    
+    def LoadLfso(self, version):
+        lfso_modules = self._loaded_modules['LFSO']
+        module = None
+        lib_name = None
+        
+        entry = self._catalog.Get('LFSO', version) if self._catalog is not None else None
+        if version in lfso_modules.keys() and lfso_modules[version] != {} : 
+            module = lfso_modules[version]
+        else:
+            try:
+                #get the dll path and library name
+                dll_path = self._args.LFSO_Paths[version]
+                lib_name = 'LFSO{}Lib'.format(version.translate(None, '.'))
+
+                #(source, location) to load the library from, in the order they are tried
+                probes = [('gac', None), ('file', dll_path)]
+                def probe(probes):
+                    for source, location in probes:
+                        try:
+                            AddAssemblyReference("Interop." + lib_name if source == 'gac' else dll_path,
+                                                 source == 'file')
+                            return __import__(lib_name), source, location
+                        except Exception:
+                            pass
+                    raise Exception('{} could not be loaded'.format(lib_name))
+
+                #the catalog records where an earlier run found the library. Skip probing and load it from
+                #there the first time it is used
+                if entry is not None:
+                    def load_recorded(entry = entry):
+                        #probe again if the library is no longer where it was recorded, and record where it is now
+                        recorded = [p for p in probes if p[0] == entry['source']]
+                        module, source, location = probe(recorded + [p for p in probes if p not in recorded])
+                        self._catalog.Relocate(entry, source, location)
+                        return module
+                    from lf_catalog import LazyModule
+                    module = LazyModule(load_recorded, lib_name)
+                    lfso_modules[version] = module
+                else:
+                    #loads the LFSO reference and add it to the loaded modules list
+                    #tries to load from GAC first
+                    module, source, location = probe(probes)
+                    lfso_modules[version] = module
+                    if self._catalog is not None:
+                        entry = self._catalog.Put('LFSO', version, source, location)
+            except Exception:
+                print 'Laserfiche Server Object v{} could not be found. Please check your environment.py file'.format(version)
+                
+        #if a module was found set it as the new default
+        if module != None:
+            if self._sdk is None:
+                self._sdk = {'type': 'LFSO', 'module': { 'LFSO': module }, 'entries': {}} 
+            else:
+               	self._sdk['module']['LFSO'] = module
+            if entry is not None:
+                self._sdk.setdefault('entries', {})['LFSO'] = entry
+            else:
+                self._sdk.get('entries', {}).pop('LFSO', None)
+            self._ResetResolved()
+        return module
+    
+    def LoadDocumentProcessor(self, version):
+        doc_modules = self._loaded_modules['DocumentProcessor']
+        module = None
+        
+        if version in doc_modules.keys() and doc_modules[version] != {} : 
+            module = doc_modules[version]
+        else:
+            try:
+                #get the dll path and library name
+                dll_path = self._args.DocumentProcessor_Paths[version]
+                lib_name = 'DocumentProcessor'+version.translate(None, '.')
+
+                #loads the DocumentProcessor reference and add it to the loaded modules list
+                #tries to load from GAC first
+                try:
+                    clr.AddReference("Interop." + lib_name)
+                    module = __import__(lib_name)
+                    doc_modules[version] = module
+                except:
+                    clr.AddReferenceToFileAndPath(dll_path)
+                    module = __import__(lib_name) 
+                    doc_modules[version] = module
+            except Exception:
+                print 'DocumentProcessor v{} could not be found. Please check your environment.py file'.format(version)
+
+        #if a module was found set it as the new default
+        if module != None:
+            if self._sdk is None:
+                self._sdk = { type: 'LFSO', 'module': {'DocumentProcessor':  module } }
+            else:
+                self._sdk['module']['DocumentProcessor'] = module
+            self._ResetResolved()
+        
+        return module
+    
+    def LoadRA(self, version, module_name):
+        def load_from_GAC(module_name, version):
+            ra_pk_token = '3f98b3eaee6c16a6'
+            ca_pk_token = '607dd73ee2bd1c00'
+
+            namespace = 'Laserfiche.{}'.format(module_name)
+            version = r'{}.0.0'.format(version)
+            module_name = module_name if module_name.lower() == 'clientautomation' else r'Laserfiche.{}'.format(module_name)
+            token = ca_pk_token if module_name.lower() == 'clientautomation' else ra_pk_token
+            assembly_name = (r'{}, Version={}, Culture=neutral, PublicKeyToken={}'
+                             ).format(module_name, version, token)
+            try:
+                assembly = clr.AddReference(assembly_name)
+                resolved['location'] = getattr(assembly, 'Location', None)
+                return __import__(namespace)
+            except FileNotFoundException:
+                return None 
+
+        def load_from_file(module_name, version):
+            namespace = 'Laserfiche.{}'.format(module_name)
+            dll_path = (r'{}\{}.dll' if module_name == 'ClientAutomation' else r'{}\Laserfiche.{}.dll'
+                        ).format(self._args.RepositoryAccess_Paths[version], module_name)
+            #IronPython uses a differnt method to load from file
+            try:
+                if 'AddReferenceToFileAndPath' in dir(clr):
+                    clr.AddRefernceToFileAndPath(dll_path)
+                else:
+                    clr.AddReference(dll_path)
+                resolved['location'] = dll_path
+                return __import__(namespace)
+            except FileNotFoundException:
+                return None
+
+        ra_modules = self._loaded_modules['RepositoryAccess']
+        module_whitelist = ['RepositoryAccess', 'DocumentServices', 'ClientAutomation'] 
+        module = None
+        resolved = {}
+
+        #Check to see if the module has already been loaded and is in the cache
+        if version in ra_modules.keys() and module_name in ra_modules[version].keys():
+            module = ra_modules[version][module_name]
+        else:
+            try:
+                library = 'RA.' + module_name
+                entry = self._catalog.Get(library, version) if self._catalog is not None else None
+                if entry is not None:
+                    #the catalog records where an earlier run found the library. Skip probing and load it from
+                    #there the first time it is used
+                    recorded = load_from_GAC if entry['source'] == 'gac' else load_from_file
+                    def load_recorded(entry = entry):
+                        #probe again if the library is no longer where it was recorded, and record where it is now
+                        for source, load in ((entry['source'], recorded), ('gac', load_from_GAC),
+                                             ('file', load_from_file)):
+                            module = load(module_name, version)
+                            if module is not None:
+                                self._catalog.Relocate(entry, source, resolved.get('location'))
+                                return module
+                        return None
+                    from lf_catalog import LazyModule
+                    module = LazyModule(load_recorded, module_name)
+                else:
+                    #try to load the library from the GAC
+                    module = load_from_GAC(module_name, version)
+                    source = 'gac'
+                    #if not found in the gac try to load by file path
+                    if module == None:
+                        module = load_from_file(module_name, version)
+                        source = 'file'
+                    #if not found, raise exception and break out
+                    if module == None:
+                        raise FileNotFoundException(r'{} v{} could not be found. Please ensure the library is in the gac or your environment.py file'.format(module_name, version))
+                    if self._catalog is not None:
+                        entry = self._catalog.Put(library, version, source, resolved.get('location'))
+                #Add module to the cache
+                self._loaded_modules['RepositoryAccess'][version] = {'type': 'RA', 'module': module, 'version': version, 'entry': entry}
+            except FileNotFoundException as ex:
+                print ex.Message
+        if module != None:
+            self._sdk = self._loaded_modules['RepositoryAccess'][version] 
+            self._ResetResolved()
+
+        return module
+
+def main() :
+    global LF
+    LF = LFWrapper(Environment())
+
+# run for debugging
+def debug():
+    global LF
+    LF = LFWrapper(Environment())
+    LF.LoadRA('10.2', 'RepositoryAccess')
+    LF.Connect(server = 'localhost', database = 'Dev301', username='admin', password='a')
+
+    sess = LF.GetSession()
+    root = LF.Folder.GetRootFolder(sess)
+    LF.Folder.Create(root, "test", LF.EntryNameOption.AutoRename, sess)
+
+# Run main if not loaded as a module
+if __name__ == '__main__':
+    if DEBUG:
+        debug()
+    else:
+        main()
+
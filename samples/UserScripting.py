@@ -2,6 +2,10 @@ import sys
 import os
 import clr
 import argparse
+import csv
+import json
+import threading
+import time
 clr.AddReference("System")
 clr.AddReference("System.Reflection")
 from System import *
@@ -12,10 +16,18 @@ sys.path.insert(0, os.pardir)
 
 from environment import Environment
 from lf_wrapper import *
+from lf_bulk import BulkRunner
+from lf_limit import AdaptiveLimiter, SetServerRate
 
 LF = LFWrapper(Environment())
 LF.LoadRA('10.0', 'RepositoryAccess')
 
+#the fields printed for a user, read in one pass
+def UserSummary (user, groups):
+    fields = user.ToDict(["Id", "Name", "FeatureRights", "Privileges"])
+    return {"id": fields["Id"], "name": fields["Name"], "groups": groups,
+            "featureRights": Unbox(fields["FeatureRights"]), "privileges": Unbox(fields["Privileges"])}
+
 #retrieve the Laserfiche user with the provided ID
 def GetUser (LF, id):
     LF.Connect()
@@ -24,36 +36,116 @@ def GetUser (LF, id):
     for x in output.Groups.Unbox():
         groups += (x + ";")
     groups = groups[:-1]
-    print {"id": output.Id.Unbox(), "name": output.Name.Unbox(), "groups": groups, "featureRights": output.FeatureRights.Unbox(), "privileges": output.Privileges.Unbox()}
+    print UserSummary(output, groups)
     LF.Disconnect()
 
-#retrieve all Laserfiche users
+#retrieve all Laserfiche users, streamed to stdout as one JSON object per line
 def GetUsers (LF):
     LF.Connect()
-    result = []
     output = LF.Account.EnumUsers(LF._lf_session)
-    while output.Read().Unbox() == True:
-        result.append({"id": output.Item.Id.Unbox(), "name": output.Item.Name.Unbox()})
-    print result
+    for row in output.Rows(columns=["Id", "Name"], prefetch=500):
+        sys.stdout.write(json.dumps({"id": row["Id"], "name": row["Name"]}) + "\n")
+    sys.stdout.flush()
     LF.Disconnect()
 
+#UserInfo properties set by NewUser, in order. The session has to be set before the others
+USER_FIELDS = ("Session", "Name", "Password", "FeatureRights", "Privileges")
+
+#build and save a new Laserfiche user on the given session
+#groups maps lower case group names to existing groups; without it every group is tried and failures are ignored
+def NewUser (LF, sess, data, groups = None):
+    shell = LF.UserInfo().FromDict({"Session": sess, "Name": data["name"], "Password": data["password"],
+                                    "FeatureRights": data["featureRights"], "Privileges": data["privileges"]},
+                                   USER_FIELDS)
+    for x in data["groups"]:
+        if groups is None:
+            try:
+                shell.JoinGroup(x)
+            except Exception as e:
+                pass
+        elif x.lower() in groups:
+            shell.JoinGroup(groups[x.lower()])
+    return LF.Account.Create(shell, True, sess)
+
 #create a Laserfiche user with the provided data
 def CreateUser (LF, data):
     LF.Connect()
-    shell = LF.UserInfo()
-    shell.Session = LF._lf_session
-    shell.Name = data["name"]
-    shell.Password = data["password"]
-    shell.FeatureRights = data["featureRights"]
-    shell.Privileges = data["privileges"]
-    for x in data["groups"]:
-        try:
-            shell.JoinGroup(x)
-        except Exception as e:
-            pass
-    shell = LF.Account.Create(shell, True, LF._lf_session)
-    print {"id": shell.Id.Unbox(), "name": shell.Name.Unbox(), "groups": data["groups"], "featureRights": shell.FeatureRights.Unbox(), "privileges": shell.Privileges.Unbox()}
+    shell = NewUser(LF, LF._lf_session, data)
+    print UserSummary(shell, data["groups"])
     LF.Disconnect()
+
+#user record read from a bulk input file. str() is the user name, which is what the checkpoint file records
+class UserRecord(dict):
+    def __str__(self):
+        return self["name"]
+
+#read user records from a .csv file (columns name,password,featureRights,privileges,groups with groups
+#separated by ';') or a .jsonl file (one object per line with the same keys, groups as a list)
+def ReadUserRecords (fs, format):
+    if format == "csv":
+        rows = csv.DictReader(fs)
+    else:
+        rows = (json.loads(line) for line in fs if line.strip())
+    for row in rows:
+        groups = row.get("groups") or []
+        if isinstance(groups, basestring):
+            groups = [g.strip() for g in groups.split(";") if g.strip()]
+        yield UserRecord(name = row["name"], password = row["password"], groups = groups,
+                         featureRights = int(row.get("featureRights") or 0),
+                         privileges = int(row.get("privileges") or 0))
+
+#look up every group name once. Returns lower case name -> group name as stored in the repository
+def ResolveGroups (LF, sess):
+    groups = {}
+    for row in LF.Account.EnumGroups(sess).Rows(columns=["Name"]):
+        groups[row["Name"].lower()] = row["Name"]
+    return groups
+
+#thread safe writer of one JSON result per record
+class ResultWriter:
+    def __init__(self, fs):
+        self._fs = fs
+        self._lock = threading.Lock()
+
+    def Write(self, record, **result):
+        result["name"] = record["name"]
+        result["ms"] = round((time.time() - record.started) * 1000, 1)
+        line = json.dumps(result) + "\n"
+        with self._lock:
+            self._fs.write(line)
+            self._fs.flush()
+
+#create every user in the input on pooled sessions, writing a result line per record
+#adaptive and rate limit the calls made to the server (see lf_limit)
+def CreateUsers (LF, input, format, output, workers, retries, checkpoint, adaptive=False, rate=None):
+    pool = LF.CreatePool(max_size=workers)
+    try:
+        with pool.Checkout() as sess:
+            groups = ResolveGroups(LF, sess)
+        results = ResultWriter(output)
+
+        def create(sess, record):
+            #the first attempt's start time, so the timing of retried records includes the retries
+            if not hasattr(record, "started"):
+                record.started = time.time()
+            user = NewUser(LF, sess, record, groups)
+            missing = [g for g in record["groups"] if g.lower() not in groups]
+            results.Write(record, status="created", id=user.Id, missingGroups=missing)
+
+        def failed(record, error):
+            if not hasattr(record, "started"):
+                record.started = time.time()
+            results.Write(record, status="failed", error=str(error))
+
+        limiter = AdaptiveLimiter(max_limit=workers) if adaptive else None
+        bucket = SetServerRate(LF.GetCredentials()["server"], rate) if rate else None
+        runner = BulkRunner(pool, create, workers=workers, retries=retries, checkpoint=checkpoint, on_error=failed,
+                            limiter=limiter, bucket=bucket)
+        with (open(input) if input != None else sys.stdin) as fs:
+            stats = runner.Run(ReadUserRecords(fs, format))
+    finally:
+        pool.Close()
+    sys.stderr.write(stats.Report() + "\n")
     
 #delete the Laserfiche user with the provided ID
 def DeleteUser(LF, id):
@@ -68,7 +160,7 @@ def DeleteUser(LF, id):
 def parse_args():
     parser = argparse.ArgumentParser(description='Perform repository user maintenance...')
     parser.add_argument('--method', '-m', type=str,
-                        help='Method to execute. Options are: GetUser, GetUsers, CreateUser, DeleteUser')
+                        help='Method to execute. Options are: GetUser, GetUsers, CreateUser, CreateUsers, DeleteUser')
     parser.add_argument('--id', '-i', type=int,
                         help='ID specifying a user account. Required for GetUser, DeleteUser')
     parser.add_argument('--name', '-n', type=str,
@@ -81,6 +173,22 @@ def parse_args():
                         help='Privileges of user account. Required for CreateUser')
     parser.add_argument('--groups', '-g', type=str,
                         help='Comma-separated list of groups for user account. Required for CreateUser')
+    parser.add_argument('--input', type=str,
+                        help='CSV or JSONL file of user records for CreateUsers. Reads standard in if omitted')
+    parser.add_argument('--format', type=str, choices=['csv', 'jsonl'], default=None,
+                        help='Format of --input. Defaults to the file extension, or jsonl for standard in')
+    parser.add_argument('--output', '-o', type=str,
+                        help='File the CreateUsers results are written to, one JSON object per record. Defaults to standard out')
+    parser.add_argument('--workers', '-w', type=int, default=4,
+                        help='Number of users created in parallel by CreateUsers. Each worker uses its own session')
+    parser.add_argument('--retries', type=int, default=2,
+                        help='Number of times a failed record is retried by CreateUsers')
+    parser.add_argument('--checkpoint', '-c', type=str,
+                        help='File the names of created users are appended to. Users listed in it are skipped by CreateUsers')
+    parser.add_argument('--adaptive', action='store_true',
+                        help="Adapt the number of users CreateUsers creates at once to the server's latency and errors, up to --workers")
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Maximum number of users per second CreateUsers sends to the server')
   
     return parser.parse_args()
 
@@ -103,11 +211,20 @@ def main ():
             gs = args.groups.split(',')
             data = {"name": name, "password": password, "featureRights": feats, "privileges": privs, "groups": gs}
             return CreateUser(LF, data)
+        elif method == "CreateUsers":
+            format = args.format or ("csv" if args.input and args.input.lower().endswith(".csv") else "jsonl")
+            output = open(args.output, "w") if args.output else sys.stdout
+            try:
+                return CreateUsers(LF, args.input, format, output, args.workers, args.retries, args.checkpoint,
+                                   args.adaptive, args.rate)
+            finally:
+                if args.output:
+                    output.close()
         elif method == "DeleteUser":
             id = args.id
             return DeleteUser(LF, id)
         else:
-            raise Exception("Provided method not supported! Valid methods are: GetUser, GetUsers, CreateUser, DeleteUser. Use --method or -m to specify.")
+            raise Exception("Provided method not supported! Valid methods are: GetUser, GetUsers, CreateUser, CreateUsers, DeleteUser. Use --method or -m to specify.")
     except Exception as e:
         print e
     
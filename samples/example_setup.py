@@ -1,7 +1,11 @@
 import sys
 import os
 import argparse
+import functools
+import threading
+import time
 from random import random
+from collections import OrderedDict
 
 DEFAULT_PATH = "Demo #3 Documents"
 ERROR_RATE = .33
@@ -15,6 +19,9 @@ if 'pdb' in sys.modules:
 sys.path.insert(0, os.pardir)
 
 from lf_wrapper import LFWrapper
+from lf_bulk import BulkRunner, BulkStats
+from lf_shard import ShardRunner
+from lf_limit import AdaptiveLimiter, SetServerRate
 from environment import Environment
 
 def parse_args():
@@ -31,53 +38,217 @@ def parse_args():
                         help="The user you wish to connect with. For Windows Authentication omit this flag.")
     parser.add_argument("-p", "--password", type=str, default=None,
                         help="For Windows Authentication omit this flag.")
+    parser.add_argument("-b", "--batch-size", type=int, default=100,
+                        help="Number of documents handed to a worker at a time.")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+                        help="Number of sessions creating documents in parallel.")
+    parser.add_argument("-P", "--processes", type=int, default=1,
+                        help="Number of worker processes, each with its own wrapper and --workers sessions.")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Adapt the number of concurrent calls to the server's latency and errors, up to --workers.")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Maximum number of documents per second sent to the server.")
     
     #parse the command line args and return 
     return parser.parse_args()
 
-def create_lf_connection(server, repo, username, password):
+def create_lf_pool(server, repo, username, password, workers):
     lf = LFWrapper()
     lf.LoadRA("10.2", "RepositoryAccess")
     if username is None:
-        lf.Connect(server=server, database=repo)
+        pool = lf.CreatePool(max_size=workers, server=server, database=repo)
     else:
-        lf.Connect(server=server, database=repo, username=username, password=password)
-    return lf
+        pool = lf.CreatePool(max_size=workers, server=server, database=repo, username=username, password=password)
+    return lf, pool
 
-def create_documents(lf, count, error_rate):
-    outputs = []
-    sess = lf.GetSession()
-    parent = None
+#look up the parent folder once, creating it if necessary, and hand out a FolderInfo per session
+#pass folder_id when the folder has already been resolved. At most max_sessions FolderInfos are kept, the most
+#recently used ones, so those of sessions the pool has discarded do not pile up
+class ParentFolder:
+    def __init__(self, lf, path, folder_id=None, max_sessions=4):
+        self._lf = lf
+        self._path = path
+        self._id = folder_id
+        self._max_sessions = max_sessions
+        self._folders = OrderedDict()
+        self._lock = threading.Lock()
 
-    #create the parent folder if necessary
-    try:
-        parent = lf.Folder.GetFolderInfo(DEFAULT_PATH, sess)
-    except:
-        root = lf.Folder.GetRootFolder(sess)
-        tocid = lf.Folder.Create(root, DEFAULT_PATH, lf.EntryNameOption.AutoRename, sess)
-        parent = lf.Folder.GetFolderInfo(DEFAULT_PATH, sess)
-   
+    #list the root folder and create the parent folder only if it is not there
+    def _Resolve(self, sess):
+        root = self._lf.Folder.GetRootFolder(sess)
+        for name, folder_id in self._lf.ListSubfolders(root.Id, sess):
+            if name.lower() == self._path.lower():
+                return folder_id
+        return self._lf.Folder.Create(root, self._path, self._lf.EntryNameOption.AutoRename, sess)
+
+    def Get(self, sess):
+        with self._lock:
+            folder = self._folders.pop(sess, None)
+            if folder is not None:
+                self._folders[sess] = folder
+                return folder
+            if self._id is None:
+                self._id = self._Resolve(sess)
+        folder = self._lf.Folder.GetFolderInfo(self._id, sess)
+        with self._lock:
+            self._folders[sess] = folder
+            while len(self._folders) > self._max_sessions:
+                self._folders.popitem(last=False)
+        return folder
+
+#appends log lines to the output file as documents are created, so nothing is lost if the run dies
+class LogWriter:
+    def __init__(self, fs):
+        self._fs = fs
+        self._lock = threading.Lock()
+
+    def Write(self, lines):
+        with self._lock:
+            self._fs.write(''.join(line + '\n' for line in lines))
+            self._fs.flush()
+
+#prints the creation rate and an ETA at most once every interval seconds
+class Progress:
+    def __init__(self, total, interval=5):
+        self._total = total
+        self._interval = interval
+        self._done = 0
+        self._start = time.time()
+        self._last = self._start
+        self._lock = threading.Lock()
+
+    def Add(self, count):
+        with self._lock:
+            self._done += count
+            now = time.time()
+            if now - self._last < self._interval and self._done < self._total:
+                return
+            self._last = now
+            rate = self._done / (now - self._start) if now > self._start else 0.0
+            eta = (self._total - self._done) / rate if rate else 0
+            print "Created {}/{} documents ({:.1f}/s, ETA {}m{:02d}s)".format(
+                self._done, self._total, rate, int(eta) // 60, int(eta) % 60)
+
+#lazily generate the (name, is_error) pairs of the documents to create
+def generate_documents(count, error_rate):
     for i in range(0, count):
         is_error = random() < error_rate
-        doc_name = ("Error Doc {}".format(i)) if is_error else ("Test Doc {}".format(i))
-        entryId = lf.Document.Create(parent, doc_name, lf.EntryNameOption.AutoRename, sess).Unbox()
+        yield ("Error Doc {}".format(i)) if is_error else ("Test Doc {}".format(i)), is_error
+
+#group a stream into lists of at most size items
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+#create one document and return its log line
+def create_document(lf, sess, parent, doc):
+    doc_name, is_error = doc
+    entryId = lf.Document.Create(parent.Get(sess), doc_name, lf.EntryNameOption.AutoRename, sess)
+    return "ERROR - Something went wrong! TOCID={}".format(entryId) if is_error else "SUCCESS - Everything's all good in the hood!"
+
+#create count documents on the pooled sessions, writing each document's log line to log as soon as it exists,
+#so a batch that fails part way still logs the documents it created. limiter is passed to the BulkRunner and
+#bucket caps the documents per second (see lf_limit). The returned stats count documents, not batches
+def create_documents(lf, pool, count, error_rate, log, batch_size=100, workers=4, limiter=None, bucket=None):
+    parent = ParentFolder(lf, DEFAULT_PATH, max_sessions=workers)
+    progress = Progress(count)
+    stats = BulkStats()
 
-        outputs.append(
-            "ERROR - Something went wrong! TOCID={}".format(entryId) if is_error else "SUCCESS - Everything's all good in the hood!"
-        )
-    return outputs
+    def run_batch(sess, batch):
+        for i, doc in enumerate(batch):
+            if bucket is not None:
+                bucket.Acquire()
+            start = time.time()
+            try:
+                line = create_document(lf, sess, parent, doc)
+            except Exception:
+                #the rest of the batch is not attempted and counts as failed too
+                stats.Record(time.time() - start, False)
+                stats.Merge([], 0, len(batch) - i - 1)
+                raise
+            stats.Record(time.time() - start, True)
+            log.Write([line])
+            progress.Add(1)
+
+    #retrying a half finished batch would create duplicate documents, so failures are only reported
+    runner = BulkRunner(pool, run_batch, workers=workers, retries=0, on_error=report_batch_error,
+                        limiter=limiter)
+    stats.Start()
+    runner.Run(batches(generate_documents(count, error_rate), batch_size))
+    stats.Stop()
+    return stats
+
+def report_batch_error(batch, error):
+    print "A batch of {} documents failed, the documents created before the error were logged: {}".format(
+        len(batch), error)
+
+def report_error(doc, error):
+    print "Could not create {}: {}".format(doc[0], error)
+
+#set up a worker process for create_documents_sharded: its own wrapper, pool and parent folder handle
+def create_shard(server, repo, username, password, workers, folder_id):
+    lf, pool = create_lf_pool(server, repo, username, password, workers)
+    return (lf, ParentFolder(lf, DEFAULT_PATH, folder_id, workers)), pool
+
+def create_shard_document(context, sess, doc):
+    lf, parent = context
+    return create_document(lf, sess, parent, doc)
+
+#create_documents spread over worker processes, --batch-size documents at a time. Each document is an item of
+#its own, so its log line reaches this process, which writes the log, even when others in its batch fail
+def create_documents_sharded(creds, count, error_rate, log, batch_size=100, workers=4, processes=4,
+                             adaptive=False, rate=None):
+    #resolve the parent folder once up front so the workers do not race to create it
+    lf, pool = create_lf_pool(*creds, workers=1)
+    try:
+        with pool.Checkout() as sess:
+            folder_id = ParentFolder(lf, DEFAULT_PATH).Get(sess).Id
+    finally:
+        pool.Close()
+
+    progress = Progress(count)
+    def done(doc, line):
+        log.Write([line])
+        progress.Add(1)
+
+    runner = ShardRunner(functools.partial(create_shard, *creds, workers=workers, folder_id=folder_id),
+                         create_shard_document, processes=processes, workers=workers, retries=0,
+                         chunk_size=batch_size, on_success=done, on_error=report_error, adaptive=adaptive, rate=rate)
+    stats = runner.Run(generate_documents(count, error_rate))
+    for index, error in runner.worker_errors:
+        print "Worker process {} failed: {}".format(index, error)
+    return stats
 
 #Generate a set of sample test documents with some random error rate
 #and log errors to the specified log file.
 def main():
     args = parse_args()
     creds = (args.server, args.repository, args.username, args.password)
-    lf = create_lf_connection(*creds)
-    outputs = create_documents(lf, args.count, ERROR_RATE)
+    if args.processes > 1:
+        with open(args.log, "w") as fs:
+            stats = create_documents_sharded(creds, args.count, ERROR_RATE, LogWriter(fs), args.batch_size,
+                                             args.workers, args.processes, args.adaptive, args.rate)
+        print stats.Report()
+        print "Output Written!"
+        return
 
-    with open(args.log, "w") as fs:
-        map(lambda o: fs.write(o + '\n'), outputs) 
+    lf, pool = create_lf_pool(*creds, workers=args.workers)
+    try:
+        with open(args.log, "w") as fs:
+            limiter = AdaptiveLimiter(max_limit=args.workers) if args.adaptive else None
+            bucket = SetServerRate(args.server, args.rate) if args.rate else None
+            stats = create_documents(lf, pool, args.count, ERROR_RATE, LogWriter(fs), args.batch_size, args.workers,
+                                     limiter, bucket)
+    finally:
+        pool.Close()
 
+    print stats.Report()
     print "Output Written!"
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+import sys
+import os
+import argparse
+import threading
+import time
+from Queue import Queue
+
+DEBUG = False
+# Hack for running pdb under ipy. Local path not automatically added to sys
+if 'pdb' in sys.modules:
+    sys.path.insert(0, os.getcwd())
+    DEBUG = True
+#add parent folder to sys path - so that we can load the wrapper and environment variables
+sys.path.insert(0, os.pardir)
+
+from lf_bulk import BulkRunner
+from log_parser import extract_ids, cpu_count
+from lf_trigger import create_lf_pool, trigger_entry, report_error
+
+#In process version of `log_parser.py | lf_trigger.py`.
+#The parser and the trigger are connected by a bounded queue, so when the repository is slow the parser
+#blocks instead of buffering the whole log in memory.
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--input", type=str,
+                        help="Error log to parse. If no file is given, assumes input over standard in.")
+    parser.add_argument("-s", "--server", type=str, required=True,
+                        help="The LF server you wish to connect to.")
+    parser.add_argument("-r", "--repo", type=str, required=True,
+                        help="The LF repository you wish to connect to.")
+    parser.add_argument("-u", "--username", type=str, default=None,
+                        help="The user you wish to connect with. For Windows Authentication omit this flag.")
+    parser.add_argument("-p", "--password", type=str, default=None,
+                        help="For Windows Authentication omit this flag.")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+                        help="Number of entries to update in parallel. Each worker uses its own session.")
+    parser.add_argument("--parsers", type=int, default=cpu_count(),
+                        help="Number of processes scanning the input file.")
+    parser.add_argument("--queue-size", type=int, default=10000,
+                        help="Maximum number of parsed ids waiting to be triggered.")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Number of times a failed entry is retried before it is reported as an error.")
+    parser.add_argument("-c", "--checkpoint", type=str, default=None,
+                        help="Path to a checkpoint file. Finished entry ids are appended to it and skipped when the run is resumed.")
+    parser.add_argument("--unique", action="store_true",
+                        help="Only trigger the first occurrence of each TOCID.")
+    parser.add_argument("--interval", type=int, default=10,
+                        help="Seconds between progress reports.")
+
+    return parser.parse_args()
+
+_DONE = object()
+
+#stage 1: parse ids into the queue on a background thread
+class ParseStage(threading.Thread):
+    def __init__(self, ids, queue):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._ids = ids
+        self._queue = queue
+        self.parsed = 0
+        self.max_depth = 0
+        self.error = None
+
+    def run(self):
+        try:
+            for id in self._ids:
+                if not id:
+                    continue
+                #blocks while the queue is full, which throttles parsing to the trigger's pace
+                self._queue.put(int(id))
+                self.parsed += 1
+                self.max_depth = max(self.max_depth, self._queue.qsize())
+        except Exception as e:
+            self.error = e
+        finally:
+            self._queue.put(_DONE)
+
+#stage 2 input: drain the queue until the parser is done
+def drain(queue):
+    while True:
+        id = queue.get()
+        if id is _DONE:
+            return
+        yield id
+
+#print per stage throughput and queue depth every interval seconds until stop is set
+def monitor(parser, queue, stats, interval, stop):
+    start = time.time()
+    while not stop.wait(interval):
+        elapsed = time.time() - start
+        triggered = stats.succeeded + stats.failed
+        print "parsed {} ({:.1f}/s) | queue {}/{} (max {}) | triggered {} ({:.1f}/s, {} failed)".format(
+            parser.parsed, parser.parsed / elapsed, queue.qsize(), queue.maxsize, parser.max_depth,
+            triggered, triggered / elapsed, stats.failed)
+
+def main():
+    args = parse_args()
+    creds = (args.server, args.repo, args.username, args.password)
+
+    LF, pool = create_lf_pool(*creds, workers=args.workers)
+    queue = Queue(args.queue_size)
+    parser = ParseStage(extract_ids(args.input, args.parsers, dedupe=args.unique), queue)
+    runner = BulkRunner(pool, lambda sess, entryId: trigger_entry(LF, sess, entryId),
+                        workers=args.workers, retries=args.retries, checkpoint=args.checkpoint,
+                        on_error=report_error)
+    stop = threading.Event()
+    reporter = threading.Thread(target=monitor, args=(parser, queue, runner.stats, args.interval, stop))
+    reporter.daemon = True
+
+    parser.start()
+    reporter.start()
+    try:
+        stats = runner.Run(drain(queue))
+    finally:
+        stop.set()
+        reporter.join()
+        pool.Close()
+
+    if parser.error is not None:
+        print "Parsing stopped early: {}".format(parser.error)
+    elapsed = stats.Elapsed()
+    print "Parsed {} ids ({:.1f}/s), max queue depth {}/{}".format(
+        parser.parsed, parser.parsed / elapsed if elapsed else 0.0, parser.max_depth, args.queue_size)
+    print stats.Report()
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,11 @@ sys.path.insert(0, os.pardir)
 
 from environment import Environment
 from lf_wrapper import LFWrapper
+from lf_bulk import BulkRunner
+from lf_shard import ShardRunner
+from lf_limit import AdaptiveLimiter, SetServerRate
 import argparse
+import functools
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -25,35 +29,83 @@ def parse_args():
                         help="")
     parser.add_argument("-i", "--input", type=str,
                         help="Path to an input file for triggering.  The file should contain an entry id on each line.")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+                        help="Number of entries to update in parallel. Each worker uses its own session.")
+    parser.add_argument("-P", "--processes", type=int, default=1,
+                        help="Number of worker processes, each with its own wrapper and --workers sessions.")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Adapt the number of concurrent calls to the server's latency and errors, up to --workers.")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Maximum number of items per second sent to the server.")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Number of times a failed entry is retried before it is reported as an error.")
+    parser.add_argument("-c", "--checkpoint", type=str, default=None,
+                        help="Path to a checkpoint file. Finished entry ids are appended to it and skipped when the run is resumed.")
 
     return parser.parse_args()
 
-def create_lf_connection(server, database, username, password):
+def create_lf_pool(server, database, username, password, workers):
     LF = LFWrapper(Environment())
     LF.LoadRA("10.0", "RepositoryAccess")
     
     if username == None:
-        LF.Connect(server=server, database=database)
+        pool = LF.CreatePool(max_size=workers, server=server, database=database)
     else:
-        LF.Connect(server=server, database=database, username=username, password=password)
-    return LF
+        pool = LF.CreatePool(max_size=workers, server=server, database=database, username=username, password=password)
+    return LF, pool
 
-def trigger_entry(entryId, LF):
-    print "Updating Entry {}".format(entryId)
-    entry = LF.Entry.GetEntryInfo(entryId, LF._lf_session)
+def trigger_entry(LF, sess, entryId):
+    entry = LF.Entry.GetEntryInfo(entryId, sess)
     entry.RenameTo("WF TRIGGER", LF.EntryNameOption.AutoRename)
     entry.Save()
 
+#stream entry ids from the input without reading the whole file first. Lines that are not an id are reported and skipped
+def read_entry_ids(fs):
+    for number, line in enumerate(fs, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entryId = int(line)
+        except ValueError:
+            print "Skipping line {}, not an entry id: {}".format(number, line)
+            continue
+        yield entryId
+
+def report_error(entryId, error):
+    print "Could not update entry {}: {}".format(entryId, error)
+
 def main():
     args = parse_args()
     input = args.input
     creds = (args.server, args.repo, args.username, args.password)
 
-    LF = create_lf_connection(*creds)
-    with (open(input) if input != None else sys.stdin) as fs:
-        for line in [l.rstrip() for l in fs]:
-            entryId = int(line)
-            trigger_entry(entryId, LF)
+    if args.processes > 1:
+        #each process loads the SDK and opens its own pool once, then triggers the entries it is handed
+        runner = ShardRunner(functools.partial(create_lf_pool, *creds, workers=args.workers), trigger_entry,
+                             processes=args.processes, workers=args.workers, retries=args.retries,
+                             checkpoint=args.checkpoint, on_error=report_error, adaptive=args.adaptive, rate=args.rate)
+        with (open(input) if input != None else sys.stdin) as fs:
+            stats = runner.Run(read_entry_ids(fs))
+        for index, error in runner.worker_errors:
+            print "Worker process {} failed: {}".format(index, error)
+        print stats.Report()
+        return
+
+    LF, pool = create_lf_pool(*creds, workers=args.workers)
+    limiter = AdaptiveLimiter(max_limit=args.workers) if args.adaptive else None
+    bucket = SetServerRate(args.server, args.rate) if args.rate else None
+    runner = BulkRunner(pool, lambda sess, entryId: trigger_entry(LF, sess, entryId),
+                        workers=args.workers, retries=args.retries, checkpoint=args.checkpoint,
+                        on_error=report_error, limiter=limiter, bucket=bucket)
+    try:
+        with (open(input) if input != None else sys.stdin) as fs:
+            stats = runner.Run(read_entry_ids(fs))
+    finally:
+        pool.Close()
+    print stats.Report()
+    if limiter is not None:
+        print "Adaptive limit: {}".format(limiter.Stats())
 
 if __name__ == "__main__":
     main()
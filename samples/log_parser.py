@@ -1,22 +1,121 @@
 import sys
+import os
 import argparse
+import mmap
 import re
+from collections import deque
+from itertools import islice
+
+#multiprocessing is missing on IronPython; files are then scanned on the calling thread
+try:
+    from multiprocessing import Pool, cpu_count
+except ImportError:
+    Pool = None
+    def cpu_count():
+        return 1
+
+#matches the TOCID of error lines written by example_setup.py
+ERROR_PATTERN = "ERROR.*TOCID=(\d*)"
+#the same pattern for scanning whole chunks of the file at once. [^\n] keeps the match on a single line
+CHUNK_PATTERN = re.compile(r"^ERROR[^\n]*TOCID=(\d*)", re.MULTILINE)
 
 def parse_args():
     parser = argparse.ArgumentParser()
-    parser.add_argument("-i", "--input", type=str, 
+    parser.add_argument("-i", "--input", type=str,
                         help="Specify an input file.  If no file is given, assumes input over standard in.")
+    parser.add_argument("-w", "--workers", type=int, default=cpu_count(),
+                        help="Number of processes scanning an input file in parallel. Ignored for standard in.")
+    parser.add_argument("--chunk-size", type=int, default=64,
+                        help="Size in MB of the pieces an input file is split into for scanning.")
+    parser.add_argument("-u", "--unique", action="store_true",
+                        help="Only output the first occurrence of each TOCID.")
+
+    return parser.parse_args()
+
+#streaming path: match line by line as input arrives
+def scan_lines(fs):
+    test = re.compile(ERROR_PATTERN)
+    for line in fs:
+        m = test.match(line)
+        if m != None:
+            yield m.group(1)
+
+#split a file into (start, end) offsets of roughly chunk_size bytes that end on a newline
+def chunk_offsets(path, chunk_size):
+    size = os.path.getsize(path)
+    offsets = []
+    if size == 0:
+        return offsets
+    with open(path, "rb") as fs:
+        mm = mmap.mmap(fs.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            start = 0
+            while start < size:
+                end = min(start + chunk_size, size)
+                if end < size:
+                    newline = mm.find("\n", end - 1)
+                    end = size if newline == -1 else newline + 1
+                offsets.append((start, end))
+                start = end
+        finally:
+            mm.close()
+    return offsets
+
+#worker: scan one chunk of the memory mapped file
+def scan_chunk(args):
+    path, start, end = args
+    with open(path, "rb") as fs:
+        mm = mmap.mmap(fs.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return [m.group(1) for m in CHUNK_PATTERN.finditer(mm, start, end)]
+        finally:
+            mm.close()
+
+#scan a file in newline aligned chunks on a process pool (serially when multiprocessing is unavailable).
+#TOCIDs are yielded in file order. At most two chunks per process are scanned ahead of the consumer, so a
+#slow consumer keeps memory flat
+def scan_file(path, workers=None, chunk_size=64 * 1024 * 1024):
+    chunks = [(path, start, end) for start, end in chunk_offsets(path, chunk_size)]
+    if Pool is not None and (workers is None or workers > 1) and len(chunks) > 1:
+        workers = workers or cpu_count()
+        pool = Pool(workers)
+        try:
+            pending = deque()
+            remaining = iter(chunks)
+            for chunk in islice(remaining, workers * 2):
+                pending.append(pool.apply_async(scan_chunk, (chunk,)))
+            while pending:
+                ids = pending.popleft().get()
+                for chunk in islice(remaining, 1):
+                    pending.append(pool.apply_async(scan_chunk, (chunk,)))
+                for id in ids:
+                    yield id
+        finally:
+            pool.terminate()
+    else:
+        for chunk in chunks:
+            for id in scan_chunk(chunk):
+                yield id
+
+#drop repeated TOCIDs, keeping the first occurrence
+def unique(ids):
+    seen = set()
+    for id in ids:
+        if id not in seen:
+            seen.add(id)
+            yield id
 
-    args = parser.parse_args()
-    return open(args.input) if args.input != None else sys.stdin
+#extract the TOCIDs from a file path, or from standard in when no path is given
+def extract_ids(path=None, workers=None, chunk_size=64 * 1024 * 1024, dedupe=False):
+    ids = scan_file(path, workers, chunk_size) if path != None else scan_lines(sys.stdin)
+    return unique(ids) if dedupe else ids
 
 def main():
-    test = re.compile("ERROR.*TOCID=(\d*)")
-    with parse_args() as fs:
-        for line in fs:
-            m = re.match(test, line)
-            if m != None:
-                print m.group(1)
+    args = parse_args()
+    out = sys.stdout
+    for id in extract_ids(args.input, args.workers, args.chunk_size * 1024 * 1024, args.unique):
+        out.write(id + "\n")
+    out.flush()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,31 @@
+#Shared setup for the tests: puts the repository and benchmarks/ on sys.path and installs the fake SDK
+#(benchmarks/fake_clr.py, benchmarks/fake_ra.py), so lf_wrapper runs against the simulated object model
+#without .NET, the Laserfiche assemblies or a server.
+#   python -m unittest discover tests
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.join(ROOT, 'benchmarks')
+for path in (BENCHMARKS, ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import fake_ra
+fake_ra.install()
+
+from lf_wrapper import LFWrapper
+
+#put the fake server back to instant, unlimited calls
+def reset_fake():
+    fake_ra.set_latency(session = 0, read = 0, write = 0, row = 0)
+    fake_ra.set_capacity(None)
+    fake_ra.FOLDERS.Reset()
+    fake_ra.USERS.clear()
+
+#an LFWrapper with the fake RepositoryAccess loaded
+def create_wrapper():
+    reset_fake()
+    lf = LFWrapper(fake_ra.FakeEnvironment())
+    lf.LoadRA('10.2', 'RepositoryAccess')
+    return lf
@@ -0,0 +1,153 @@
+#AsyncLFWrapper: results and errors of calls, pooled sessions, server limits and cancellation
+import threading
+import time
+import unittest
+
+import support
+import fake_ra
+from lf_async import AsyncLFWrapper, Gather, SESSION, SetServerLimit
+
+class AsyncWrapperTest(unittest.TestCase):
+    def setUp(self):
+        self.lf = support.create_wrapper()
+        self.pool = self.lf.CreatePool(min_size = 0, max_size = 4, server = 'fake', database = 'repo')
+        self.addCleanup(self.pool.Close)
+
+    def tearDown(self):
+        support.reset_fake()
+
+    def create_async(self, workers = 4, **options):
+        lf_async = AsyncLFWrapper(self.lf, self.pool, workers, 'fake', **options)
+        self.addCleanup(lf_async.Close)
+        return lf_async
+
+    def test_call_returns_the_result_on_a_pooled_session(self):
+        lf_async = self.create_async()
+        future = lf_async.Entry.GetEntryInfo(7, SESSION)
+        entry = future.result(timeout = 2)
+        self.assertTrue(future.done())
+        self.assertEqual((entry.Id, entry.Name), (7, 'Entry 7'))
+        self.assertEqual(self.pool.Stats()['checkouts'], 1)
+
+    def test_enum_members_are_returned_as_is(self):
+        lf_async = self.create_async()
+        self.assertEqual(lf_async.EntryNameOption.AutoRename, 1)
+
+    def test_errors_are_raised_by_result(self):
+        lf_async = self.create_async()
+        future = lf_async.Folder.GetFolderInfo('\\Missing', SESSION)
+        with self.assertRaises(fake_ra.ObjectNotFoundException):
+            future.result(timeout = 2)
+        self.assertIsInstance(future.exception(), fake_ra.ObjectNotFoundException)
+        #the session was returned to the pool once the worker finished
+        lf_async.Close()
+        self.assertEqual(self.pool.Stats()['in_use'], 0)
+
+    def test_errors_of_run_keep_their_type(self):
+        lf_async = self.create_async()
+        def fail(session, value):
+            raise KeyError(value)
+        with self.assertRaises(KeyError):
+            lf_async.Run(fail, 'missing').result(timeout = 2)
+
+    def test_calls_run_in_parallel(self):
+        fake_ra.set_latency(read = 0.02)
+        lf_async = self.create_async(workers = 4)
+        start = time.time()
+        entries = Gather([lf_async.Entry.GetEntryInfo(id, SESSION) for id in range(8)], timeout = 2)
+        self.assertLess(time.time() - start, 0.12)
+        self.assertEqual([entry.Id for entry in entries], range(8))
+
+    def test_run_keeps_one_session_for_the_whole_function(self):
+        lf_async = self.create_async()
+        def rename(session, id):
+            entry = self.lf.Entry.GetEntryInfo(id, session)
+            entry.RenameTo('renamed', self.lf.EntryNameOption.AutoRename)
+            entry.Save()
+            return session, entry.Name
+        session, name = lf_async.Run(rename, 3).result(timeout = 2)
+        self.assertEqual(name, 'renamed')
+        self.assertTrue(session.IsAuthenticated)
+
+    def test_server_limit_caps_calls_in_flight(self):
+        self.addCleanup(SetServerLimit, 'fake', None)
+        lf_async = self.create_async(workers = 4, max_per_server = 2)
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'peak': 0}
+        def call(session):
+            with lock:
+                state['in_flight'] += 1
+                state['peak'] = max(state['peak'], state['in_flight'])
+            time.sleep(0.01)
+            with lock:
+                state['in_flight'] -= 1
+        Gather([lf_async.Run(call) for i in range(12)], timeout = 5)
+        self.assertEqual(state['peak'], 2)
+
+    def test_result_times_out(self):
+        lf_async = self.create_async(workers = 1)
+        release = threading.Event()
+        future = lf_async.Run(lambda session: release.wait(2))
+        with self.assertRaises(Exception) as raised:
+            future.result(timeout = 0.02)
+        self.assertIn('Timed out', str(raised.exception))
+        release.set()
+        future.result(timeout = 2)
+
+    def test_cancelled_calls_never_run_or_hold_a_session(self):
+        lf_async = self.create_async(workers = 1)
+        release = threading.Event()
+        running = lf_async.Run(lambda session: release.wait(2))
+        ran = []
+        pending = lf_async.Run(lambda session: ran.append(session))
+        called = []
+        pending.add_done_callback(called.append)
+        self.assertTrue(pending.cancel())
+        self.assertTrue(pending.cancelled())
+        self.assertEqual(called, [pending])
+        release.set()
+        running.result(timeout = 2)
+        with self.assertRaises(Exception):
+            pending.result(timeout = 2)
+        lf_async.Close()
+        self.assertEqual(ran, [])
+        self.assertEqual(self.pool.Stats()['in_use'], 0)
+
+    def test_running_calls_cannot_be_cancelled(self):
+        lf_async = self.create_async(workers = 1)
+        started = threading.Event()
+        release = threading.Event()
+        def call(session):
+            started.set()
+            release.wait(2)
+            return 'done'
+        future = lf_async.Run(call)
+        started.wait(2)
+        self.assertFalse(future.cancel())
+        release.set()
+        self.assertEqual(future.result(timeout = 2), 'done')
+
+    def test_close_with_cancel_pending_drops_queued_calls(self):
+        lf_async = self.create_async(workers = 1)
+        release = threading.Event()
+        running = lf_async.Run(lambda session: release.wait(2))
+        queued = [lf_async.Run(lambda session: 'ran') for i in range(3)]
+        closer = threading.Thread(target = lf_async.Close, kwargs = {'cancel_pending': True})
+        closer.start()
+        time.sleep(0.02)
+        release.set()
+        closer.join(2)
+        self.assertTrue(all(future.cancelled() for future in queued))
+        self.assertTrue(running.done())
+        with self.assertRaises(Exception):
+            lf_async.Run(lambda session: None)
+        self.assertEqual(self.pool.Stats()['in_use'], 0)
+
+    def test_create_async_closes_its_own_pool(self):
+        lf_async = self.lf.CreateAsync(workers = 2, server = 'fake', database = 'repo')
+        session = lf_async.Run(lambda session: session).result(timeout = 2)
+        lf_async.Close()
+        self.assertFalse(session.IsAuthenticated)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#LFCallCache through LFWrapper.EnableCache: hit/miss counters, per session results, invalidation by mutating
+#calls and per caller copies of cached objects
+import time
+import unittest
+
+import support
+import fake_ra
+
+class CallCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.lf = support.create_wrapper()
+        self.sess = self.lf.Session.Create('fake', 'repo')
+        self.cache = self.lf.EnableCache(ttl = 60, maxsize = 100)
+        fake_ra.Entry.round_trips = 0
+
+    def tearDown(self):
+        support.reset_fake()
+
+    def test_repeated_reads_hit_the_cache(self):
+        for i in range(5):
+            self.assertEqual(self.lf.Entry.GetEntryInfo(7, self.sess).Name, 'Entry 7')
+        self.lf.Entry.GetEntryInfo(8, self.sess)
+        stats = self.lf.CacheStats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (4, 2, 2))
+        self.assertEqual(fake_ra.Entry.round_trips, 2)
+
+    def test_results_are_cached_per_session(self):
+        other = self.lf.Session.Create('fake', 'repo')
+        self.lf.Entry.GetEntryInfo(7, self.sess)
+        self.lf.Entry.GetEntryInfo(7, other)
+        self.lf.Entry.GetEntryInfo(7, other)
+        self.assertEqual(fake_ra.Entry.round_trips, 2)
+        self.assertEqual(self.lf.CacheStats()['hits'], 1)
+
+    def test_save_invalidates_the_entry(self):
+        entry = self.lf.Entry.GetEntryInfo(7, self.sess)
+        self.lf.Entry.GetEntryInfo(8, self.sess)
+        entry.Save()
+        self.lf.Entry.GetEntryInfo(7, self.sess)
+        self.lf.Entry.GetEntryInfo(8, self.sess)
+        #the first call on the cached 7 reloads it for the caller, then 7 is read again after the Save
+        self.assertEqual(fake_ra.Entry.round_trips, 4)
+        self.assertEqual(self.lf.CacheStats()['invalidated'], 1)
+
+    def test_account_ids_do_not_invalidate_entries(self):
+        fake_ra.USERS[7] = fake_ra.FakeUserInfo(7, 'user7')
+        self.lf.Entry.GetEntryInfo(7, self.sess)
+        self.lf.Account.GetInfo(7, self.sess).Save()
+        self.lf.Entry.GetEntryInfo(7, self.sess)
+        self.assertEqual(fake_ra.Entry.round_trips, 1)
+
+    def test_edits_do_not_reach_other_callers(self):
+        mine = self.lf.Entry.GetEntryInfo(7, self.sess)
+        theirs = self.lf.Entry.GetEntryInfo(7, self.sess)
+        mine.RenameTo('Renamed', self.lf.EntryNameOption.AutoRename)
+        self.assertEqual(mine.Name, 'Renamed')
+        self.assertEqual(theirs.Name, 'Entry 7')
+
+    def test_results_expire_after_ttl(self):
+        self.lf.EnableCache(ttl = 0.05)
+        self.lf.Entry.GetEntryInfo(7, self.sess)
+        time.sleep(0.06)
+        self.lf.Entry.GetEntryInfo(7, self.sess)
+        self.assertEqual(fake_ra.Entry.round_trips, 2)
+        self.assertEqual(self.lf.CacheStats()['expired'], 1)
+
+    def test_disabled_cache_calls_through(self):
+        self.lf.DisableCache()
+        self.lf.Entry.GetEntryInfo(7, self.sess)
+        self.lf.Entry.GetEntryInfo(7, self.sess)
+        self.assertEqual(fake_ra.Entry.round_trips, 2)
+        self.assertIsNone(self.lf.CacheStats())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+#Wrappers shared between threads: bound calls carry their own method, so concurrent callers of
+#one LFModuleWrapper or LFModuleInstanceWrapper never run each other's method
+import sys
+import threading
+import unittest
+
+import support
+import fake_clr
+import fake_ra
+from lf_wrapper import LFBoundCall, LFModuleWrapper, LFModuleInstanceWrapper
+
+#two methods with an int and a string overload each, on a static class and on an instance type
+Stub = fake_clr.FakeType('Stub')
+StubItem = fake_clr.FakeType('StubItem')
+for stub_type in (Stub, StubItem):
+    for method in ('Echo', 'Tag'):
+        stub_type.AddMethod(method, [fake_clr.Int32], lambda _, value, method = method: '{} int {}'.format(method, value))
+        stub_type.AddMethod(method, [fake_clr.String], lambda _, value, method = method: '{} str {}'.format(method, value))
+
+class StubClass:
+    _clr_type = Stub
+    Echo = Tag = 'method'
+
+class FakeStubItem(fake_clr.FakeObject):
+    _clr_type = StubItem
+
+def expected(method, value):
+    return '{} {} {}'.format(method, 'int' if isinstance(value, int) else 'str', value)
+
+#start every thread at once, switching between them as often as possible, and return the errors they collected
+def run_threads(count, target):
+    errors = []
+    ready = threading.Event()
+    def run(n):
+        ready.wait()
+        try:
+            target(n, errors)
+        except Exception as e:
+            errors.append(e)
+    interval = sys.getcheckinterval()
+    sys.setcheckinterval(1)
+    try:
+        threads = [threading.Thread(target = run, args = (n,)) for n in range(count)]
+        for t in threads:
+            t.start()
+        ready.set()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setcheckinterval(interval)
+    return errors
+
+class BoundCallTest(unittest.TestCase):
+    def test_bound_calls_keep_their_own_method(self):
+        static = LFModuleWrapper(StubClass, '10.2')
+        item = LFModuleInstanceWrapper(FakeStubItem())
+        for target in (static, item):
+            echo, tag = target.Echo, target.Tag
+            self.assertIsInstance(echo, LFBoundCall)
+            self.assertEqual(tag(1), 'Tag int 1')
+            self.assertEqual(echo('a'), 'Echo str a')
+            self.assertEqual(echo(2), 'Echo int 2')
+
+    def test_static_bound_calls_are_reused(self):
+        static = LFModuleWrapper(StubClass, '10.2')
+        self.assertIs(static.Echo, static.Echo)
+        self.assertIsNot(static.Echo, static.Tag)
+        self.assertEqual(static.Echo.QualifiedName(), 'StubClass.Echo')
+
+class SharedWrapperTest(unittest.TestCase):
+    def test_threads_sharing_wrappers_call_their_own_methods(self):
+        static = LFModuleWrapper(StubClass, '10.2')
+        item = LFModuleInstanceWrapper(FakeStubItem())
+        def worker(seed, errors):
+            for i in range(300):
+                value = i if (i + seed) % 2 else str(i)
+                #hold on to both bound calls before making either
+                echo, tag = (static.Echo, item.Tag) if (i + seed) % 3 else (item.Echo, static.Tag)
+                for call, method in ((tag, 'Tag'), (echo, 'Echo')):
+                    result = call(value)
+                    if result != expected(method, value):
+                        errors.append((method, value, result))
+        self.assertEqual(run_threads(16, worker), [])
+
+    def test_threads_resolving_overloads_for_the_first_time(self):
+        #a fresh wrapper, so every thread races to resolve the overloads
+        static = LFModuleWrapper(StubClass, '10.2')
+        def worker(seed, errors):
+            value = seed if seed % 2 else str(seed)
+            for method in ('Echo', 'Tag'):
+                result = getattr(static, method)(value)
+                if result != expected(method, value):
+                    errors.append((method, value, result))
+        self.assertEqual(run_threads(32, worker), [])
+
+class SharedLFWrapperTest(unittest.TestCase):
+    def setUp(self):
+        self.lf = support.create_wrapper()
+
+    def tearDown(self):
+        support.reset_fake()
+
+    def test_threads_sharing_one_wrapper_and_their_own_sessions(self):
+        lf = self.lf
+        saves = fake_ra.FakeEntryInfo.saves
+        def worker(seed, errors):
+            sess = lf.Session.Create('fake', 'repo')
+            get = lf.Entry.GetEntryInfo
+            for id in range(seed * 100, seed * 100 + 50):
+                entry = get(id, sess)
+                entry.RenameTo('entry {}'.format(id), lf.EntryNameOption.AutoRename)
+                entry.Save()
+                if (entry.Id, entry.Name) != (id, 'entry {}'.format(id)):
+                    errors.append((id, entry.Id, entry.Name))
+        self.assertEqual(run_threads(8, worker), [])
+        self.assertEqual(fake_ra.FakeEntryInfo.saves, saves + 8 * 50)
+
+    def test_pooled_workers_share_a_bound_call(self):
+        fake_ra.set_latency(read = 0.002)
+        pool = self.lf.CreatePool(min_size = 0, max_size = 8, server = 'fake', database = 'repo')
+        self.addCleanup(pool.Close)
+        get = self.lf.Entry.GetEntryInfo
+        ids = pool.Map(lambda sess, id: get(id, sess).Id, range(200), workers = 8)
+        self.assertEqual(ids, range(200))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#The simulated SDK the benchmarks and tests run on, and the suite's regression check
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import support
+import fake_ra
+import run_suite
+
+class FakeBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.lf = support.create_wrapper()
+
+    def tearDown(self):
+        support.reset_fake()
+
+    def test_session_create_opens_a_session(self):
+        opened = fake_ra.FakeSession.opened
+        sess = self.lf.Session.Create('fake', 'repo')
+        self.assertEqual(fake_ra.FakeSession.opened, opened + 1)
+        self.assertTrue(sess.IsAuthenticated)
+        sess.Close()
+        self.assertFalse(sess.IsAuthenticated)
+
+    def test_calls_take_the_simulated_latency(self):
+        sess = self.lf.Session.Create('fake', 'repo')
+        fake_ra.set_latency(read = 0.02)
+        start = time.time()
+        entry = self.lf.Entry.GetEntryInfo(7, sess)
+        self.assertGreaterEqual(time.time() - start, 0.02)
+        self.assertEqual(entry.Id, 7)
+        self.assertEqual(entry.Name, 'Entry 7')
+
+    def test_overloaded_server_fails_calls(self):
+        #a large capacity keeps the calls that do get through fast
+        fake_ra.set_latency(read = 0.001)
+        fake_ra.set_capacity(1000, overload = 1)
+        fake_ra.LOAD['in_flight'] = 50
+        try:
+            with self.assertRaises(Exception) as raised:
+                for i in range(20):
+                    fake_ra.wait('read')
+        finally:
+            fake_ra.LOAD['in_flight'] = 0
+        self.assertIn('too busy', str(raised.exception))
+
+    def test_readers_return_every_row(self):
+        sess = self.lf.Session.Create('fake', 'repo')
+        count = fake_ra.Account.user_count
+        fake_ra.Account.user_count = 25
+        try:
+            rows = list(self.lf.Account.EnumUsers(sess).Rows(columns = ['Id', 'Name']))
+        finally:
+            fake_ra.Account.user_count = count
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows[-1], {'Id': 25, 'Name': 'user25'})
+
+    def test_missing_folders_raise_not_found(self):
+        sess = self.lf.Session.Create('fake', 'repo')
+        root = self.lf.Folder.GetRootFolder(sess)
+        id = self.lf.Folder.Create(root, 'Imports', self.lf.EntryNameOption.AutoRename, sess)
+        self.assertEqual(self.lf.Folder.GetFolderInfo('\\Imports', sess).Id, id)
+        with self.assertRaises(fake_ra.ObjectNotFoundException):
+            self.lf.Folder.GetFolderInfo('\\Missing', sess)
+
+class SampleTest(unittest.TestCase):
+    def test_trigger_sample_runs_on_the_fake_backend(self):
+        fd, path = tempfile.mkstemp(suffix = '.txt')
+        with os.fdopen(fd, 'w') as fs:
+            fs.write('5\n6\nnot an id\n7\n')
+        try:
+            output = subprocess.check_output(
+                [sys.executable, os.path.join(support.BENCHMARKS, 'run_sample.py'), 'samples/lf_trigger.py',
+                 '-s', 'fake', '-r', 'repo', '-i', path], cwd = support.ROOT, stderr = subprocess.STDOUT)
+        finally:
+            os.remove(path)
+        self.assertIn('Skipping line 3', output)
+        self.assertIn('succeeded: 3  failed: 0', output)
+
+class SuiteTest(unittest.TestCase):
+    def run_with(self, **metrics):
+        return {'results': {'bulk': metrics}}
+
+    def test_compare_reports_regressions_past_the_threshold(self):
+        old = self.run_with(items_per_s = 100.0, p50_ms = 10.0, items = 300)
+        new = self.run_with(items_per_s = 80.0, p50_ms = 10.5, items = 300)
+        rows = dict(((name, metric), regressed) for name, metric, a, b, change, regressed
+                    in run_suite.compare(old, new, 10))
+        self.assertEqual(rows, {('bulk', 'items_per_s'): True, ('bulk', 'p50_ms'): False})
+
+    def test_direction_of_metrics(self):
+        self.assertEqual(run_suite.direction('calls_per_s'), 1)
+        self.assertEqual(run_suite.direction('elapsed_s'), -1)
+        self.assertEqual(run_suite.direction('rows'), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#ToDict / FromDict: property plans read and write many properties in one pass, in the order given
+import unittest
+
+import support
+import fake_clr
+import fake_ra
+from lf_wrapper import LFModuleInstanceWrapper
+
+#record whose Name can only be set once its Session is, like an RA UserInfo
+Record = fake_clr.FakeType('Record').AddProperty('Session').AddProperty('Name')
+
+class FakeRecord(fake_clr.FakeObject):
+    _clr_type = Record
+    _p_Session = _p_Name = None
+
+    def __setattr__(self, name, value):
+        if name == '_p_Name' and self._p_Session is None:
+            raise Exception('The object is not bound to a session')
+        object.__setattr__(self, name, value)
+
+class HydrateTest(unittest.TestCase):
+    def setUp(self):
+        self.lf = support.create_wrapper()
+        self.sess = self.lf.Session.Create('fake', 'repo')
+
+    def tearDown(self):
+        support.reset_fake()
+
+    def test_to_dict_reads_the_named_properties(self):
+        entry = self.lf.Entry.GetEntryInfo(7, self.sess)
+        self.assertEqual(entry.ToDict(['Id', 'Name']), {'Id': 7, 'Name': 'Entry 7'})
+        self.assertEqual(entry.ToDict(), {'Id': 7, 'Name': 'Entry 7'})
+
+    def test_to_dict_wraps_sdk_objects(self):
+        user = self.lf.UserInfo().FromDict({'Session': self.sess, 'Name': 'ann'}, ('Session', 'Name'))
+        session = user.ToDict(['Session'])['Session']
+        self.assertIs(session.Unbox(), self.sess.Unbox())
+
+    def test_unknown_properties_raise(self):
+        entry = self.lf.Entry.GetEntryInfo(7, self.sess)
+        with self.assertRaises(KeyError):
+            entry.ToDict(['Id', 'Missing'])
+        with self.assertRaises(KeyError):
+            entry.FromDict({'Missing': 1})
+
+    def test_from_dict_assigns_in_the_order_of_names(self):
+        data = {'Name': 'ann', 'Session': self.sess}
+        LFModuleInstanceWrapper(FakeRecord()).FromDict(data, ('Session', 'Name'))
+        with self.assertRaises(Exception):
+            LFModuleInstanceWrapper(FakeRecord()).FromDict(data, ('Name', 'Session'))
+
+    def test_from_dict_only_assigns_names(self):
+        user = self.lf.UserInfo().FromDict({'Session': self.sess, 'Name': 'ann', 'Password': 'x'}, ('Session', 'Name'))
+        self.assertEqual(user.ToDict(['Name', 'Password']), {'Name': 'ann', 'Password': None})
+
+    def test_hydrated_user_is_created(self):
+        user = self.lf.UserInfo().FromDict({'Session': self.sess, 'Name': 'ann', 'Password': 'secret',
+                                            'FeatureRights': 3, 'Privileges': 1},
+                                           ('Session', 'Name', 'Password', 'FeatureRights', 'Privileges'))
+        user.JoinGroup('Admins')
+        created = self.lf.Account.Create(user, True, self.sess)
+        saved = fake_ra.USERS[created.Id]
+        self.assertEqual((saved._p_Name, saved._p_Password, saved._p_FeatureRights, saved.groups),
+                         ('ann', 'secret', 3, ['Admins']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#Rate caps and adaptive concurrency: TokenBucket delays, AdaptiveLimiter adjustments, IsServerError and their
+#use by BulkRunner against the fake server
+import threading
+import time
+import unittest
+
+import support
+import fake_ra
+from lf_bulk import BulkRunner
+from lf_limit import AdaptiveLimiter, IsServerError, SetServerRate, ServerBucket, TokenBucket
+
+class TokenBucketTest(unittest.TestCase):
+    def test_burst_is_free_then_calls_are_spaced_by_the_rate(self):
+        bucket = TokenBucket(50, burst = 5)
+        start = time.time()
+        for i in range(5):
+            bucket.Acquire()
+        self.assertLess(time.time() - start, 0.02)
+        for i in range(10):
+            bucket.Acquire()
+        #10 tokens at 50 per second
+        self.assertGreaterEqual(time.time() - start, 0.18)
+        self.assertGreater(bucket.Stats()['waited'], 0.15)
+
+    def test_acquire_times_out(self):
+        bucket = TokenBucket(1, burst = 1)
+        self.assertTrue(bucket.Acquire())
+        start = time.time()
+        self.assertFalse(bucket.Acquire(timeout = 0.05))
+        self.assertLess(time.time() - start, 0.5)
+
+    def test_server_rate_is_shared_per_server(self):
+        bucket = SetServerRate('fake-limit', 10)
+        self.assertIs(ServerBucket('fake-limit'), bucket)
+        self.assertEqual(bucket.burst, 10)
+        self.assertIsNone(SetServerRate('fake-limit', None))
+        self.assertIsNone(ServerBucket('fake-limit'))
+
+class AdaptiveLimiterTest(unittest.TestCase):
+    def test_limit_caps_concurrent_acquires(self):
+        limiter = AdaptiveLimiter(initial = 2)
+        self.assertTrue(limiter.Acquire())
+        self.assertTrue(limiter.Acquire())
+        self.assertFalse(limiter.Acquire(timeout = 0.02))
+        limiter.Release(0.01)
+        self.assertTrue(limiter.Acquire(timeout = 0.02))
+
+    def test_grows_while_saturated_and_shrinks_on_server_errors(self):
+        limiter = AdaptiveLimiter(initial = 4, max_limit = 8)
+        for i in range(4):
+            limiter.Acquire()
+        for i in range(4):
+            limiter.Release(0.01)
+        self.assertEqual(limiter.Stats()['limit'], 5)
+        for i in range(5):
+            limiter.Acquire()
+            limiter.Release(0.0, error = True)
+        self.assertEqual(limiter.Stats()['limit'], 3)
+        self.assertEqual(limiter.decreases, 1)
+
+    def test_shrinks_when_latency_climbs_past_the_baseline(self):
+        limiter = AdaptiveLimiter(initial = 2)
+        for latency in (0.01, 0.01, 0.05, 0.05):
+            limiter.Acquire()
+            limiter.Release(latency)
+        self.assertEqual(limiter.Stats()['limit'], 1)
+
+    def test_server_errors_are_told_apart_from_call_errors(self):
+        self.assertTrue(IsServerError(Exception('The server is too busy to handle the request')))
+        self.assertTrue(IsServerError(IOError('reset')))
+        self.assertFalse(IsServerError(fake_ra.ObjectNotFoundException('Entry not found')))
+
+class LimitedBulkRunTest(unittest.TestCase):
+    def setUp(self):
+        self.lf = support.create_wrapper()
+        self.pool = self.lf.CreatePool(min_size = 0, max_size = 4, server = 'fake', database = 'repo')
+        self.addCleanup(self.pool.Close)
+
+    def tearDown(self):
+        support.reset_fake()
+
+    def test_bucket_delays_the_calls(self):
+        bucket = TokenBucket(100, burst = 1)
+        runner = BulkRunner(self.pool, lambda sess, id: self.lf.Entry.GetEntryInfo(id, sess), workers = 4,
+                            bucket = bucket)
+        stats = runner.Run(range(30))
+        self.assertEqual(stats.succeeded, 30)
+        #29 calls past the burst at 100 per second
+        self.assertGreaterEqual(stats.Elapsed(), 0.27)
+
+    def test_limiter_keeps_calls_in_flight_under_its_limit(self):
+        fake_ra.set_latency(read = 0.005)
+        limiter = AdaptiveLimiter(initial = 2, max_limit = 2)
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'peak': 0}
+        def call(sess, id):
+            with lock:
+                state['in_flight'] += 1
+                state['peak'] = max(state['peak'], state['in_flight'])
+            try:
+                self.lf.Entry.GetEntryInfo(id, sess)
+            finally:
+                with lock:
+                    state['in_flight'] -= 1
+        stats = BulkRunner(self.pool, call, workers = 4, limiter = limiter).Run(range(40))
+        self.assertEqual(stats.succeeded, 40)
+        self.assertLessEqual(state['peak'], 2)
+        self.assertEqual(limiter.Stats()['in_flight'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+#SessionPool sizing, checkout timeouts and session health, with sessions opened through LFWrapper.CreatePool
+import threading
+import time
+import unittest
+
+import support
+import fake_ra
+from lf_pool import SessionPool
+
+class SessionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.lf = support.create_wrapper()
+
+    def tearDown(self):
+        support.reset_fake()
+
+    def create_pool(self, **options):
+        pool = self.lf.CreatePool(server = 'fake', database = 'repo', **options)
+        self.addCleanup(pool.Close)
+        return pool
+
+    def test_opens_min_size_sessions_up_front(self):
+        opened = fake_ra.FakeSession.opened
+        pool = self.create_pool(min_size = 2, max_size = 4)
+        self.assertEqual(fake_ra.FakeSession.opened, opened + 2)
+        stats = pool.Stats()
+        self.assertEqual((stats['size'], stats['idle'], stats['in_use']), (2, 2, 0))
+
+    def test_rejects_invalid_sizes(self):
+        for min_size, max_size in ((-1, 2), (3, 2), (0, 0)):
+            with self.assertRaises(ValueError):
+                SessionPool(lambda: object(), min_size = min_size, max_size = max_size)
+
+    def test_grows_to_max_size_then_times_out(self):
+        pool = self.create_pool(min_size = 0, max_size = 3)
+        sessions = [pool.Acquire() for i in range(3)]
+        self.assertEqual(len(set(sessions)), 3)
+        self.assertEqual(pool.Stats()['in_use'], 3)
+        start = time.time()
+        with self.assertRaises(Exception) as raised:
+            pool.Acquire(timeout = 0.05)
+        self.assertGreaterEqual(time.time() - start, 0.05)
+        self.assertIn('Timed out', str(raised.exception))
+        self.assertEqual(pool.Stats()['size'], 3)
+
+    def test_checkout_timeout_is_the_default_timeout(self):
+        pool = self.create_pool(min_size = 0, max_size = 1, checkout_timeout = 0.05)
+        with pool.Checkout():
+            start = time.time()
+            with self.assertRaises(Exception):
+                pool.Acquire()
+            self.assertGreaterEqual(time.time() - start, 0.05)
+
+    def test_waiting_checkout_gets_the_released_session(self):
+        pool = self.create_pool(min_size = 1, max_size = 1)
+        session = pool.Acquire()
+        timer = threading.Timer(0.05, pool.Release, (session,))
+        timer.start()
+        self.assertIs(pool.Acquire(timeout = 2), session)
+        timer.join()
+        self.assertEqual(pool.Stats()['waits'], 1)
+
+    def test_unhealthy_idle_sessions_are_replaced(self):
+        pool = self.create_pool(min_size = 1, max_size = 1)
+        with pool.Checkout() as session:
+            session.Close()
+        with pool.Checkout() as replacement:
+            self.assertIsNot(replacement, session)
+            self.assertTrue(replacement.IsAuthenticated)
+        self.assertEqual(pool.Stats()['discarded'], 1)
+
+    def test_prune_closes_idle_sessions_down_to_min_size(self):
+        pool = self.create_pool(min_size = 1, max_size = 3, idle_timeout = 0.01)
+        sessions = [pool.Acquire() for i in range(3)]
+        for session in sessions:
+            pool.Release(session)
+        time.sleep(0.02)
+        self.assertEqual(pool.Prune(), 2)
+        self.assertEqual(pool.Stats()['size'], 1)
+        self.assertEqual(sum(1 for session in sessions if not session.IsAuthenticated), 2)
+
+    def test_checkout_discards_the_session_on_error_when_asked(self):
+        pool = self.create_pool(min_size = 0, max_size = 2)
+        with self.assertRaises(KeyError):
+            with pool.Checkout(discard_on_error = True) as session:
+                raise KeyError('broken')
+        self.assertFalse(session.IsAuthenticated)
+        with self.assertRaises(KeyError):
+            with pool.Checkout() as kept:
+                raise KeyError('broken')
+        self.assertTrue(kept.IsAuthenticated)
+        self.assertEqual(pool.Stats()['idle'], 1)
+
+    def test_map_runs_items_on_parallel_sessions_in_order(self):
+        fake_ra.set_latency(read = 0.02)
+        pool = self.create_pool(min_size = 0, max_size = 4)
+        used = set()
+        def read(session, id):
+            used.add(session)
+            return self.lf.Entry.GetEntryInfo(id, session).Id
+        start = time.time()
+        self.assertEqual(pool.Map(read, range(8)), range(8))
+        #8 reads of 20ms on 4 sessions take two rounds, not eight
+        self.assertLess(time.time() - start, 0.12)
+        self.assertEqual(len(used), 4)
+        self.assertEqual(pool.Stats()['in_use'], 0)
+
+    def test_map_raises_the_first_error_after_every_item(self):
+        pool = self.create_pool(min_size = 0, max_size = 2)
+        done = []
+        def run(session, item):
+            if item in (3, 5):
+                raise ValueError(item)
+            done.append(item)
+        with self.assertRaises(ValueError) as raised:
+            pool.Map(run, range(8))
+        self.assertEqual(raised.exception.args, (3,))
+        self.assertEqual(sorted(done), [0, 1, 2, 4, 6, 7])
+
+    def test_close_closes_idle_sessions_and_refuses_checkouts(self):
+        pool = self.create_pool(min_size = 0, max_size = 2)
+        idle = pool.Acquire()
+        busy = pool.Acquire()
+        pool.Release(idle)
+        pool.Close()
+        self.assertFalse(idle.IsAuthenticated)
+        self.assertTrue(busy.IsAuthenticated)
+        with self.assertRaises(Exception):
+            pool.Acquire()
+        #sessions still checked out are closed when they come back
+        pool.Release(busy)
+        self.assertFalse(busy.IsAuthenticated)
+
+if __name__ == '__main__':
+    unittest.main()
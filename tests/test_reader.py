@@ -0,0 +1,74 @@
+#LFReader: rows of SDK readers as wrapped items or column dicts, on the calling thread or prefetched
+import unittest
+
+import support
+import fake_clr
+import fake_ra
+from lf_wrapper import LFModuleInstanceWrapper
+
+#reader that fails after its first row
+BrokenReader = fake_clr.FakeType('BrokenReader').AddProperty('Item')
+
+class FakeBrokenReader(fake_clr.FakeObject):
+    _clr_type = BrokenReader
+    def __init__(self):
+        self._p_Item = None
+        self.disposed = False
+
+    def Read(self):
+        if self._p_Item is not None:
+            raise IOError('connection reset')
+        self._p_Item = fake_ra.FakeUserInfo(1, 'user1')
+        return True
+
+    def Dispose(self):
+        self.disposed = True
+
+BrokenReader.AddMethod('Read', [], FakeBrokenReader.Read)
+BrokenReader.AddMethod('Dispose', [], FakeBrokenReader.Dispose)
+
+class ReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.lf = support.create_wrapper()
+        self.sess = self.lf.Session.Create('fake', 'repo')
+        fake_ra.Account.user_count = 50
+        fake_ra.FakeUserReader.rows_read = 0
+
+    def tearDown(self):
+        fake_ra.Account.user_count = 1000
+        support.reset_fake()
+
+    def test_rows_are_wrapped_items_in_order(self):
+        rows = list(self.lf.Account.EnumUsers(self.sess).Rows())
+        self.assertEqual([row.Name for row in rows], ['user{}'.format(i) for i in range(1, 51)])
+        self.assertEqual(rows[9].Id, 10)
+        self.assertEqual(fake_ra.FakeUserReader.rows_read, 50)
+
+    def test_columns_yield_dicts(self):
+        rows = list(self.lf.Account.EnumUsers(self.sess).Rows(columns = ['Id', 'Name']))
+        self.assertEqual(rows[0], {'Id': 1, 'Name': 'user1'})
+        self.assertEqual(len(rows), 50)
+
+    def test_prefetch_yields_the_same_rows(self):
+        plain = list(self.lf.Account.EnumUsers(self.sess).Rows(columns = ['Id', 'Name']))
+        prefetched = list(self.lf.Account.EnumUsers(self.sess).Rows(columns = ['Id', 'Name'], prefetch = 8))
+        self.assertEqual(prefetched, plain)
+
+    def test_prefetch_reads_at_most_the_buffer_ahead(self):
+        rows = iter(self.lf.Account.EnumUsers(self.sess).Rows(columns = ['Id'], prefetch = 5))
+        self.assertEqual([next(rows)['Id'] for i in range(3)], [1, 2, 3])
+        rows.close()
+        #3 rows taken, up to 5 buffered and one more waiting to be put
+        self.assertLessEqual(fake_ra.FakeUserReader.rows_read, 9)
+
+    def test_reader_errors_are_raised_and_the_reader_is_disposed(self):
+        for prefetch in (0, 4):
+            reader = FakeBrokenReader()
+            rows = iter(LFModuleInstanceWrapper(reader).Rows(columns = ['Name'], prefetch = prefetch))
+            self.assertEqual(next(rows), {'Name': 'user1'})
+            with self.assertRaises(IOError):
+                next(rows)
+            self.assertTrue(reader.disposed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#LFTracer through LFWrapper.EnableTracing: call, property and constructor counts, errors and phase timings
+import json
+import os
+import tempfile
+import unittest
+
+import support
+
+class TracingTest(unittest.TestCase):
+    def setUp(self):
+        self.lf = support.create_wrapper()
+        self.sess = self.lf.Session.Create('fake', 'repo')
+        self.tracer = self.lf.EnableTracing()
+
+    def tearDown(self):
+        self.lf.DisableTracing()
+        support.reset_fake()
+
+    def methods(self):
+        return self.lf.TraceStats()['methods']
+
+    def test_counts_match_the_calls_made(self):
+        for id in range(3):
+            entry = self.lf.Entry.GetEntryInfo(id, self.sess)
+        entry.Save()
+        entry.Save()
+        entry_type = type(entry.Unbox()).__name__
+        methods = self.methods()
+        self.assertEqual(methods['Entry.GetEntryInfo']['count'], 3)
+        self.assertEqual(methods[entry_type + '.Save']['count'], 2)
+        self.assertEqual(methods['Entry.GetEntryInfo']['phases']['total']['count'], 3)
+        self.assertEqual(sum(stats['errors'] for stats in methods.values()), 0)
+
+    def test_property_reads_writes_and_constructors_are_traced(self):
+        entry = self.lf.Entry.GetEntryInfo(7, self.sess)
+        entry.Name
+        entry.Name
+        entry.Name = 'Renamed'
+        self.lf.UserInfo()
+        entry_type = type(entry.Unbox()).__name__
+        methods = self.methods()
+        self.assertEqual(methods[entry_type + '.Name [get]']['count'], 2)
+        self.assertEqual(methods[entry_type + '.Name [set]']['count'], 1)
+        self.assertEqual(sum(stats['count'] for name, stats in methods.items() if name.endswith('[new]')), 1)
+
+    def test_failed_calls_count_as_errors(self):
+        with self.assertRaises(Exception):
+            self.lf.Account.GetInfo(99, self.sess)
+        stats = self.methods()['Account.GetInfo']
+        self.assertEqual((stats['count'], stats['errors']), (1, 1))
+
+    def test_snapshot_is_json_and_saved(self):
+        self.lf.Entry.GetEntryInfo(7, self.sess)
+        fd, path = tempfile.mkstemp(suffix = '.json')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        self.tracer.Save(path)
+        with open(path) as fs:
+            saved = json.load(fs)
+        self.assertEqual(saved['methods']['Entry.GetEntryInfo']['count'], 1)
+        self.assertIn('Entry.GetEntryInfo', self.tracer.Report())
+
+    def test_nothing_is_recorded_once_disabled(self):
+        self.lf.DisableTracing()
+        self.lf.Entry.GetEntryInfo(7, self.sess)
+        self.assertIsNone(self.lf.TraceStats())
+        self.assertEqual(self.tracer.Snapshot()['methods'], {})
+
+if __name__ == '__main__':
+    unittest.main()